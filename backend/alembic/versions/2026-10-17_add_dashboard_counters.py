@@ -0,0 +1,53 @@
+"""add_dashboard_counters
+
+Revision ID: e81c4a6f2d90
+Revises: b62f0e8d4a19
+Create Date: 2026-10-17 17:12:45.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81c4a6f2d90'
+down_revision: Union[str, Sequence[str], None] = 'b62f0e8d4a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dashboard_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('value', sa.DECIMAL(precision=18, scale=2), server_default='0', nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('dashboard_counters_pkey')),
+    sa.UniqueConstraint('name', 'shard', name=op.f('dashboard_counters_name_key'))
+    )
+    op.create_index(op.f('dashboard_counters_id_idx'), 'dashboard_counters', ['id'], unique=False)
+    op.create_index('wine_stock_low_stock_idx', 'wine_stock', ['quantity_available'], unique=False, postgresql_where=sa.text('quantity_available < 10'))
+
+    # Giá trị ban đầu của bộ đếm tính từ dữ liệu hiện có (shard 0)
+    op.execute("""
+        INSERT INTO dashboard_counters (id, name, shard, value, created_at, updated_at)
+        SELECT gen_random_uuid(), counter.name, 0, counter.value, now(), now()
+        FROM (
+            SELECT 'revenue' AS name, COALESCE(SUM(total_amount), 0) AS value FROM orders WHERE status = 'completed'
+            UNION ALL SELECT 'total_orders', COUNT(*) FROM orders
+            UNION ALL SELECT 'pending_orders', COUNT(*) FROM orders WHERE status = 'pending'
+            UNION ALL SELECT 'total_customers', COUNT(*) FROM "user" WHERE role = 'customer'
+        ) AS counter
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('wine_stock_low_stock_idx', table_name='wine_stock', postgresql_where=sa.text('quantity_available < 10'))
+    op.drop_index(op.f('dashboard_counters_id_idx'), table_name='dashboard_counters')
+    op.drop_table('dashboard_counters')
@@ -0,0 +1,44 @@
+"""add_foreign_key_lookup_indexes
+
+Revision ID: 0c7d2e4b8a61
+Revises: 5b9e3c7a1f24
+Create Date: 2026-10-17 19:05:11.286340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c7d2e4b8a61'
+down_revision: Union[str, Sequence[str], None] = '5b9e3c7a1f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('carts_user_id_idx'), 'carts', ['user_id'], unique=False)
+    op.create_index(op.f('cart_items_cart_id_idx'), 'cart_items', ['cart_id'], unique=False)
+    op.create_index('inventory_wine_id_import_date_idx', 'inventory', ['wine_id', 'import_date', 'id'], unique=False)
+    op.create_index(op.f('order_items_order_id_idx'), 'order_items', ['order_id'], unique=False)
+    op.create_index('product_reviews_wine_id_created_at_idx', 'product_reviews', ['wine_id', 'created_at'], unique=False)
+    op.create_index(op.f('wine_images_wine_id_idx'), 'wine_images', ['wine_id'], unique=False)
+    op.create_index('chat_messages_sender_id_created_at_idx', 'chat_messages', ['sender_id', 'created_at'], unique=False)
+    op.create_index('chat_messages_receiver_id_created_at_idx', 'chat_messages', ['receiver_id', 'created_at'], unique=False)
+    op.create_index('promotions_active_window_idx', 'promotions', ['start_date', 'end_date'], unique=False, postgresql_where=sa.text('is_active = true'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('promotions_active_window_idx', table_name='promotions', postgresql_where=sa.text('is_active = true'))
+    op.drop_index('chat_messages_receiver_id_created_at_idx', table_name='chat_messages')
+    op.drop_index('chat_messages_sender_id_created_at_idx', table_name='chat_messages')
+    op.drop_index(op.f('wine_images_wine_id_idx'), table_name='wine_images')
+    op.drop_index('product_reviews_wine_id_created_at_idx', table_name='product_reviews')
+    op.drop_index(op.f('order_items_order_id_idx'), table_name='order_items')
+    op.drop_index('inventory_wine_id_import_date_idx', table_name='inventory')
+    op.drop_index(op.f('cart_items_cart_id_idx'), table_name='cart_items')
+    op.drop_index(op.f('carts_user_id_idx'), table_name='carts')
@@ -0,0 +1,44 @@
+"""add_idempotency_keys
+
+Revision ID: 9a4c2d7e1b63
+Revises: 7f3b9e2a6c15
+Create Date: 2026-10-17 14:12:37.902145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c2d7e1b63'
+down_revision: Union[str, Sequence[str], None] = '7f3b9e2a6c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+    sa.Column('scope', sa.String(length=255), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('idempotency_keys_pkey')),
+    sa.UniqueConstraint('scope', 'key', name=op.f('idempotency_keys_scope_key'))
+    )
+    op.create_index(op.f('idempotency_keys_expires_at_idx'), 'idempotency_keys', ['expires_at'], unique=False)
+    op.create_index(op.f('idempotency_keys_id_idx'), 'idempotency_keys', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('idempotency_keys_id_idx'), table_name='idempotency_keys')
+    op.drop_index(op.f('idempotency_keys_expires_at_idx'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,44 @@
+"""add_order_item_allocations
+
+Revision ID: 7f3b9e2a6c15
+Revises: c4d7a1e9b350
+Create Date: 2026-10-17 13:05:12.184306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3b9e2a6c15'
+down_revision: Union[str, Sequence[str], None] = 'c4d7a1e9b350'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_item_allocations',
+    sa.Column('order_item_id', sa.UUID(), nullable=False),
+    sa.Column('inventory_id', sa.UUID(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], name=op.f('order_item_allocations_inventory_id_fkey')),
+    sa.ForeignKeyConstraint(['order_item_id'], ['order_items.id'], name=op.f('order_item_allocations_order_item_id_fkey')),
+    sa.PrimaryKeyConstraint('id', name=op.f('order_item_allocations_pkey'))
+    )
+    op.create_index(op.f('order_item_allocations_id_idx'), 'order_item_allocations', ['id'], unique=False)
+    op.create_index(op.f('order_item_allocations_inventory_id_idx'), 'order_item_allocations', ['inventory_id'], unique=False)
+    op.create_index(op.f('order_item_allocations_order_item_id_idx'), 'order_item_allocations', ['order_item_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('order_item_allocations_order_item_id_idx'), table_name='order_item_allocations')
+    op.drop_index(op.f('order_item_allocations_inventory_id_idx'), table_name='order_item_allocations')
+    op.drop_index(op.f('order_item_allocations_id_idx'), table_name='order_item_allocations')
+    op.drop_table('order_item_allocations')
@@ -0,0 +1,42 @@
+"""add_order_item_cost_at_completion
+
+Revision ID: 3f8b1d6a9c52
+Revises: 6e2a9d4c7b18
+Create Date: 2026-10-17 23:05:12.640173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8b1d6a9c52'
+down_revision: Union[str, Sequence[str], None] = '6e2a9d4c7b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_items', sa.Column('cost_at_completion', sa.DECIMAL(precision=18, scale=2), nullable=True))
+
+    # Chốt giá vốn cho các đơn completed hiện có (cùng công thức với src/admin/rollups.py)
+    op.execute("""
+        UPDATE order_items oi
+        SET cost_at_completion = COALESCE(
+            (SELECT SUM(a.quantity * i.import_price)
+             FROM order_item_allocations a JOIN inventory i ON i.id = a.inventory_id
+             WHERE a.order_item_id = oi.id),
+            oi.quantity * (SELECT AVG(i.import_price) FROM inventory i WHERE i.wine_id = oi.wine_id),
+            0
+        )
+        FROM orders o
+        WHERE o.id = oi.order_id AND o.status = 'completed'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_items', 'cost_at_completion')
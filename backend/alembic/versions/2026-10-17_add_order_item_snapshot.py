@@ -0,0 +1,48 @@
+"""add_order_item_snapshot
+
+Revision ID: b62f0e8d4a19
+Revises: 3d8e5f1a9c27
+Create Date: 2026-10-17 16:21:45.007391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b62f0e8d4a19'
+down_revision: Union[str, Sequence[str], None] = '3d8e5f1a9c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_items', sa.Column('wine_name', sa.String(length=255), nullable=True))
+    op.add_column('order_items', sa.Column('wine_slug', sa.String(length=255), nullable=True))
+    op.add_column('order_items', sa.Column('wine_thumbnail', sa.Text(), nullable=True))
+
+    # Backfill snapshot cho đơn cũ từ catalog hiện tại (ảnh thumbnail, nếu không có thì ảnh đầu tiên)
+    op.execute("""
+        UPDATE order_items AS oi
+        SET wine_name = w.name,
+            wine_slug = w.slug,
+            wine_thumbnail = (
+                SELECT img.image_url
+                FROM wine_images AS img
+                WHERE img.wine_id = w.id
+                ORDER BY img.is_thumbnail DESC, img.created_at
+                LIMIT 1
+            )
+        FROM wine_info AS w
+        WHERE w.id = oi.wine_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_items', 'wine_thumbnail')
+    op.drop_column('order_items', 'wine_slug')
+    op.drop_column('order_items', 'wine_name')
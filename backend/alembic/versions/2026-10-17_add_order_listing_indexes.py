@@ -0,0 +1,32 @@
+"""add_order_listing_indexes
+
+Revision ID: 3d8e5f1a9c27
+Revises: 9a4c2d7e1b63
+Create Date: 2026-10-17 15:40:03.518274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8e5f1a9c27'
+down_revision: Union[str, Sequence[str], None] = '9a4c2d7e1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('orders_created_at_id_idx', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('orders_status_created_at_idx', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('orders_user_id_created_at_idx', 'orders', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('orders_user_id_created_at_idx', table_name='orders')
+    op.drop_index('orders_status_created_at_idx', table_name='orders')
+    op.drop_index('orders_created_at_id_idx', table_name='orders')
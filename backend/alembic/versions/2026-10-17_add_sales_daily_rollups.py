@@ -0,0 +1,81 @@
+"""add_sales_daily_rollups
+
+Revision ID: 5b9e3c7a1f24
+Revises: e81c4a6f2d90
+Create Date: 2026-10-17 18:36:20.417592
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e3c7a1f24'
+down_revision: Union[str, Sequence[str], None] = 'e81c4a6f2d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Phải khớp settings.ANALYTICS_TIMEZONE lúc chạy migration
+ANALYTICS_TIMEZONE = "Asia/Ho_Chi_Minh"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('wine_id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=True),
+    sa.Column('region_id', sa.UUID(), nullable=True),
+    sa.Column('units', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue', sa.DECIMAL(precision=18, scale=2), server_default='0', nullable=False),
+    sa.Column('cost', sa.DECIMAL(precision=18, scale=2), server_default='0', nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], name=op.f('sales_daily_rollups_category_id_fkey')),
+    sa.ForeignKeyConstraint(['region_id'], ['regions.id'], name=op.f('sales_daily_rollups_region_id_fkey')),
+    sa.ForeignKeyConstraint(['wine_id'], ['wine_info.id'], name=op.f('sales_daily_rollups_wine_id_fkey')),
+    sa.PrimaryKeyConstraint('id', name=op.f('sales_daily_rollups_pkey')),
+    sa.UniqueConstraint('day', 'wine_id', name=op.f('sales_daily_rollups_day_key'))
+    )
+    op.create_index('sales_daily_rollups_category_day_idx', 'sales_daily_rollups', ['category_id', 'day'], unique=False)
+    op.create_index('sales_daily_rollups_region_day_idx', 'sales_daily_rollups', ['region_id', 'day'], unique=False)
+    op.create_index(op.f('sales_daily_rollups_id_idx'), 'sales_daily_rollups', ['id'], unique=False)
+
+    # Backfill từ các đơn completed hiện có (cùng công thức với src/admin/rollups.py)
+    op.execute(f"""
+        INSERT INTO sales_daily_rollups (id, day, wine_id, category_id, region_id, units, revenue, cost, created_at, updated_at)
+        SELECT
+            gen_random_uuid(),
+            (timezone('{ANALYTICS_TIMEZONE}', o.created_at))::date AS day,
+            oi.wine_id,
+            w.category_id,
+            wy.region_id,
+            SUM(oi.quantity),
+            SUM(oi.price_at_purchase * oi.quantity),
+            SUM(COALESCE(
+                (SELECT SUM(a.quantity * i.import_price)
+                 FROM order_item_allocations a JOIN inventory i ON i.id = a.inventory_id
+                 WHERE a.order_item_id = oi.id),
+                oi.quantity * (SELECT AVG(i.import_price) FROM inventory i WHERE i.wine_id = oi.wine_id),
+                0
+            )),
+            now(),
+            now()
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        JOIN wine_info w ON w.id = oi.wine_id
+        LEFT JOIN wineries wy ON wy.id = w.winery_id
+        WHERE o.status = 'completed'
+        GROUP BY 2, oi.wine_id, w.category_id, wy.region_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('sales_daily_rollups_id_idx'), table_name='sales_daily_rollups')
+    op.drop_index('sales_daily_rollups_region_day_idx', table_name='sales_daily_rollups')
+    op.drop_index('sales_daily_rollups_category_day_idx', table_name='sales_daily_rollups')
+    op.drop_table('sales_daily_rollups')
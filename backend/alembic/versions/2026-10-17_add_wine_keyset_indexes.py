@@ -0,0 +1,32 @@
+"""add_wine_keyset_indexes
+
+Revision ID: 5b1e0c7d9a42
+Revises: 6c72f84d0ab5
+Create Date: 2026-10-17 09:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e0c7d9a42'
+down_revision: Union[str, Sequence[str], None] = '6c72f84d0ab5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('wine_info_active_created_at_id_idx', 'wine_info', ['created_at', 'id'], unique=False, postgresql_where=sa.text('is_active = true'))
+    op.create_index('wine_info_active_price_id_idx', 'wine_info', ['price', 'id'], unique=False, postgresql_where=sa.text('is_active = true'))
+    op.create_index('wine_info_active_name_id_idx', 'wine_info', ['name', 'id'], unique=False, postgresql_where=sa.text('is_active = true'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('wine_info_active_name_id_idx', table_name='wine_info', postgresql_where=sa.text('is_active = true'))
+    op.drop_index('wine_info_active_price_id_idx', table_name='wine_info', postgresql_where=sa.text('is_active = true'))
+    op.drop_index('wine_info_active_created_at_id_idx', table_name='wine_info', postgresql_where=sa.text('is_active = true'))
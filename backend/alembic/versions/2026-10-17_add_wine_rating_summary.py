@@ -0,0 +1,46 @@
+"""add_wine_rating_summary
+
+Revision ID: a83f2d6e41c7
+Revises: 5b1e0c7d9a42
+Create Date: 2026-10-17 09:48:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83f2d6e41c7'
+down_revision: Union[str, Sequence[str], None] = '5b1e0c7d9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wine_info', sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('wine_info', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('wine_info', sa.Column('average_rating', sa.DECIMAL(precision=2, scale=1), server_default='0', nullable=False))
+
+    # Backfill từ các review hiện có
+    op.execute("""
+        UPDATE wine_info AS w
+        SET review_count = s.review_count,
+            rating_sum = s.rating_sum,
+            average_rating = ROUND(s.rating_sum::numeric / s.review_count, 1)
+        FROM (
+            SELECT wine_id, COUNT(id) AS review_count, SUM(rating) AS rating_sum
+            FROM product_reviews
+            GROUP BY wine_id
+        ) AS s
+        WHERE w.id = s.wine_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('wine_info', 'average_rating')
+    op.drop_column('wine_info', 'rating_sum')
+    op.drop_column('wine_info', 'review_count')
@@ -0,0 +1,55 @@
+"""add_wine_search_index
+
+Revision ID: 2e9c4b7f1d08
+Revises: a83f2d6e41c7
+Create Date: 2026-10-17 10:31:05.117842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e9c4b7f1d08'
+down_revision: Union[str, Sequence[str], None] = 'a83f2d6e41c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # unaccent() chỉ là STABLE nên không dùng được trong index / generated column.
+    # Gọi với dictionary cố định thì kết quả ổn định -> bọc lại thành IMMUTABLE.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    op.execute("""
+        ALTER TABLE wine_info ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', immutable_unaccent(coalesce(name, ''))), 'A') ||
+            setweight(to_tsvector('simple', immutable_unaccent(replace(coalesce(slug, ''), '-', ' '))), 'B') ||
+            setweight(to_tsvector('simple', immutable_unaccent(coalesce(description, ''))), 'C')
+        ) STORED
+    """)
+    op.create_index('wine_info_search_vector_idx', 'wine_info', ['search_vector'], unique=False, postgresql_using='gin')
+    op.execute(
+        "CREATE INDEX wine_info_name_trgm_idx ON wine_info "
+        "USING gin (immutable_unaccent(lower(name)) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS wine_info_name_trgm_idx")
+    op.drop_index('wine_info_search_vector_idx', table_name='wine_info', postgresql_using='gin')
+    op.drop_column('wine_info', 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
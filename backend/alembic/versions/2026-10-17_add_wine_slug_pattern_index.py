@@ -0,0 +1,28 @@
+"""add_wine_slug_pattern_index
+
+Revision ID: 6e2a9d4c7b18
+Revises: 0c7d2e4b8a61
+Create Date: 2026-10-17 21:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2a9d4c7b18'
+down_revision: Union[str, Sequence[str], None] = '0c7d2e4b8a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('wine_info_slug_pattern_idx', 'wine_info', ['slug'], unique=False, postgresql_ops={'slug': 'varchar_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('wine_info_slug_pattern_idx', table_name='wine_info', postgresql_ops={'slug': 'varchar_pattern_ops'})
@@ -0,0 +1,47 @@
+"""add_wine_stock_table
+
+Revision ID: c4d7a1e9b350
+Revises: 2e9c4b7f1d08
+Create Date: 2026-10-17 11:22:48.530671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7a1e9b350'
+down_revision: Union[str, Sequence[str], None] = '2e9c4b7f1d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wine_stock',
+    sa.Column('wine_id', sa.UUID(), nullable=False),
+    sa.Column('quantity_available', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['wine_id'], ['wine_info.id'], name=op.f('wine_stock_wine_id_fkey')),
+    sa.PrimaryKeyConstraint('id', name=op.f('wine_stock_pkey')),
+    sa.UniqueConstraint('wine_id', name=op.f('wine_stock_wine_id_key'))
+    )
+    op.create_index(op.f('wine_stock_id_idx'), 'wine_stock', ['id'], unique=False)
+
+    # Backfill tổng tồn kho từ các lô hàng hiện có
+    op.execute("""
+        INSERT INTO wine_stock (id, wine_id, quantity_available, created_at, updated_at)
+        SELECT gen_random_uuid(), wine_id, COALESCE(SUM(quantity_available), 0), now(), now()
+        FROM inventory
+        GROUP BY wine_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('wine_stock_id_idx'), table_name='wine_stock')
+    op.drop_table('wine_stock')
@@ -0,0 +1,162 @@
+"""
+Kiểm tra access path: gọi các API nóng (in-process), ghi lại mọi câu SQL chúng chạy,
+rồi EXPLAIN từng câu với enable_seqscan = off. Nếu vẫn còn "Seq Scan" có điều kiện
+lọc thì bảng đó thiếu index cho truy vấn -> exit code 1.
+
+    uv run python -m benchmarks.seed
+    uv run --group bench python -m benchmarks.explain_check
+
+Seq Scan không có điều kiện lọc (đọc toàn bộ bảng nhỏ như category, regions) được bỏ qua.
+Script có tạo đơn hàng (checkout) nên chỉ chạy trên database benchmark.
+"""
+import asyncio
+import json
+import sys
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.seed import load_benchmark_fixture
+from src.auth.security import create_access_token
+from src.core.database import engine
+from src.main import app
+
+PLANNABLE_PREFIXES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_current_route: ContextVar[str | None] = ContextVar("explain_check_route", default=None)
+
+
+@dataclass
+class CapturedQuery:
+    route: str
+    statement: str
+    parameters: tuple
+
+
+@dataclass
+class SeqScanFinding:
+    route: str
+    relation: str
+    filter: str
+    statement: str
+
+
+def _capture(captured: dict[str, CapturedQuery]):
+    """Listener ghi lại câu SQL (mỗi câu 1 lần) của request đang chạy."""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        route = _current_route.get()
+        if route is None or not statement.lstrip().upper().startswith(PLANNABLE_PREFIXES):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        captured.setdefault(statement, CapturedQuery(route, statement, tuple(parameters or ())))
+
+    return before_cursor_execute
+
+
+def _seq_scans(plan: dict):
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Filter"):
+        yield plan.get("Relation Name"), plan["Filter"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+async def drive_hot_routes(client: httpx.AsyncClient):
+    """Các request đại diện cho luồng khách hàng và admin."""
+    fixture = await load_benchmark_fixture()
+    buyer = {"Authorization": f"Bearer {create_access_token({'sub': fixture.buyer_emails[0]})}"}
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': fixture.admin_email})}"}
+    wine_id = fixture.wine_ids[0]
+    popular_wine_id = fixture.popular_wine_ids[0]
+
+    async def call(route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        token = _current_route.set(route)
+        try:
+            response = await client.request(method, url, **kwargs)
+        finally:
+            _current_route.reset(token)
+        if response.status_code >= 400:
+            print(f"  ! {route}: HTTP {response.status_code}", file=sys.stderr)
+        return response
+
+    # Khách hàng
+    await call("wines list", "GET", "/api/products/wines")
+    await call("wines list (price)", "GET", "/api/products/wines", params={"sort_by": "price_asc"})
+    await call("wines search", "GET", "/api/products/wines", params={"search": "chateau"})
+    await call("wine detail", "GET", f"/api/products/wines/{wine_id}")
+    await call("wine reviews", "GET", f"/api/products/wines/{wine_id}/reviews")
+    await call("cart add", "POST", "/api/cart/items", json={"wine_id": str(popular_wine_id), "quantity": 1}, headers=buyer)
+    await call("cart", "GET", "/api/cart", headers=buyer)
+    await call(
+        "checkout",
+        "POST",
+        "/api/cart/orders",
+        json={"shipping_address": "Explain Street", "phone_number": "0900000000"},
+        headers=buyer,
+    )
+    await call("order history", "GET", "/api/cart/orders", headers=buyer)
+    await call("chat history", "GET", "/api/chat/history", headers=buyer)
+
+    # Admin
+    orders = await call("admin orders", "GET", "/api/admin/orders", headers=admin)
+    await call("admin orders (pending)", "GET", "/api/admin/orders", params={"status": "pending"}, headers=admin)
+    if orders.status_code == 200 and orders.json():
+        await call("admin order detail", "GET", f"/api/admin/orders/{orders.json()[0]['id']}", headers=admin)
+    await call("admin stats", "GET", "/api/admin/stats", headers=admin)
+    await call("sales analytics", "GET", "/api/admin/analytics/sales", params={"granularity": "week"}, headers=admin)
+    await call(
+        "sales breakdown", "GET", "/api/admin/analytics/sales/breakdown", params={"group_by": "category"}, headers=admin
+    )
+    await call("inventory", "GET", "/api/inventory", params={"wine_id": str(wine_id)}, headers=admin)
+    await call("chat conversations", "GET", "/api/chat/conversations", headers=admin)
+
+
+async def explain_captured(queries: list[CapturedQuery]) -> list[SeqScanFinding]:
+    findings = []
+    async with engine.connect() as conn:
+        # Tắt seq scan (chỉ trong transaction này): planner chỉ chọn Seq Scan khi không có index nào dùng được
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for query in queries:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {query.statement}", query.parameters)
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            for relation, condition in _seq_scans(plan[0]["Plan"]):
+                findings.append(SeqScanFinding(query.route, relation, condition, query.statement))
+        await conn.rollback()
+    return findings
+
+
+async def run_check() -> int:
+    captured: dict[str, CapturedQuery] = {}
+    listener = _capture(captured)
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://explain-check") as client:
+            await drive_hot_routes(client)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+    findings = await explain_captured(list(captured.values()))
+    print(f"Explained {len(captured)} distinct statements.")
+
+    if not findings:
+        print("OK: no filtered sequential scans.")
+        return 0
+
+    print(f"FAIL: {len(findings)} filtered sequential scan(s):")
+    for finding in findings:
+        statement = " ".join(finding.statement.split())
+        print(f"- [{finding.route}] {finding.relation}: {finding.filter}\n    {statement[:300]}")
+    return 1
+
+
+def main():
+    sys.exit(asyncio.run(run_check()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+Benchmark các API nóng trên Postgres local, xuất kết quả dạng JSON.
+
+    uv run python -m benchmarks.seed
+    uv run --group bench python -m benchmarks.run --output bench.json
+    uv run --group bench python -m benchmarks.run --compare bench.json
+
+Không truyền --base-url thì server được chạy ngay trong process (uvicorn, thread
+riêng với event loop riêng để tải phía client không làm sai lệch thời gian phía
+server). Số câu SQL / thời gian DB mỗi request lấy từ header Server-Timing.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks.seed import BUYER_PASSWORD, BenchmarkFixture, load_benchmark_fixture
+from src.auth.security import create_access_token
+from src.core.config import settings
+from src.core.database import engine
+
+SEARCH_TERMS = ["chateau", "reserve", "vang dalat", "grand cru", "margux"]
+SORTS = [None, "price_asc", "price_desc", "name_asc"]
+
+_SERVER_TIMING_DB_RE = re.compile(r'db;dur=(?P<dur>[\d.]+);desc="(?P<count>\d+) queries"')
+
+
+def parse_db_timing(response: httpx.Response) -> tuple[int, float] | None:
+    """(số câu SQL, thời gian DB ms) từ header Server-Timing do middleware của app gắn vào."""
+    match = _SERVER_TIMING_DB_RE.search(response.headers.get("Server-Timing", ""))
+    if not match:
+        return None
+    return int(match["count"]), float(match["dur"])
+
+
+@dataclass
+class ScenarioResult:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    db_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def record(self, started: float, response: httpx.Response | None = None, ok: bool = True):
+        self.latencies.append(time.perf_counter() - started)
+        if response is not None:
+            ok = ok and response.status_code < 400
+            db_timing = parse_db_timing(response)
+            if db_timing:
+                self.queries.append(db_timing[0])
+                self.db_ms.append(db_timing[1])
+        if not ok:
+            self.errors += 1
+
+    def summary(self) -> dict:
+        if not self.latencies:
+            return {"requests": 0, "errors": self.errors}
+
+        latencies_ms = sorted(latency * 1000 for latency in self.latencies)
+        if len(latencies_ms) > 1:
+            percentiles = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+        else:
+            percentiles = latencies_ms * 99
+        return {
+            "requests": len(latencies_ms),
+            "errors": self.errors,
+            "throughput_rps": round(len(latencies_ms) / self.elapsed, 2) if self.elapsed else None,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies_ms), 2),
+                "p50": round(percentiles[49], 2),
+                "p95": round(percentiles[94], 2),
+                "p99": round(percentiles[98], 2),
+                "max": round(latencies_ms[-1], 2),
+            },
+            "queries_per_request": {
+                "mean": round(statistics.fmean(self.queries), 2),
+                "max": max(self.queries),
+            } if self.queries else None,
+            "db_ms_per_request": round(statistics.fmean(self.db_ms), 2) if self.db_ms else None,
+        }
+
+
+async def run_workers(
+    concurrency: int,
+    total: int,
+    work: Callable[[int, int, ScenarioResult], Awaitable[None]],
+) -> ScenarioResult:
+    """Chạy `total` lượt work(worker_id, iteration, result) trên `concurrency` worker."""
+    result = ScenarioResult()
+    remaining = iter(range(total))
+
+    async def worker(worker_id: int):
+        for iteration in remaining:
+            await work(worker_id, iteration, result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+class Benchmark:
+    def __init__(self, client: httpx.AsyncClient, fixture: BenchmarkFixture, concurrency: int, requests: int, seed: int):
+        self.client = client
+        self.fixture = fixture
+        self.concurrency = concurrency
+        self.requests = requests
+        self.rng = random.Random(seed)
+        self.admin_token = create_access_token({"sub": fixture.admin_email})
+        self.buyer_tokens = [create_access_token({"sub": email}) for email in fixture.buyer_emails]
+        self.metrics_headers = self._auth(settings.METRICS_TOKEN) if settings.METRICS_TOKEN else {}
+
+    def _auth(self, token: str) -> dict:
+        return {"Authorization": f"Bearer {token}"}
+
+    def _buyer_token(self, worker_id: int) -> str:
+        return self.buyer_tokens[worker_id % len(self.buyer_tokens)]
+
+    async def _timed_get(self, result: ScenarioResult, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(url, **kwargs)
+        except httpx.HTTPError:
+            result.record(started, ok=False)
+            return
+        result.record(started, response)
+
+    async def wines_list(self, worker_id, iteration, result):
+        params = {"limit": 20}
+        sort_by = self.rng.choice(SORTS)
+        if sort_by:
+            params["sort_by"] = sort_by
+        if iteration % 4 == 0:
+            params["search"] = self.rng.choice(SEARCH_TERMS)
+        await self._timed_get(result, "/api/products/wines", params=params)
+
+    async def wine_detail(self, worker_id, iteration, result):
+        wine_id = self.rng.choice(self.fixture.wine_ids)
+        await self._timed_get(result, f"/api/products/wines/{wine_id}")
+
+    async def cart(self, worker_id, iteration, result):
+        await self._timed_get(result, "/api/cart", headers=self._auth(self._buyer_token(worker_id)))
+
+    async def create_order(self, worker_id, iteration, result):
+        # Mỗi worker là một người mua riêng; tất cả cùng mua các vang bán chạy
+        headers = self._auth(self._buyer_token(worker_id))
+        for wine_id in self.rng.sample(self.fixture.popular_wine_ids, k=min(2, len(self.fixture.popular_wine_ids))):
+            await self.client.post(
+                "/api/cart/items",
+                json={"wine_id": str(wine_id), "quantity": self.rng.randint(1, 3)},
+                headers=headers,
+            )
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(
+                "/api/cart/orders",
+                json={"shipping_address": "Benchmark Street", "phone_number": "0900000000"},
+                headers={**headers, "Idempotency-Key": str(uuid.uuid4())},
+            )
+        except httpx.HTTPError:
+            result.record(started, ok=False)
+            return
+        result.record(started, response)
+
+    async def admin_stats(self, worker_id, iteration, result):
+        await self._timed_get(result, "/api/admin/stats", headers=self._auth(self.admin_token))
+
+    async def chat_ws(self) -> ScenarioResult:
+        """
+        Mỗi worker là một khách hàng gửi tin qua /chat/ws; đo thời gian tới khi
+        admin (cũng kết nối websocket) nhận được tin đó.
+        """
+        ws_base = str(self.client.base_url).replace("http", "ws", 1).rstrip("/")
+        pending: dict[str, asyncio.Future] = {}
+
+        async with websockets.connect(f"{ws_base}/api/chat/ws?token={self.admin_token}") as admin_ws:
+            async def admin_reader():
+                async for raw in admin_ws:
+                    message = json.loads(raw).get("message")
+                    future = pending.pop(message, None)
+                    if future and not future.done():
+                        future.set_result(time.perf_counter())
+
+            reader = asyncio.create_task(admin_reader())
+            result = ScenarioResult()
+            per_worker = max(1, self.requests // self.concurrency)
+
+            async def customer(worker_id: int):
+                token = self._buyer_token(worker_id)
+                async with websockets.connect(f"{ws_base}/api/chat/ws?token={token}") as ws:
+                    for _ in range(per_worker):
+                        content = f"bench-{uuid.uuid4()}"
+                        future = asyncio.get_running_loop().create_future()
+                        pending[content] = future
+                        started = time.perf_counter()
+                        await ws.send(json.dumps({"message": content}))
+                        try:
+                            received = await asyncio.wait_for(future, timeout=10)
+                            result.latencies.append(received - started)
+                        except asyncio.TimeoutError:
+                            pending.pop(content, None)
+                            result.errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(customer(i) for i in range(self.concurrency)))
+            result.elapsed = time.perf_counter() - started
+            reader.cancel()
+            return result
+
+    async def login(self) -> dict:
+        """
+        Đăng nhập đồng thời (mỗi lần là 1 phép bcrypt) trong khi một probe gọi liên tục
+        /metrics (không đụng DB). Latency của probe = độ trễ event loop phía server:
+        nếu bcrypt chạy trên event loop, probe phải chờ theo từng phép hash.
+        """
+        probe = ScenarioResult()
+        done = asyncio.Event()
+
+        async def work(worker_id, iteration, result):
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(
+                    "/api/auth/login",
+                    data={"username": self.fixture.buyer_emails[iteration % len(self.fixture.buyer_emails)], "password": BUYER_PASSWORD},
+                )
+            except httpx.HTTPError:
+                result.record(started, ok=False)
+                return
+            result.record(started, response)
+
+        async def prober():
+            while not done.is_set():
+                started = time.perf_counter()
+                try:
+                    await self.client.get("/metrics", headers=self.metrics_headers)
+                except httpx.HTTPError:
+                    probe.record(started, ok=False)
+                    continue
+                probe.record(started)
+                await asyncio.sleep(0.01)
+
+        # Probe khi không tải để làm mốc so sánh
+        idle = ScenarioResult()
+        for _ in range(20):
+            started = time.perf_counter()
+            await self.client.get("/metrics", headers=self.metrics_headers)
+            idle.record(started)
+
+        probe_task = asyncio.create_task(prober())
+        logins = await run_workers(self.concurrency, self.requests, work)
+        done.set()
+        await probe_task
+        probe.elapsed = logins.elapsed
+
+        return {
+            **logins.summary(),
+            "probe_idle_latency_ms": idle.summary()["latency_ms"],
+            "probe_latency_ms": probe.summary().get("latency_ms"),
+        }
+
+    async def run(self, scenarios: list[str], warmup: int) -> dict:
+        results = {}
+        for name in scenarios:
+            print(f"Running {name} ...", file=sys.stderr)
+            if name == "chat_ws":
+                results[name] = (await self.chat_ws()).summary()
+                continue
+            if name == "login":
+                results[name] = await self.login()
+                continue
+
+            work = getattr(self, name)
+            if warmup:
+                await run_workers(self.concurrency, warmup, work)
+            results[name] = (await run_workers(self.concurrency, self.requests, work)).summary()
+        return results
+
+
+SCENARIOS = ["wines_list", "wine_detail", "cart", "create_order", "admin_stats", "chat_ws", "login"]
+
+
+class InProcessServer:
+    """Chạy app trong thread riêng (event loop riêng), dừng khi thoát context."""
+
+    def __init__(self, port: int):
+        from src.main import app
+
+        self.config = uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"
+        )
+        self.server = uvicorn.Server(self.config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, max_regression: float) -> list[str]:
+    """So sánh p95 với lần chạy trước, trả về danh sách endpoint bị chậm đi quá ngưỡng."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("latency_ms") or not result.get("latency_ms"):
+            continue
+        old_p95, new_p95 = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        change = (new_p95 - old_p95) / old_p95 if old_p95 else 0.0
+        print(f"{name:14} p95 {old_p95:9.2f} -> {new_p95:9.2f} ms ({change:+.1%})")
+        if change > max_regression:
+            regressions.append(name)
+    return regressions
+
+
+async def run_benchmark(args) -> dict:
+    fixture = await load_benchmark_fixture()
+    if len(fixture.buyer_emails) < args.concurrency:
+        # Mỗi worker cần một giỏ hàng riêng
+        raise SystemExit(f"Need at least {args.concurrency} seeded buyers, found {len(fixture.buyer_emails)}.")
+    # Pool hiện tại gắn với event loop này; server in-process sẽ tạo kết nối mới trên loop của nó
+    await engine.dispose()
+
+    async def execute(base_url: str) -> dict:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            benchmark = Benchmark(client, fixture, args.concurrency, args.requests, args.seed)
+            return await benchmark.run(args.scenarios, args.warmup)
+
+    if args.base_url:
+        results = await execute(args.base_url)
+    else:
+        with InProcessServer(args.port) as server:
+            results = await execute(server.base_url)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "base_url": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "catalog_wines": len(fixture.wine_ids),
+            "buyers": len(fixture.buyer_emails),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TheWineShop hot API paths")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of an in-process one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 slowdown, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        if regressions:
+            raise SystemExit(f"p95 regressed more than {args.max_regression:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
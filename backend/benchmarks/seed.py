@@ -0,0 +1,288 @@
+"""
+Sinh dữ liệu giả lập cho benchmark: catalog lớn, người mua và lịch sử đơn hàng.
+Chạy sau seed_data (dữ liệu mẫu + admin) và chỉ chạy một lần cho mỗi database.
+
+    uv run python -m benchmarks.seed --wines 10000 --buyers 200
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert, select
+
+import src.models  # noqa: F401  (đăng ký toàn bộ mapper)
+from src.admin.counters import rebuild_dashboard_counters
+from src.admin.rollups import rebuild_sales_rollups
+from src.core.database import SessionLocal
+from src.core.security import hash_password
+from src.inventory.stock_service import rebuild_stock_levels
+from src.order.models import Order, OrderItem
+from src.product.models import (
+    Category,
+    GrapeVariety,
+    Inventory,
+    ProductReview,
+    Region,
+    Wine,
+    WineGrape,
+    WineImage,
+    Winery,
+)
+from src.product.rating_service import backfill_rating_summaries
+from src.seed_data import seed_admin_user, seed_products
+from src.user.constants import UserRole, UserStatus
+from src.user.models import User
+from src.utils.datetime_util import time_now
+
+BENCH_PREFIX = "bench"
+BUYER_PASSWORD = "BenchPassword123!"
+ADMIN_EMAIL = "admin@thewineshop.com"
+# Vài vang "bán chạy" có tồn kho rất lớn: mọi người mua trong benchmark create_order
+# cùng đặt các vang này để tạo tranh chấp khóa như giờ cao điểm.
+POPULAR_WINES = 5
+CHUNK_SIZE = 1000
+
+NAME_PREFIXES = ["Chateau", "Domaine", "Clos", "Tenuta", "Bodega", "Vang"]
+NAME_PLACES = ["Dalat", "Margaux", "Pauillac", "Rioja", "Toscana", "Mendoza", "Barossa", "Napa"]
+NAME_SUFFIXES = ["Reserve", "Grand Cru", "Signature", "Classic", "Cuvée Prestige", "Vieilles Vignes"]
+GRAPES = ["Merlot", "Cabernet Sauvignon", "Sauvignon Blanc", "Cardinal", "Pinot Noir", "Syrah", "Chardonnay", "Malbec"]
+ORDER_STATUSES = ["pending", "confirmed", "shipping", "completed", "completed", "completed", "cancelled"]
+
+
+@dataclass
+class BenchmarkFixture:
+    wine_ids: list
+    popular_wine_ids: list
+    buyer_emails: list
+    admin_email: str
+
+
+async def _bulk_insert(db, model, rows: list[dict]):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await db.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+async def seed_benchmark_data(
+    wines: int = 10000,
+    buyers: int = 200,
+    orders_per_buyer: int = 5,
+    reviews_per_wine: int = 3,
+    seed: int = 42,
+):
+    await seed_products()
+    await seed_admin_user()
+
+    rng = random.Random(seed)
+    now = time_now()
+
+    async with SessionLocal() as db:
+        existing = await db.execute(select(Category.id).where(Category.slug == f"{BENCH_PREFIX}-category-0"))
+        if existing.scalar():
+            print("Benchmark data already exists. Skipping.")
+            return
+
+        print(f"Seeding benchmark data: {wines} wines, {buyers} buyers ...")
+
+        categories = [
+            {"name": f"Bench Category {i}", "slug": f"{BENCH_PREFIX}-category-{i}"}
+            for i in range(10)
+        ]
+        regions = [{"name": f"{place} (bench)"} for place in NAME_PLACES]
+        category_ids = (await db.execute(insert(Category).returning(Category.id), categories)).scalars().all()
+        region_ids = (await db.execute(insert(Region).returning(Region.id), regions)).scalars().all()
+
+        wineries = [
+            {"name": f"{BENCH_PREFIX.title()} Winery {i}", "region_id": rng.choice(region_ids)}
+            for i in range(100)
+        ]
+        winery_ids = (await db.execute(insert(Winery).returning(Winery.id), wineries)).scalars().all()
+
+        known_grapes = set((await db.execute(select(GrapeVariety.name))).scalars().all())
+        await _bulk_insert(db, GrapeVariety, [{"name": name} for name in GRAPES if name not in known_grapes])
+        grape_ids = (await db.execute(select(GrapeVariety.id))).scalars().all()
+
+        # 1. Wine + ảnh + giống nho + lô hàng
+        wine_rows = []
+        for i in range(wines):
+            name = f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_PLACES)} {rng.choice(NAME_SUFFIXES)} {i}"
+            wine_rows.append({
+                "name": name,
+                "slug": f"{BENCH_PREFIX}-wine-{i}",
+                "description": f"Vang giả lập số {i} cho benchmark",
+                "alcohol_percentage": Decimal(rng.randint(110, 150)) / 10,
+                "volume": 750,
+                "vintage": rng.randint(1990, 2023),
+                "price": Decimal(rng.randint(20, 2000) * 10000),
+                "is_active": rng.random() > 0.05,
+                "category_id": rng.choice(category_ids),
+                "winery_id": rng.choice(winery_ids),
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+            })
+
+        wine_ids = []
+        for start in range(0, len(wine_rows), CHUNK_SIZE):
+            result = await db.execute(insert(Wine).returning(Wine.id), wine_rows[start:start + CHUNK_SIZE])
+            wine_ids.extend(result.scalars().all())
+
+        image_rows, grape_rows, inventory_rows = [], [], []
+        for index, wine_id in enumerate(wine_ids):
+            for order in range(3):
+                image_rows.append({
+                    "wine_id": wine_id,
+                    "image_url": f"{BENCH_PREFIX}/wines/{index}/{order}.jpg",
+                    "is_thumbnail": order == 0,
+                })
+            for order, grape_id in enumerate(rng.sample(grape_ids, k=2), start=1):
+                grape_rows.append({
+                    "wine_id": wine_id,
+                    "grape_variety_id": grape_id,
+                    "percentage": 60 if order == 1 else 40,
+                    "order": order,
+                })
+            popular = index < POPULAR_WINES
+            for batch in range(2):
+                inventory_rows.append({
+                    "wine_id": wine_id,
+                    "batch_code": f"BENCH{index}-{batch}",
+                    "quantity_available": 1_000_000 if popular else rng.randint(0, 200),
+                    "import_price": wine_rows[index]["price"] * Decimal("0.6"),
+                    "import_date": (now - timedelta(days=30 * (2 - batch))).replace(tzinfo=None),
+                })
+
+        await _bulk_insert(db, WineImage, image_rows)
+        await _bulk_insert(db, WineGrape, grape_rows)
+        await _bulk_insert(db, Inventory, inventory_rows)
+
+        # 2. Người mua (hash mật khẩu một lần cho tất cả)
+        hashed_password = await hash_password(BUYER_PASSWORD)
+        buyer_rows = [
+            {
+                "email": f"{BENCH_PREFIX}-buyer-{i}@example.com",
+                "hashed_password": hashed_password,
+                "first_name": "Bench",
+                "last_name": f"Buyer {i}",
+                "role": UserRole.CUSTOMER.value,
+                "status": UserStatus.ACTIVE.value,
+                "email_verified": True,
+                "address_line_1": f"{i} Benchmark Street",
+            }
+            for i in range(buyers)
+        ]
+        buyer_ids = (await db.execute(insert(User).returning(User.id), buyer_rows)).scalars().all()
+
+        # 3. Lịch sử đơn hàng & review
+        order_rows, order_item_rows = [], []
+        for buyer_id in buyer_ids:
+            for _ in range(orders_per_buyer):
+                created_at = now - timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 1440))
+                order = {
+                    "user_id": buyer_id,
+                    "status": rng.choice(ORDER_STATUSES),
+                    "shipping_address": "Benchmark Street",
+                    "phone_number": "0900000000",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+                total = Decimal(0)
+                for wine_index in rng.sample(range(len(wine_ids)), k=rng.randint(1, 3)):
+                    quantity = rng.randint(1, 3)
+                    price = wine_rows[wine_index]["price"]
+                    total += quantity * price
+                    order_item_rows.append((len(order_rows), {
+                        "wine_id": wine_ids[wine_index],
+                        "quantity": quantity,
+                        "price_at_purchase": price,
+                        "wine_name": wine_rows[wine_index]["name"],
+                        "wine_slug": wine_rows[wine_index]["slug"],
+                        "wine_thumbnail": f"{BENCH_PREFIX}/wines/{wine_index}/0.jpg",
+                    }))
+                order["total_amount"] = total
+                order_rows.append(order)
+
+        order_ids = []
+        for start in range(0, len(order_rows), CHUNK_SIZE):
+            result = await db.execute(insert(Order).returning(Order.id), order_rows[start:start + CHUNK_SIZE])
+            order_ids.extend(result.scalars().all())
+        await _bulk_insert(db, OrderItem, [
+            {**item, "order_id": order_ids[order_index]} for order_index, item in order_item_rows
+        ])
+
+        review_rows = [
+            {
+                "user_id": rng.choice(buyer_ids),
+                "wine_id": wine_id,
+                "rating": rng.randint(1, 5),
+                "comment": "Review giả lập",
+            }
+            for wine_id in wine_ids
+            for _ in range(rng.randint(0, reviews_per_wine))
+        ] if buyer_ids else []
+        await _bulk_insert(db, ProductReview, review_rows)
+
+        await db.commit()
+
+    # 4. Bảng tổng hợp (tồn kho, điểm đánh giá, bộ đếm dashboard, doanh số) tính lại bằng các hàm có sẵn
+    await rebuild_stock_levels()
+    await backfill_rating_summaries()
+    await rebuild_dashboard_counters()
+    await rebuild_sales_rollups()
+
+    print("Benchmark seeding complete!")
+
+
+async def load_benchmark_fixture() -> BenchmarkFixture:
+    """Id / email cần cho benchmark runner, đọc từ dữ liệu đã seed."""
+    async with SessionLocal() as db:
+        wine_ids = (
+            await db.execute(
+                select(Wine.id)
+                .where(Wine.slug.like(f"{BENCH_PREFIX}-wine-%"), Wine.is_active == True)
+                .order_by(Wine.slug)
+            )
+        ).scalars().all()
+        popular_wine_ids = (
+            await db.execute(
+                select(Wine.id).where(Wine.slug.in_([f"{BENCH_PREFIX}-wine-{i}" for i in range(POPULAR_WINES)]))
+            )
+        ).scalars().all()
+        buyer_emails = (
+            await db.execute(
+                select(User.email).where(User.email.like(f"{BENCH_PREFIX}-buyer-%")).order_by(User.email)
+            )
+        ).scalars().all()
+
+    if not wine_ids or not buyer_emails:
+        raise SystemExit("Benchmark data not found, run `python -m benchmarks.seed` first.")
+
+    return BenchmarkFixture(
+        wine_ids=list(wine_ids),
+        popular_wine_ids=list(popular_wine_ids),
+        buyer_emails=list(buyer_emails),
+        admin_email=ADMIN_EMAIL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic data for benchmarks")
+    parser.add_argument("--wines", type=int, default=10000)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--orders-per-buyer", type=int, default=5)
+    parser.add_argument("--reviews-per-wine", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    asyncio.run(seed_benchmark_data(
+        wines=args.wines,
+        buyers=args.buyers,
+        orders_per_buyer=args.orders_per_buyer,
+        reviews_per_wine=args.reviews_per_wine,
+        seed=args.seed,
+    ))
+
+
+if __name__ == "__main__":
+    main()
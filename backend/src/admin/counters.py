@@ -0,0 +1,138 @@
+import asyncio
+import random
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from enum import StrEnum
+from typing import Mapping
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.admin.models import DashboardCounter
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.order.models import Order
+from src.user.constants import UserRole
+from src.user.models import User
+from src.utils.datetime_util import time_now
+
+
+class DashboardMetric(StrEnum):
+    REVENUE = "revenue" # Tổng tiền các đơn completed
+    TOTAL_ORDERS = "total_orders"
+    PENDING_ORDERS = "pending_orders"
+    TOTAL_CUSTOMERS = "total_customers"
+
+
+async def bump_counters(db: AsyncSession, deltas: Mapping[DashboardMetric, Decimal | int]):
+    """
+    Cộng delta vào các bộ đếm (1 câu INSERT ... ON CONFLICT vào một shard ngẫu nhiên).
+    Gọi trong cùng transaction với thay đổi gốc để bộ đếm luôn khớp dữ liệu.
+    """
+    changes = {metric: delta for metric, delta in deltas.items() if delta}
+    if not changes:
+        return
+
+    shard = random.randrange(settings.DASHBOARD_COUNTER_SHARDS)
+    now = time_now()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "name": str(metric),
+            "shard": shard,
+            "value": delta,
+            "created_at": now,
+            "updated_at": now,
+        }
+        # Sắp theo tên để các transaction đồng thời khóa dòng theo cùng thứ tự
+        for metric, delta in sorted(changes.items())
+    ]
+    stmt = insert(DashboardCounter).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DashboardCounter.name, DashboardCounter.shard],
+        set_={
+            "value": DashboardCounter.value + stmt.excluded.value,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_order_created(db: AsyncSession, order: Order):
+    await bump_counters(db, {
+        DashboardMetric.TOTAL_ORDERS: 1,
+        DashboardMetric.PENDING_ORDERS: 1 if order.status == "pending" else 0,
+        DashboardMetric.REVENUE: order.total_amount if order.status == "completed" else 0,
+    })
+
+
+async def record_order_status_change(db: AsyncSession, order: Order, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+
+    pending = (new_status == "pending") - (old_status == "pending")
+    completed = (new_status == "completed") - (old_status == "completed")
+    await bump_counters(db, {
+        DashboardMetric.PENDING_ORDERS: pending,
+        DashboardMetric.REVENUE: order.total_amount * completed,
+    })
+
+
+async def record_user_role_change(db: AsyncSession, old_role: str | None, new_role: str):
+    """old_role=None khi user mới đăng ký."""
+    customer = (new_role == UserRole.CUSTOMER.value) - (old_role == UserRole.CUSTOMER.value)
+    await bump_counters(db, {DashboardMetric.TOTAL_CUSTOMERS: customer})
+
+
+async def read_counters(db: AsyncSession) -> tuple[dict[DashboardMetric, Decimal], datetime | None]:
+    """Giá trị các bộ đếm và thời điểm cập nhật gần nhất (đọc vài chục dòng, không quét bảng gốc)."""
+    result = await db.execute(
+        select(
+            DashboardCounter.name,
+            func.sum(DashboardCounter.value).label("value"),
+            func.max(DashboardCounter.updated_at).label("updated_at"),
+        ).group_by(DashboardCounter.name)
+    )
+    values = {metric: Decimal(0) for metric in DashboardMetric}
+    as_of = None
+    for row in result:
+        if row.name in values:
+            values[DashboardMetric(row.name)] = row.value
+        if as_of is None or row.updated_at > as_of:
+            as_of = row.updated_at
+    return values, as_of
+
+
+async def rebuild_dashboard_counters():
+    """Tính lại toàn bộ bộ đếm từ bảng orders / user (dùng khi dữ liệu bị lệch hoặc sau khi import)."""
+    async with SessionLocal() as db:
+        print("Rebuilding dashboard counters ...")
+
+        # Chặn bump_counters() trong lúc tính lại: transaction đã bump phải commit xong
+        # (đơn của nó mới được đếm), transaction chưa bump sẽ chờ tới sau khi ta commit
+        await db.execute(text("LOCK TABLE dashboard_counters IN SHARE ROW EXCLUSIVE MODE"))
+
+        totals = {
+            DashboardMetric.REVENUE: (
+                await db.execute(select(func.coalesce(func.sum(Order.total_amount), 0)).where(Order.status == "completed"))
+            ).scalar(),
+            DashboardMetric.TOTAL_ORDERS: (await db.execute(select(func.count(Order.id)))).scalar(),
+            DashboardMetric.PENDING_ORDERS: (
+                await db.execute(select(func.count(Order.id)).where(Order.status == "pending"))
+            ).scalar(),
+            DashboardMetric.TOTAL_CUSTOMERS: (
+                await db.execute(select(func.count(User.id)).where(User.role == UserRole.CUSTOMER.value))
+            ).scalar(),
+        }
+
+        await db.execute(delete(DashboardCounter))
+        await bump_counters(db, totals)
+        await db.commit()
+
+        print(f"Rebuilt dashboard counters: {', '.join(f'{k}={v}' for k, v in totals.items())}")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_dashboard_counters())
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, DECIMAL, Date, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.core.base_model import Base
+
+
+class DashboardCounter(Base):
+    """
+    Bộ đếm cho dashboard admin, cập nhật cộng dồn theo sự kiện (đơn hàng, đăng ký...).
+    Mỗi bộ đếm chia thành nhiều shard để các transaction đồng thời không tranh nhau
+    cùng một dòng; giá trị thật = tổng các shard.
+    """
+    __tablename__ = "dashboard_counters"
+    __table_args__ = (
+        UniqueConstraint("name", "shard"),
+    )
+
+    name = Column(String(50), nullable=False)
+    shard = Column(Integer, nullable=False, default=0)
+    value = Column(DECIMAL(18, 2), nullable=False, default=0, server_default="0")
+
+
+class SalesDailyRollup(Base):
+    """
+    Doanh số theo ngày x vang (chỉ đơn completed), cập nhật cộng dồn khi đơn chuyển
+    vào / ra trạng thái completed (xem src/admin/rollups.py). Báo cáo tuần / tháng,
+    theo danh mục / vùng đều tổng hợp tiếp từ bảng này.
+    """
+    __tablename__ = "sales_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "wine_id"),
+        Index("sales_daily_rollups_category_day_idx", "category_id", "day"),
+        Index("sales_daily_rollups_region_day_idx", "region_id", "day"),
+    )
+
+    day = Column(Date, nullable=False) # Ngày đặt hàng theo ANALYTICS_TIMEZONE
+    wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False)
+    # Danh mục / vùng của vang tại thời điểm ghi nhận
+    category_id = Column(UUID(as_uuid=True), ForeignKey("category.id"), nullable=True)
+    region_id = Column(UUID(as_uuid=True), ForeignKey("regions.id"), nullable=True)
+
+    units = Column(Integer, nullable=False, default=0, server_default="0")
+    revenue = Column(DECIMAL(18, 2), nullable=False, default=0, server_default="0") # SUM(price_at_purchase * quantity)
+    cost = Column(DECIMAL(18, 2), nullable=False, default=0, server_default="0") # Giá nhập của các lô đã xuất
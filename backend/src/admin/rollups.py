@@ -0,0 +1,189 @@
+import asyncio
+from datetime import date
+from enum import StrEnum
+from uuid import UUID
+
+from sqlalchemy import Date, cast, delete, func, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.admin.models import SalesDailyRollup
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.order.models import Order, OrderItem, OrderItemAllocation
+from src.product.models import Category, Inventory, Region, Wine, Winery
+
+
+def _line_cost():
+    """
+    Giá vốn của một order_item: từ các lô đã xuất (order_item_allocations x import_price);
+    đơn cũ chưa có allocation thì dùng giá nhập trung bình hiện tại của vang.
+    """
+    allocated_cost = (
+        select(func.sum(OrderItemAllocation.quantity * Inventory.import_price))
+        .join(Inventory, Inventory.id == OrderItemAllocation.inventory_id)
+        .where(OrderItemAllocation.order_item_id == OrderItem.id)
+        .correlate(OrderItem)
+        .scalar_subquery()
+    )
+    average_cost = (
+        select(func.avg(Inventory.import_price))
+        .where(Inventory.wine_id == OrderItem.wine_id)
+        .correlate(OrderItem)
+        .scalar_subquery()
+    )
+    return func.coalesce(allocated_cost, OrderItem.quantity * average_cost, 0)
+
+
+def _sales_rollup_rows(sign: int = 1):
+    """
+    SELECT doanh số theo (ngày, vang) của các order_items, nhân với sign (+1 / -1).
+    Giá vốn là giá đã chốt lúc đơn completed: đảo ngược trừ đúng giá trị đã cộng vào rollup
+    dù giá nhập trung bình đã thay đổi.
+    """
+    line_cost = func.coalesce(OrderItem.cost_at_completion, _line_cost())
+    day = cast(func.timezone(settings.ANALYTICS_TIMEZONE, Order.created_at), Date)
+
+    return (
+        select(
+            func.gen_random_uuid(),
+            day,
+            OrderItem.wine_id,
+            Wine.category_id,
+            Winery.region_id,
+            sign * func.sum(OrderItem.quantity),
+            sign * func.sum(OrderItem.price_at_purchase * OrderItem.quantity),
+            sign * func.sum(line_cost),
+            func.now(),
+            func.now(),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Wine, Wine.id == OrderItem.wine_id)
+        .outerjoin(Winery, Winery.id == Wine.winery_id)
+        .group_by(day, OrderItem.wine_id, Wine.category_id, Winery.region_id)
+    )
+
+
+_ROLLUP_COLUMNS = [
+    "id", "day", "wine_id", "category_id", "region_id",
+    "units", "revenue", "cost", "created_at", "updated_at",
+]
+
+
+def _upsert_rollups(rows):
+    stmt = insert(SalesDailyRollup).from_select(_ROLLUP_COLUMNS, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[SalesDailyRollup.day, SalesDailyRollup.wine_id],
+        set_={
+            "units": SalesDailyRollup.units + stmt.excluded.units,
+            "revenue": SalesDailyRollup.revenue + stmt.excluded.revenue,
+            "cost": SalesDailyRollup.cost + stmt.excluded.cost,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+async def apply_order_to_rollups(db: AsyncSession, order_id: UUID, sign: int):
+    """Cộng (sign=1) hoặc trừ (sign=-1) các dòng của một đơn vào bảng rollup, trong transaction hiện tại."""
+    if sign > 0:
+        await db.execute(
+            update(OrderItem).where(OrderItem.order_id == order_id).values(cost_at_completion=_line_cost())
+        )
+    await db.execute(_upsert_rollups(_sales_rollup_rows(sign).where(Order.id == order_id)))
+
+
+async def record_order_rollup_change(db: AsyncSession, order: Order, old_status: str, new_status: str):
+    """Doanh số chỉ tính đơn completed: ghi khi đơn vào completed, đảo ngược khi rời completed."""
+    sign = (new_status == "completed") - (old_status == "completed")
+    if sign:
+        await apply_order_to_rollups(db, order.id, sign)
+
+
+class SalesGranularity(StrEnum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class SalesGroupBy(StrEnum):
+    WINE = "wine"
+    CATEGORY = "category"
+    REGION = "region"
+
+
+# group_by -> (cột trong rollup, bảng lấy tên)
+_GROUP_DIMENSIONS = {
+    SalesGroupBy.WINE: (SalesDailyRollup.wine_id, Wine),
+    SalesGroupBy.CATEGORY: (SalesDailyRollup.category_id, Category),
+    SalesGroupBy.REGION: (SalesDailyRollup.region_id, Region),
+}
+
+
+def _sales_totals():
+    return (
+        func.coalesce(func.sum(SalesDailyRollup.units), 0).label("units"),
+        func.coalesce(func.sum(SalesDailyRollup.revenue), 0).label("revenue"),
+        func.coalesce(func.sum(SalesDailyRollup.cost), 0).label("cost"),
+    )
+
+
+async def get_sales_timeseries(
+    db: AsyncSession,
+    granularity: SalesGranularity,
+    date_from: date,
+    date_to: date
+):
+    """Doanh số theo ngày / tuần (bắt đầu thứ Hai) / tháng, chỉ đọc bảng rollup."""
+    # Inline granularity (enum đã kiểm tra) để biểu thức SELECT và GROUP BY giống hệt nhau
+    unit = literal(str(granularity), literal_execute=True)
+    period = cast(func.date_trunc(unit, SalesDailyRollup.day), Date).label("period")
+    result = await db.execute(
+        select(period, *_sales_totals())
+        .where(SalesDailyRollup.day >= date_from, SalesDailyRollup.day <= date_to)
+        .group_by(period)
+        .order_by(period)
+    )
+    return result.all()
+
+
+async def get_sales_breakdown(
+    db: AsyncSession,
+    group_by: SalesGroupBy,
+    date_from: date,
+    date_to: date,
+    limit: int
+):
+    """Top vang / danh mục / vùng theo doanh thu, tổng hợp từ bảng rollup rồi mới join lấy tên."""
+    column, dimension = _GROUP_DIMENSIONS[group_by]
+    totals = (
+        select(column.label("key"), *_sales_totals())
+        .where(SalesDailyRollup.day >= date_from, SalesDailyRollup.day <= date_to)
+        .group_by(column)
+        .subquery()
+    )
+    result = await db.execute(
+        select(totals.c.key, dimension.name, totals.c.units, totals.c.revenue, totals.c.cost)
+        .outerjoin(dimension, dimension.id == totals.c.key)
+        .order_by(totals.c.revenue.desc(), totals.c.key)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def rebuild_sales_rollups():
+    """Tính lại toàn bộ sales_daily_rollups từ các đơn completed (dùng khi dữ liệu bị lệch)."""
+    async with SessionLocal() as db:
+        print("Rebuilding sales rollups ...")
+
+        # Chặn cập nhật rollup đồng thời trong lúc tính lại
+        await db.execute(text("LOCK TABLE sales_daily_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        await db.execute(delete(SalesDailyRollup))
+        result = await db.execute(_upsert_rollups(_sales_rollup_rows().where(Order.status == "completed")))
+        await db.commit()
+
+        print(f"Rebuilt {result.rowcount} daily sales rows.")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_sales_rollups())
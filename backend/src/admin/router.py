@@ -1,18 +1,34 @@
-from typing import List
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import func
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 
+from src.core.constants import NEXT_CURSOR_HEADER
 from src.core.database import SessionDep
 from src.user.models import User
 from src.user.schemas import UserResponse
 from src.auth.dependencies import allow_staff, allow_admin
+from src.auth.principal import invalidate_principal
 from src.order.models import Order, OrderItem
-from src.product.models import Inventory, Wine, Winery
-from src.order.schemas import OrderResponse
+from src.product.models import Wine, WineStock, Winery
+from src.order.schemas import AdminOrderSummary, OrderResponse
+from src.order.pagination import apply_order_page, next_order_cursor
+from src.admin.counters import DashboardMetric, read_counters, record_order_status_change, record_user_role_change
+from src.admin.rollups import (
+    SalesGranularity,
+    SalesGroupBy,
+    get_sales_breakdown,
+    get_sales_timeseries,
+    record_order_rollup_change
+)
+from src.admin.schemas import SalesBreakdownResponse, SalesPeriodResponse
+from src.core.config import settings
+from src.utils.export import ExportFormat, export_response
 
 
 admin_router = APIRouter(
@@ -31,20 +47,137 @@ class OrderStatusUpdate(BaseModel):
     status: str
 
 
-@admin_router.get("/orders", response_model=List[OrderResponse])
+def _filter_orders(
+    query,
+    status: Optional[str],
+    user_id: Optional[UUID],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime]
+):
+    if status:
+        query = query.where(Order.status == status)
+    if user_id:
+        query = query.where(Order.user_id == user_id)
+    if date_from:
+        query = query.where(Order.created_at >= date_from)
+    if date_to:
+        query = query.where(Order.created_at < date_to)
+    return query
+
+
+def _order_item_count():
+    return (
+        select(func.count(OrderItem.id))
+        .where(OrderItem.order_id == Order.id)
+        .correlate(Order)
+        .scalar_subquery()
+    )
+
+
+@admin_router.get("/orders", response_model=List[AdminOrderSummary])
 async def get_all_orders(
+    db: SessionDep,
+    response: Response,
+    status: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(allow_staff)
+):
+    """
+    Danh sách đơn hàng (mới nhất trước), phân trang bằng cursor trong header X-Next-Cursor.
+    Chỉ trả thông tin tóm tắt; chi tiết sản phẩm lấy qua GET /admin/orders/{order_id}.
+    """
+    item_count = _order_item_count()
+    query = (
+        select(
+            Order.id,
+            Order.user_id,
+            User.email.label("customer_email"),
+            Order.status,
+            Order.total_amount,
+            Order.discount_amount,
+            Order.delivery_mode,
+            Order.payment_method,
+            Order.shipping_address,
+            Order.phone_number,
+            Order.created_at,
+            item_count.label("item_count"),
+        )
+        .join(User, User.id == Order.user_id)
+    )
+
+    query = _filter_orders(query, status, user_id, date_from, date_to)
+    result = await db.execute(apply_order_page(query, cursor, limit))
+    orders = result.all()
+
+    next_cursor = next_order_cursor(orders, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return orders
+
+
+ORDER_EXPORT_COLUMNS = [
+    "id", "created_at", "status", "customer_email", "user_id", "item_count",
+    "total_amount", "discount_amount", "delivery_mode", "delivery_cost",
+    "payment_method", "shipping_address", "phone_number", "note",
+]
+
+
+@admin_router.get("/orders/export")
+async def export_orders(
+    status: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    current_user: User = Depends(allow_staff)
+):
+    """Xuất toàn bộ đơn hàng (theo bộ lọc) dạng CSV / NDJSON, stream từng lô thay vì nạp hết vào bộ nhớ."""
+    query = (
+        select(
+            Order.id,
+            Order.created_at,
+            Order.status,
+            User.email.label("customer_email"),
+            Order.user_id,
+            _order_item_count().label("item_count"),
+            Order.total_amount,
+            Order.discount_amount,
+            Order.delivery_mode,
+            Order.delivery_cost,
+            Order.payment_method,
+            Order.shipping_address,
+            Order.phone_number,
+            Order.note,
+        )
+        .join(User, User.id == Order.user_id)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+    )
+    query = _filter_orders(query, status, user_id, date_from, date_to)
+    return export_response(query, ORDER_EXPORT_COLUMNS, format, "orders")
+
+
+@admin_router.get("/orders/{order_id}", response_model=OrderResponse)
+async def get_order_detail(
+    order_id: UUID,
     db: SessionDep,
     current_user: User = Depends(allow_staff)
 ):
     query = select(Order).options(
         selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.images),
         selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.category),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.reviews),
         selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.winery).selectinload(Winery.region)
-    ).order_by(Order.created_at.desc())
-    
+    ).where(Order.id == order_id)
+
     result = await db.execute(query)
-    return result.scalars().all()
+    order = result.scalar_one_or_none()
+    if not order:
+        raise HTTPException(status_code=404, detail="Không tìm thấy đơn hàng")
+    return order
 
 
 @admin_router.put("/orders/{order_id}/status")
@@ -54,14 +187,17 @@ async def update_order_status(
     db: SessionDep,
     current_user: User = Depends(allow_staff)
 ):
-    order = await db.get(Order, order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Không tìm thấy đơn hàng")
-    
     valid_statuses = ["pending", "confirmed", "shipping", "completed", "cancelled"]
     if payload.status not in valid_statuses:
          raise HTTPException(status_code=400, detail="Trạng thái không hợp lệ")
 
+    # Khóa đơn để 2 lần đổi trạng thái đồng thời không cộng trùng vào bộ đếm dashboard
+    order = await db.get(Order, order_id, with_for_update=True)
+    if not order:
+        raise HTTPException(status_code=404, detail="Không tìm thấy đơn hàng")
+
+    await record_order_status_change(db, order, order.status, payload.status)
+    await record_order_rollup_change(db, order, order.status, payload.status)
     order.status = payload.status
     await db.commit()
     await db.refresh(order)
@@ -79,7 +215,7 @@ async def get_all_users(
     db: SessionDep,
     current_user: User = Depends(allow_admin)
 ):
-    result = await db.execute(select(User).order_by(User.created_at.desc()))
+    result = await db.execute(select(User).order_by(User.created_at.desc()).execution_options(populate_existing=True))
     return result.scalars().all()
 
 # 2. Cập nhật Role
@@ -90,18 +226,20 @@ async def update_user_role(
     db: SessionDep,
     current_user: User = Depends(allow_admin)
 ):
-    user = await db.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="Người dùng không tồn tại")
-    
-    if user.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Không thể tự thay đổi quyền của bản thân")
 
     if payload.role not in ["admin", "stock_manager", "customer"]:
         raise HTTPException(status_code=400, detail="Quyền không hợp lệ")
 
+    user = await db.get(User, user_id, with_for_update=True, populate_existing=True)
+    if not user:
+        raise HTTPException(status_code=404, detail="Người dùng không tồn tại")
+
+    await record_user_role_change(db, user.role, payload.role)
     user.role = payload.role
     await db.commit()
+    invalidate_principal(user.email)
     return {"message": f"Đã cập nhật quyền thành {payload.role}"}
 
 # 3. Ban / Unban
@@ -112,7 +250,7 @@ async def ban_user(
     db: SessionDep,
     current_user: User = Depends(allow_admin)
 ):
-    user = await db.get(User, user_id)
+    user = await db.get(User, user_id, populate_existing=True)
     if not user:
         raise HTTPException(status_code=404, detail="Người dùng không tồn tại")
         
@@ -122,6 +260,7 @@ async def ban_user(
     user.status = "active" if payload.is_active else "banned"
     
     await db.commit()
+    invalidate_principal(user.email)
     action = "Mở khóa" if payload.is_active else "Khóa"
     return {"message": f"Đã {action} tài khoản {user.email}"}
 
@@ -135,41 +274,80 @@ async def get_dashboard_stats(
     db: SessionDep,
     current_user: User = Depends(allow_staff)
 ):
-    # 1. Tổng doanh thu (Chỉ tính đơn đã hoàn thành hoặc đang giao)
-    revenue_query = select(func.sum(Order.total_amount)).where(Order.status == 'completed')
-    revenue_res = await db.execute(revenue_query)
-    total_revenue = revenue_res.scalar() or 0
-
-    # 2. Tổng số đơn hàng
-    orders_count_query = select(func.count(Order.id))
-    orders_res = await db.execute(orders_count_query)
-    total_orders = orders_res.scalar() or 0
-    
-    # 3. Đơn hàng mới (Pending)
-    pending_query = select(func.count(Order.id)).where(Order.status == 'pending')
-    pending_res = await db.execute(pending_query)
-    pending_orders = pending_res.scalar() or 0
+    # 1-4. Doanh thu (đơn completed), số đơn, đơn pending, số khách hàng:
+    # đọc từ bộ đếm cộng dồn (src/admin/counters.py) thay vì quét orders / user
+    counters, as_of = await read_counters(db)
 
-    # 4. Tổng khách hàng
-    users_query = select(func.count(User.id)).where(User.role == 'customer')
-    users_res = await db.execute(users_query)
-    total_customers = users_res.scalar() or 0
-
-    # 5. Cảnh báo kho thấp
+    # 5. Cảnh báo kho thấp (partial index wine_stock_low_stock_idx)
     low_stock_query = (
-        select(Wine.id, Wine.name, func.sum(Inventory.quantity_available).label("total_stock"))
-        .join(Inventory, Wine.id == Inventory.wine_id)
-        .group_by(Wine.id, Wine.name)
-        .having(func.sum(Inventory.quantity_available) < 10)
+        select(Wine.id, Wine.name, WineStock.quantity_available.label("total_stock"))
+        .join(WineStock, Wine.id == WineStock.wine_id)
+        .where(WineStock.quantity_available < 10)
     )
     low_stock_res = await db.execute(low_stock_query)
     low_stock_items = low_stock_res.all()
 
     return {
-        "revenue": total_revenue,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "total_customers": total_customers,
+        "revenue": counters[DashboardMetric.REVENUE],
+        "total_orders": int(counters[DashboardMetric.TOTAL_ORDERS]),
+        "pending_orders": int(counters[DashboardMetric.PENDING_ORDERS]),
+        "total_customers": int(counters[DashboardMetric.TOTAL_CUSTOMERS]),
         "low_stock_count": len(low_stock_items),
-        "low_stock_details": [{"name": item.name, "stock": item.total_stock} for item in low_stock_items]
-    }
\ No newline at end of file
+        "low_stock_details": [{"name": item.name, "stock": item.total_stock} for item in low_stock_items],
+        "as_of": as_of
+    }
+
+
+def _analytics_range(date_from: Optional[date], date_to: Optional[date]) -> tuple[date, date]:
+    """Mặc định 30 ngày gần nhất (theo ANALYTICS_TIMEZONE)."""
+    date_to = date_to or datetime.now(ZoneInfo(settings.ANALYTICS_TIMEZONE)).date()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="Khoảng thời gian không hợp lệ")
+    return date_from, date_to
+
+
+@admin_router.get("/analytics/sales", response_model=List[SalesPeriodResponse])
+async def get_sales_analytics(
+    db: SessionDep,
+    current_user: User = Depends(allow_staff),
+    granularity: SalesGranularity = SalesGranularity.DAY,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    date_from, date_to = _analytics_range(date_from, date_to)
+    rows = await get_sales_timeseries(db, granularity, date_from, date_to)
+    return [
+        SalesPeriodResponse(
+            period=row.period,
+            units=row.units,
+            revenue=row.revenue,
+            cost=row.cost,
+            margin=row.revenue - row.cost
+        )
+        for row in rows
+    ]
+
+
+@admin_router.get("/analytics/sales/breakdown", response_model=List[SalesBreakdownResponse])
+async def get_sales_analytics_breakdown(
+    db: SessionDep,
+    current_user: User = Depends(allow_staff),
+    group_by: SalesGroupBy = SalesGroupBy.WINE,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    date_from, date_to = _analytics_range(date_from, date_to)
+    rows = await get_sales_breakdown(db, group_by, date_from, date_to, limit)
+    return [
+        SalesBreakdownResponse(
+            id=row.key,
+            name=row.name,
+            units=row.units,
+            revenue=row.revenue,
+            cost=row.cost,
+            margin=row.revenue - row.cost
+        )
+        for row in rows
+    ]
@@ -0,0 +1,22 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class SalesTotals(BaseModel):
+    units: int
+    revenue: Decimal # SUM(price_at_purchase * quantity), chưa trừ giảm giá / phí ship
+    cost: Decimal # Giá nhập của các lô đã xuất
+    margin: Decimal # revenue - cost
+
+
+class SalesPeriodResponse(SalesTotals):
+    period: date # Ngày đầu của ngày / tuần / tháng
+
+
+class SalesBreakdownResponse(SalesTotals):
+    id: Optional[UUID] # None: vang chưa có danh mục / vùng
+    name: Optional[str]
@@ -1,9 +1,12 @@
 import inspect
 import json
+import time
 from functools import wraps
 from typing import Callable, Dict, Any, List
 from loguru import logger
 
+from src.core.metrics import AI_TOOL_CALL_DURATION
+
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Callable] = {}
@@ -61,11 +64,16 @@ class ToolRegistry:
             return f"Lỗi: Không tìm thấy công cụ '{tool_name}'."
         
         func = self._tools[tool_name]
+        started = time.perf_counter()
+        outcome = "success"
         try:
             result = await func(**arguments)
             return result
         except Exception as e:
+            outcome = "error"
             logger.error(f"Error executing tool {tool_name}: {e}")
             return f"Lỗi hệ thống khi thực thi {tool_name}: {str(e)}"
+        finally:
+            AI_TOOL_CALL_DURATION.labels(tool_name, outcome).observe(time.perf_counter() - started)
 
 agent_registry = ToolRegistry()
\ No newline at end of file
@@ -1,13 +1,14 @@
+import json
 from loguru import logger
-from typing import Optional
-from fastapi import APIRouter, Depends, Request
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from fastapi.security import OAuth2PasswordBearer, HTTPAuthorizationCredentials
 
 from src.core.database import SessionDep
-from src.ai.services import generate_consulting_response
+from src.ai.services import generate_consulting_response, stream_consulting_response
 from src.ai.schemas import ChatRequest, ChatResponse
-from src.auth.dependencies import get_current_user
+from src.auth.dependencies import get_optional_user
 from src.user.schemas import UserResponse
 
 
@@ -16,34 +17,36 @@ ai_router = APIRouter(
     tags=["AI Assistant"]
 )
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
-
-async def get_current_user_optional(
-    request: Request,
-    token: str = Depends(oauth2_scheme), 
-    db: SessionDep = None
-) -> Optional[UserResponse]:
-    auth_header = request.headers.get("Authorization")
-    logger.info(f"[DEBUG AUTH] Auth Header: {auth_header}")
-    logger.info(f"[DEBUG AUTH] Extracted Token: {token[:10]}..." if token else "[DEBUG AUTH] Token: None")
-
-    if not token:
-        return None
-    try:
-        creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
-        user = await get_current_user(db, creds)
-        logger.info(f"[DEBUG AUTH] User found: {user.id if user else 'None'}")
-        return user
-    except Exception as e:
-        logger.error(f"[DEBUG AUTH] Token decode failed: {e}")
-        return None
-
 @ai_router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(
     payload: ChatRequest, 
     db: SessionDep,
-    current_user: Optional[UserResponse] = Depends(get_current_user_optional)
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
 ):
     logger.info(f"[AI ROUTER] User context passed to Service: {current_user.email if current_user else 'ANONYMOUS'}")
     reply_text = await generate_consulting_response(payload.message, payload.history, db, current_user)
-    return ChatResponse(reply=reply_text)
\ No newline at end of file
+    return ChatResponse(reply=reply_text)
+
+
+async def _encode_sse(events: AsyncIterator[tuple[str, dict]]) -> AsyncIterator[bytes]:
+    async for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+@ai_router.post("/chat/stream")
+async def chat_with_ai_stream(
+    payload: ChatRequest,
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
+):
+    """
+    Như /chat nhưng trả về Server-Sent Events ngay khi model bắt đầu sinh:
+    `token` (đoạn text), `tool` (tiến trình gọi tool), `error`, và `done` kèm câu trả lời đầy đủ.
+    """
+    # Snapshot user: object ORM gắn với session của request, session này đóng trước khi stream xong
+    user = UserResponse.model_validate(current_user) if current_user else None
+    logger.info(f"[AI ROUTER] Streaming for: {user.email if user else 'ANONYMOUS'}")
+    return StreamingResponse(
+        _encode_sse(stream_consulting_response(payload.message, payload.history, user)),
+        media_type="text/event-stream",
+        # Tắt buffer của nginx để token tới client ngay
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
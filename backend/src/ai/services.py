@@ -1,19 +1,21 @@
 import contextvars
 import json
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict
 from openai import AsyncOpenAI
 from sqlalchemy.future import select
-from sqlalchemy import or_, and_
+from sqlalchemy import and_, desc, or_
 from sqlalchemy.orm import selectinload
 from loguru import logger
 
 
 from src.core.config import settings
-from src.product.models import Inventory, Wine, Category
+from src.product.models import Wine, Category
+from src.product.search import wine_search_filter
 from src.order.models import Cart, CartItem
-from src.core.database import SessionDep
+from src.core.database import SessionDep, SessionLocal
 from src.user.schemas import UserResponse
 from src.ai.registry import agent_registry
+from src.inventory.stock_service import get_stock_level
 
 client = None
 if settings.DEEPSEEK_API_KEY:
@@ -47,11 +49,15 @@ async def search_wines(keyword: str, max_price: float = 0, min_price: float = 0,
     conditions = []
     
     if keyword:
-        conditions.append(or_(
-            Wine.name.ilike(f"%{keyword}%"), 
-            Wine.description.ilike(f"%{keyword}%"), 
-            Wine.category.has(Category.name.ilike(f"%{keyword}%"))
-        ))
+        # Khách hay hỏi theo loại ("vang đỏ", "Champagne"): từ khóa khớp tên danh mục cũng tính
+        category_match = Wine.category_id.in_(select(Category.id).where(Category.name.ilike(f"%{keyword}%")))
+        search = wine_search_filter(keyword)
+        if search is None:
+            conditions.append(category_match)
+        else:
+            condition, rank = search
+            conditions.append(or_(condition, category_match))
+            stmt = stmt.order_by(desc(rank), desc(Wine.id))
     
     if max_price > 0: conditions.append(Wine.price <= max_price)
     if min_price > 0: conditions.append(Wine.price >= min_price)
@@ -113,10 +119,7 @@ async def add_to_cart(product_id: str, quantity: int = 1):
         if not product: 
             return "Lỗi: Không tìm thấy sản phẩm ID này."
 
-        stmt_inv = select(Inventory).where(Inventory.wine_id == product_id)
-        inventory = (await db.execute(stmt_inv)).scalar_one_or_none()
-        
-        current_stock = inventory.quantity_available if inventory else 0
+        current_stock = await get_stock_level(db, product.id)
         
         if current_stock == 0:
             return f"Rất tiếc, sản phẩm '{product.name}' hiện đã hết hàng."
@@ -187,17 +190,9 @@ PHONG CÁCH TRẢ LỜI:
 # 3. CONTROLLER
 # ----------------
 
-async def generate_consulting_response(
-    user_query: str, 
-    history: List[Dict[str, str]], 
-    db: SessionDep, 
-    user: Optional[UserResponse] = None
-):
-    token_db = _db_ctx_var.set(db)
-    token_user = _user_ctx_var.set(user)
-
-    if not client: return "Chưa cấu hình API Key."
+MAX_TOOL_ROUNDS = 5
 
+def _build_messages(user_query: str, history: List[Dict[str, str]]) -> list:
     messages = [{"role": "system", "content": sys_instruct}]
     
     recent_history = history[-6:] if history else []
@@ -206,45 +201,143 @@ async def generate_consulting_response(
              messages.append({"role": msg["role"], "content": msg["content"]})
     
     messages.append({"role": "user", "content": user_query})
+    return messages
 
+async def _execute_tool_call(
+    messages: list,
+    call_id: str,
+    fn_name: str,
+    raw_arguments: str,
+    db: SessionDep,
+    user: Optional[UserResponse] = None
+):
+    """
+    Chạy tool qua agent_registry và ghi kết quả vào hội thoại.
+    db / user chỉ được gắn vào context trong lúc tool chạy: không giữ qua yield của
+    generator stream (reset ở context khác khi client ngắt kết nối sẽ lỗi).
+    """
     try:
-        for _ in range(5):
+        fn_args = json.loads(raw_arguments)
+    except:
+        fn_args = {}
+    
+    logger.info(f"AI Executing: {fn_name} | Args: {fn_args}")
+    
+    token_db = _db_ctx_var.set(db)
+    token_user = _user_ctx_var.set(user)
+    try:
+        tool_result = await agent_registry.execute(fn_name, fn_args)
+    finally:
+        _db_ctx_var.reset(token_db)
+        _user_ctx_var.reset(token_user)
+    
+    messages.append({
+        "role": "tool",
+        "tool_call_id": call_id,
+        "content": str(tool_result)
+    })
+
+async def generate_consulting_response(
+    user_query: str, 
+    history: List[Dict[str, str]], 
+    db: SessionDep, 
+    user: Optional[UserResponse] = None
+):
+    if not client: return "Chưa cấu hình API Key."
+
+    messages = _build_messages(user_query, history)
+
+    for _ in range(MAX_TOOL_ROUNDS):
+        try:
+            response = await client.chat.completions.create(
+                model="deepseek-chat",
+                messages=messages,
+                tools=agent_registry.tools_schema,
+                tool_choice="auto",
+                temperature=0.1
+            )
+        except Exception as e:
+            logger.error(f"API Error: {e}")
+            return "Hệ thống đang bận."
+
+        response_message = response.choices[0].message
+        
+        if not response_message.tool_calls:
+            return response_message.content
+
+        messages.append(response_message)
+        
+        for tool_call in response_message.tool_calls:
+            await _execute_tool_call(
+                messages, tool_call.id, tool_call.function.name, tool_call.function.arguments, db, user
+            )
+    return "Đã thực hiện xong thao tác."
+
+async def stream_consulting_response(
+    user_query: str,
+    history: List[Dict[str, str]],
+    user: Optional[UserResponse] = None
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Như generate_consulting_response nhưng stream từng phần: trả về (event, data) với
+    event là "token" (đoạn text), "tool" (tiến trình gọi tool), "error" hoặc "done" (câu trả lời đầy đủ).
+    Dùng session riêng: session của request đã đóng khi StreamingResponse bắt đầu gửi.
+    """
+    if not client:
+        yield "error", {"detail": "Chưa cấu hình API Key."}
+        return
+
+    messages = _build_messages(user_query, history)
+
+    async with SessionLocal() as db:
+        for _ in range(MAX_TOOL_ROUNDS):
+            content_parts = []
+            # index -> tool call đang được ghép từ các delta (id / tên / arguments đến từng mảnh)
+            tool_calls: Dict[int, Dict[str, str]] = {}
             try:
-                response = await client.chat.completions.create(
+                stream = await client.chat.completions.create(
                     model="deepseek-chat",
                     messages=messages,
                     tools=agent_registry.tools_schema,
                     tool_choice="auto",
-                    temperature=0.1
+                    temperature=0.1,
+                    stream=True
                 )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield "token", {"text": delta.content}
+                    for tool_delta in delta.tool_calls or []:
+                        call = tool_calls.setdefault(tool_delta.index, {"id": "", "name": "", "arguments": ""})
+                        if tool_delta.id:
+                            call["id"] = tool_delta.id
+                        if tool_delta.function:
+                            call["name"] += tool_delta.function.name or ""
+                            call["arguments"] += tool_delta.function.arguments or ""
             except Exception as e:
                 logger.error(f"API Error: {e}")
-                return "Hệ thống đang bận."
+                yield "error", {"detail": "Hệ thống đang bận."}
+                return
 
-            response_message = response.choices[0].message
-            
-            if not response_message.tool_calls:
-                return response_message.content
+            if not tool_calls:
+                yield "done", {"reply": "".join(content_parts)}
+                return
 
-            messages.append(response_message)
-            
-            for tool_call in response_message.tool_calls:
-                fn_name = tool_call.function.name
-                try:
-                    fn_args = json.loads(tool_call.function.arguments)
-                except:
-                    fn_args = {}
-                
-                logger.info(f"AI Executing: {fn_name} | Args: {fn_args}")
-                
-                tool_result = await agent_registry.execute(fn_name, fn_args)
-                
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": str(tool_result)
-                })
-        return "Đã thực hiện xong thao tác."
-    finally:
-        _db_ctx_var.reset(token_db)
-        _user_ctx_var.reset(token_user)
\ No newline at end of file
+            calls = [tool_calls[index] for index in sorted(tool_calls)]
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content_parts) or None,
+                "tool_calls": [
+                    {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                    for call in calls
+                ]
+            })
+
+            for call in calls:
+                yield "tool", {"name": call["name"], "status": "running"}
+                await _execute_tool_call(messages, call["id"], call["name"], call["arguments"], db, user)
+                yield "tool", {"name": call["name"], "status": "done"}
+        yield "done", {"reply": "Đã thực hiện xong thao tác."}
\ No newline at end of file
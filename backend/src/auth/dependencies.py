@@ -1,39 +1,45 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.future import select
 
 from src.core.database import SessionDep
 from src.core.exceptions import NotAuthenticated
 from src.user.models import User
-from src.user.exceptions import UserNotFound
-from src.auth.security import decode_token
-from src.auth.exceptions import InvalidToken
+from src.auth.principal import authenticate_token
 
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(db: SessionDep,
+async def resolve_request_user(request: Request, db: SessionDep, token: str) -> User:
+    # Mỗi request chỉ xác thực token 1 lần dù nhiều dependency cùng cần user
+    cached = getattr(request.state, "principal", None)
+    if cached and cached[0] == token:
+        return cached[1]
+
+    user = await authenticate_token(db, token)
+    request.state.principal = (token, user)
+    return user
+
+
+async def get_current_user(request: Request,
+                           db: SessionDep,
                            cred: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
     if not cred or cred.scheme.lower() != "bearer":
         raise NotAuthenticated()
-    
-    token = cred.credentials
-
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
-        raise InvalidToken()
-    
-    email = payload.get("sub")
-    if not email:
-        raise InvalidToken()
-    
-    result = await db.execute(select(User).where(User.email == email.lower()))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise UserNotFound()
-    
-    return user
+
+    return await resolve_request_user(request, db, cred.credentials)
+
+
+async def get_optional_user(request: Request,
+                            db: SessionDep,
+                            cred: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> User | None:
+    """Như get_current_user nhưng trả về None (khách vãng lai) khi không có / sai token."""
+    if not cred or cred.scheme.lower() != "bearer":
+        return None
+    try:
+        return await resolve_request_user(request, db, cred.credentials)
+    except HTTPException:
+        return None
 
 class RoleChecker:
     def __init__(self, allowed_roles: list[str]):
@@ -49,4 +55,4 @@ class RoleChecker:
 
 
 allow_admin = RoleChecker(["admin"])
-allow_staff = RoleChecker(["admin", "stock_manager"])
\ No newline at end of file
+allow_staff = RoleChecker(["admin", "stock_manager"])
@@ -23,4 +23,11 @@ class UserNotVerified(HTTPException):
         super().__init__(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Tài khoản chưa được xác thực email. Vui lòng kiểm tra email của bạn.",
-        )
\ No newline at end of file
+        )
+
+class UserBanned(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Tài khoản của bạn đã bị khóa.",
+        )
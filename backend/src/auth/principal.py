@@ -0,0 +1,63 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.auth.exceptions import InvalidToken, UserBanned
+from src.auth.security import decode_token
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.user.constants import UserStatus
+from src.user.exceptions import UserNotFound
+from src.user.models import User
+
+# subject (email) -> giá trị các cột của User.
+# Cache theo từng worker: invalidate_principal() chỉ xóa ở worker xử lý thay đổi,
+# các worker khác nhận thay đổi sau tối đa PRINCIPAL_CACHE_TTL giây.
+_principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def token_subject(token: str) -> str:
+    """Xác thực access token, trả về subject (email đã chuẩn hóa)."""
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access":
+        raise InvalidToken()
+
+    subject = payload.get("sub")
+    if not subject:
+        raise InvalidToken()
+    return subject.lower()
+
+
+async def load_principal(db: AsyncSession, subject: str) -> User | None:
+    """
+    User theo subject, ưu tiên lấy từ cache (không tốn câu SQL nào).
+    Bản cache được gắn vào session hiện tại như một object đã load, nên handler
+    vẫn lazy-load được như khi tự SELECT. Identity map giữ bản cache này: handler
+    đọc / sửa User trong cùng request phải load với populate_existing=True
+    để lấy giá trị mới nhất từ DB.
+    """
+    values = _principal_cache.get(subject)
+    if values is None:
+        result = await db.execute(select(User).where(User.email == subject))
+        user = result.scalar_one_or_none()
+        if user:
+            _principal_cache.set(subject, user.to_dict())
+        return user
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def authenticate_token(db: AsyncSession, token: str) -> User:
+    user = await load_principal(db, token_subject(token))
+    if not user:
+        raise UserNotFound()
+    if user.status == UserStatus.BANNED.value:
+        raise UserBanned()
+    return user
+
+
+def invalidate_principal(subject: str):
+    """Gọi sau khi đổi quyền, khóa / mở khóa hoặc cập nhật thông tin user."""
+    _principal_cache.delete(subject.lower())
@@ -5,12 +5,13 @@ from jose import JWTError
 
 from src.core.database import SessionDep
 from src.core.exceptions import NotAuthenticated
-from src.core.security import verify_password
+from src.core.security import hash_password, password_needs_rehash, verify_password
 from src.auth.security import (
     create_access_token,
     create_refresh_token,
     decode_token
 )
+from src.auth.principal import invalidate_principal
 from src.auth.exceptions import (
     InvalidToken,
     InvalidPassword,
@@ -38,10 +39,15 @@ async def login(db: SessionDep,
 
     if not user:
         raise UserNotFound()
-    if not verify_password(login_request.password, user.hashed_password):
+    if not await verify_password(login_request.password, user.hashed_password):
         raise InvalidPassword()
     if not user.email_verified:
         raise UserNotVerified()
+
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password(login_request.password)
+        await db.commit()
+        invalidate_principal(user.email)
     
     access_token = create_access_token(data={"sub": user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
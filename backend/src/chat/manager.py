@@ -2,6 +2,8 @@ from typing import Dict, List
 from fastapi import WebSocket
 from uuid import UUID
 
+from src.core.metrics import WEBSOCKET_CONNECTIONS
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
@@ -34,4 +36,5 @@ class ConnectionManager:
             if admin_id in self.active_connections:
                 await self.active_connections[admin_id].send_json(message)
 
-chat_manager = ConnectionManager()
\ No newline at end of file
+chat_manager = ConnectionManager()
+WEBSOCKET_CONNECTIONS.set_function(lambda: len(chat_manager.active_connections))
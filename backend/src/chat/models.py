@@ -1,7 +1,7 @@
 import uuid
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -9,6 +9,11 @@ from src.core.base_model import Base
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Lịch sử hội thoại: tin nhắn gửi hoặc nhận của một user theo thời gian
+        Index("chat_messages_sender_id_created_at_idx", "sender_id", "created_at"),
+        Index("chat_messages_receiver_id_created_at_idx", "receiver_id", "created_at"),
+    )
 
     sender_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=False)
     receiver_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=True)
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, Query
 from sqlalchemy.future import select
 from sqlalchemy import or_, and_, delete
 from typing import List, Optional
 
 from src.core.database import SessionDep
 from src.auth.dependencies import get_current_user, allow_staff
-from src.auth.security import decode_token
+from src.auth.principal import authenticate_token
 from src.chat.models import ChatMessage
 from src.chat.manager import chat_manager
 from src.user.models import User
@@ -16,12 +16,8 @@ chat_router = APIRouter(prefix="/chat", tags=["Chat"])
 
 async def get_user_from_socket(token: str = Query(...), db: SessionDep = None):
     try:
-        payload = decode_token(token)
-        email = payload.get("sub")
-        result = await db.execute(select(User).where(User.email == email))
-        user = result.scalar_one_or_none()
-        return user
-    except:
+        return await authenticate_token(db, token)
+    except HTTPException:
         return None
     
 
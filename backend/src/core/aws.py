@@ -1,11 +1,17 @@
+import asyncio
 import os
+import threading
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 from loguru import logger
 
+from src.core.cache import TTLCache
 from src.core.config import settings
 from src.core.constants import S3ClientMethod
 from src.utils.others import run_in_executor
@@ -17,16 +23,57 @@ class S3Client:
                  access_key:str, 
                  secret_key:str, 
                  endpoint_url: str | None=None, 
-                 region_name:str='us-east-1'):
+                 region_name:str='us-east-1',
+                 public_base_url: str | None=None,
+                 url_expiration: int=3600,
+                 url_min_ttl: int=600,
+                 url_cache_size: int=10000,
+                 upload_concurrency: int=4,
+                 multipart_threshold: int=8 * 1024 * 1024,
+                 multipart_chunksize: int=8 * 1024 * 1024,
+                 multipart_concurrency: int=4):
         self.bucket_name = bucket_name
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.url_expiration = url_expiration
+        # Entry hết hạn trong cache trước URL url_min_ttl giây,
+        # để URL trả cho client luôn còn hiệu lực ít nhất chừng đó
+        self.url_cache_ttl = url_expiration - url_min_ttl
+        self._url_cache = TTLCache(maxsize=url_cache_size, ttl=self.url_cache_ttl)
         self.s3 = boto3.client(
             's3',
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key,
             region_name=region_name,
-            endpoint_url=endpoint_url
+            endpoint_url=endpoint_url,
+            config=Config(
+                # S3 giả lập local (MinIO...) thường không hỗ trợ virtual-hosted style
+                s3={"addressing_style": "path"} if endpoint_url else None,
+                # Mỗi upload multipart dùng tới multipart_concurrency kết nối
+                max_pool_connections=max(10, upload_concurrency * multipart_concurrency),
+            )
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=multipart_concurrency,
+        )
+        # Upload / download chạy trong executor riêng: số worker là số transfer đồng thời tối đa,
+        # transfer vượt quá xếp hàng ở đây thay vì chiếm executor mặc định của event loop
+        self._transfer_executor = ThreadPoolExecutor(
+            max_workers=upload_concurrency,
+            thread_name_prefix="s3-transfer",
         )
-        self.ensure_bucket_exists()
+        # Bucket được kiểm tra ở lần upload đầu tiên (không gọi S3 lúc import module)
+        self._bucket_ready = False
+        self._bucket_lock = threading.Lock()
+
+    def _ensure_bucket_once(self):
+        if self._bucket_ready:
+            return
+        with self._bucket_lock:
+            if not self._bucket_ready:
+                self.ensure_bucket_exists()
+                self._bucket_ready = True
 
     def ensure_bucket_exists(self):
         try:
@@ -65,25 +112,80 @@ class S3Client:
     @run_in_executor
     def upload_file(self, local_path, s3_key):
         try:
-            self.s3.upload_fileobj(local_path, self.bucket_name, s3_key)
+            self._ensure_bucket_once()
+            self.s3.upload_fileobj(local_path, self.bucket_name, s3_key, Config=self.transfer_config)
             logger.info(f"Uploaded to {s3_key}")
         except Exception as e:
             logger.info(f"Error uploading file: {e}")
 
-    def upload_fileobj(self, file_obj, s3_key: str, content_type: str = None):
+    def upload_fileobj(self, file_obj, s3_key: str, content_type: str = None, cache_control: str = None):
         """
         Upload file trực tiếp từ bộ nhớ (stream) lên S3.
         Thường dùng cho FastAPI UploadFile.
         """
         try:
+            self._ensure_bucket_once()
             extra_args = {'ContentType': content_type} if content_type else {}
-            self.s3.upload_fileobj(file_obj, self.bucket_name, s3_key, ExtraArgs=extra_args)
+            if cache_control:
+                extra_args['CacheControl'] = cache_control
+            # File lớn hơn multipart_threshold được chia part và upload song song
+            self.s3.upload_fileobj(
+                file_obj, self.bucket_name, s3_key, ExtraArgs=extra_args, Config=self.transfer_config
+            )
             logger.info(f"Uploaded stream to {s3_key}")
             return s3_key
         except Exception as e:
             logger.error(f"Error uploading file object: {e}")
             raise e
 
+    async def upload_fileobj_async(self, file_obj, s3_key: str, content_type: str = None, cache_control: str = None):
+        """upload_fileobj chạy trong transfer executor, không chặn event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._transfer_executor, lambda: self.upload_fileobj(file_obj, s3_key, content_type, cache_control)
+        )
+
+    async def move_object_async(self, source_key: str, target_key: str):
+        """Copy phía S3 (dữ liệu không đi qua API) rồi xóa object nguồn."""
+        def move():
+            self.s3.copy(
+                {"Bucket": self.bucket_name, "Key": source_key}, self.bucket_name, target_key,
+                Config=self.transfer_config,
+            )
+            self.s3.delete_object(Bucket=self.bucket_name, Key=source_key)
+
+        await asyncio.get_running_loop().run_in_executor(self._transfer_executor, move)
+
+    async def download_file_async(self, s3_key: str, local_path: str):
+        """Tải object về file local theo từng part (không nạp cả file vào bộ nhớ), trong transfer executor."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self._transfer_executor,
+            lambda: self.s3.download_file(self.bucket_name, s3_key, local_path, Config=self.transfer_config)
+        )
+
+    @run_in_executor
+    def generate_presigned_post(self,
+                                s3_key: str,
+                                content_type: str,
+                                max_size: int,
+                                expiration: int=600):
+        """
+        Form upload thẳng lên S3 (client POST multipart/form-data tới url kèm fields).
+        Policy khóa đúng key, Content-Type và giới hạn dung lượng file.
+        """
+        self._ensure_bucket_once()
+        return self.s3.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expiration,
+        )
+
     @run_in_executor
     def download_file(self, s3_key, local_path):
         try:
@@ -110,6 +212,22 @@ class S3Client:
             logger.info(f"Error generating presigned URL: {e}")
             return None
         
+    def get_file_url(self, s3_key: str) -> str | None:
+        """
+        URL hiển thị cho file (ảnh sản phẩm, avatar...).
+        Dùng public/CDN URL nếu có cấu hình, ngược lại là presigned URL được cache theo key
+        nên các trang danh sách không phải ký lại mỗi lần serialize.
+        """
+        if self.public_base_url:
+            return f"{self.public_base_url}/{urllib.parse.quote(s3_key)}"
+
+        url = self._url_cache.get(s3_key)
+        if url is None:
+            url = self.get_presigned_url(s3_key, expiration=self.url_expiration)
+            if url and self.url_cache_ttl > 0:
+                self._url_cache.set(s3_key, url)
+        return url
+
     def get_presigned_url_inline(self, 
                                  s3_key:str, 
                                  expiration:int=3600, 
@@ -132,13 +250,16 @@ class S3Client:
             logger.info(f"Error generating presigned URL: {e}")
             return None
 
-if settings.ENVIRONMENT.is_testing:
-    s3_client = S3Client(bucket_name=settings.S3_BUCKET_NAME,
-                         access_key=settings.S3_ACCESS_KEY,
-                         secret_key=settings.S3_SECRET_KEY,
-                         region_name=settings.S3_REGION)
-else:
-    s3_client = S3Client(bucket_name=settings.S3_BUCKET_NAME,
-                         access_key=settings.S3_ACCESS_KEY,
-                         secret_key=settings.S3_SECRET_KEY,
-                         region_name=settings.S3_REGION)
\ No newline at end of file
+s3_client = S3Client(bucket_name=settings.S3_BUCKET_NAME,
+                     access_key=settings.S3_ACCESS_KEY,
+                     secret_key=settings.S3_SECRET_KEY,
+                     endpoint_url=settings.S3_ENDPOINT_URL,
+                     region_name=settings.S3_REGION,
+                     public_base_url=settings.S3_PUBLIC_BASE_URL,
+                     url_expiration=settings.S3_PRESIGNED_URL_EXPIRES,
+                     url_min_ttl=settings.S3_PRESIGNED_URL_MIN_TTL,
+                     url_cache_size=settings.S3_PRESIGNED_URL_CACHE_SIZE,
+                     upload_concurrency=settings.S3_UPLOAD_CONCURRENCY,
+                     multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+                     multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE_MB * 1024 * 1024,
+                     multipart_concurrency=settings.S3_MULTIPART_CONCURRENCY)
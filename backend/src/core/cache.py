@@ -0,0 +1,158 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from src.core.config import settings
+
+
+class TTLCache:
+    """
+    Cache in-memory có giới hạn số phần tử (LRU) và thời gian sống cho từng entry.
+    Không thread-safe: chỉ dùng trong event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= self._timer():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        for key in [k for k in self._data if isinstance(k, str) and k.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend:
+    """
+    Interface lưu trữ cho cache ứng dụng (key: str -> value: bytes).
+    Các hàm đều async để có thể thay bằng backend dùng Redis (settings.REDIS_URL)
+    mà không phải sửa nơi gọi.
+    """
+
+    async def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Backend in-process. Mỗi worker có cache riêng: invalidate chỉ có tác dụng trên
+    worker xử lý request ghi, các worker khác tự hết hạn theo TTL.
+    """
+
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str):
+        self._cache.delete(key)
+
+    async def delete_prefix(self, prefix: str):
+        self._cache.delete_prefix(prefix)
+
+
+class ResponseCache:
+    """
+    Cache JSON response đã serialize kèm ETag, hỗ trợ If-None-Match -> 304.
+    Mọi key nằm dưới namespace nên invalidate() có thể xóa cả nhóm.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: int):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}{key}"
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+    ) -> tuple[bytes, str]:
+        """Trả về (body JSON, ETag); chỉ gọi loader khi cache miss."""
+        cached = await self.backend.get(self._key(key))
+        if cached is not None:
+            etag, body = cached.split(b" ", 1)
+            return body, etag.decode("ascii")
+
+        data = await loader()
+        body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        await self.backend.set(self._key(key), etag.encode("ascii") + b" " + body, self.ttl)
+        return body, etag
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+    ) -> Response:
+        body, etag = await self.get_or_load(key, loader, adapter)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            candidates = {tag.strip() for tag in if_none_match.split(",")}
+            if etag in candidates or f"W/{etag}" in candidates or "*" in candidates:
+                return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, key: str | None = None):
+        """Xóa một key, hoặc toàn bộ namespace nếu không truyền key."""
+        if key is None:
+            await self.backend.delete_prefix(self.namespace)
+        else:
+            await self.backend.delete(self._key(key))
+
+
+cache_backend: CacheBackend = MemoryCacheBackend(maxsize=settings.CACHE_MAX_ENTRIES)
@@ -15,6 +15,8 @@ class Settings(CustomBaseSettings):
     DATABASE_POOL_SIZE: int = 16
     DATABASE_POOL_TTL: int = 60 * 20  # 20 minutes
     DATABASE_POOL_PRE_PING: bool = True
+    # Câu SQL chạy lâu hơn ngưỡng này được log (tham số đã che)
+    SLOW_QUERY_THRESHOLD_MS: int = 200
 
     POSTGRES_DB: str
     POSTGRES_PASSWORD: str
@@ -26,8 +28,30 @@ class Settings(CustomBaseSettings):
     # Redis
     REDIS_URL: str
 
+    # Application cache
+    CACHE_MAX_ENTRIES: int = 10000
+    CATALOG_CACHE_TTL: int = 300 # Seconds
+    # Response chi tiết chứa presigned URL -> phải nhỏ hơn S3_PRESIGNED_URL_MIN_TTL
+    WINE_DETAIL_CACHE_TTL: int = 300 # Seconds
+
+    # User đã xác thực (src/auth/principal.py)
+    PRINCIPAL_CACHE_TTL: int = 30 # Seconds
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Idempotency-Key (checkout / giỏ hàng)
+    IDEMPOTENCY_KEY_TTL: int = 24 # Hours
+    IDEMPOTENCY_PURGE_INTERVAL: int = 60 * 30 # Seconds
+
+    # Số shard mỗi bộ đếm dashboard (giảm tranh chấp khóa khi nhiều đơn cùng lúc)
+    DASHBOARD_COUNTER_SHARDS: int = 8
+    # Múi giờ dùng để chia ngày cho báo cáo doanh số
+    ANALYTICS_TIMEZONE: str = "Asia/Ho_Chi_Minh"
+
     # Application
     ENVIRONMENT: Environment = Environment.LOCAL
+    # /metrics yêu cầu header "Authorization: Bearer <METRICS_TOKEN>";
+    # không đặt thì chỉ mở khi ENVIRONMENT=LOCAL
+    METRICS_TOKEN: str | None = None
     
     CORS_ORIGINS: list[str] = ["*"]
     CORS_ORIGINS_REGEX: str | None = None
@@ -40,6 +64,10 @@ class Settings(CustomBaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 360
     REFRESH_TOKEN_EXPIRES: int = 30 # Days
     VERIFY_TOKEN_EXPIRES: int = 24 # Hours
+    # Cost factor của bcrypt; hash cũ khác cost được hash lại khi user đăng nhập
+    BCRYPT_ROUNDS: int = 12
+    # Số phép hash / kiểm tra mật khẩu chạy đồng thời (thread pool riêng)
+    PASSWORD_HASH_WORKERS: int = 4
     
     # Email
     MAIL_USER: str
@@ -54,6 +82,24 @@ class Settings(CustomBaseSettings):
     S3_ACCESS_KEY: str
     S3_SECRET_KEY: str
     S3_REGION: str
+    # S3 tương thích chạy local (MinIO, moto server...), vd. http://localhost:9000
+    S3_ENDPOINT_URL: str | None = None
+    # Nếu bucket được phục vụ qua CDN / public URL thì trả URL cố định, không cần ký
+    S3_PUBLIC_BASE_URL: str | None = None
+    S3_PRESIGNED_URL_EXPIRES: int = 3600 # Seconds
+    S3_PRESIGNED_URL_MIN_TTL: int = 600 # Cache URL đã ký tới khi còn ít hơn số giây này
+    S3_PRESIGNED_URL_CACHE_SIZE: int = 10000
+    # Upload qua API: số upload đồng thời, file lớn hơn ngưỡng được upload multipart
+    S3_UPLOAD_CONCURRENCY: int = 4
+    S3_MULTIPART_THRESHOLD_MB: int = 8
+    S3_MULTIPART_CHUNKSIZE_MB: int = 8
+    S3_MULTIPART_CONCURRENCY: int = 4 # Số part upload song song cho mỗi file
+    # Upload thẳng từ trình duyệt (presigned POST)
+    S3_PRESIGNED_POST_EXPIRES: int = 600 # Seconds
+    MEDIA_MAX_IMAGE_SIZE_MB: int = 20
+    # Sinh ảnh thumbnail / detail / zoom (WebP) trong process pool
+    MEDIA_IMAGE_WORKERS: int = 2
+    MEDIA_WEBP_QUALITY: int = 80
 
     # Google AI Gemini
     GOOGLE_API_KEY: str | None = None
@@ -10,6 +10,8 @@ DB_NAMING_CONVENTION = {
 
 TASKS_QUEUE = "tasks_queue"
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 class S3ClientMethod(StrEnum):
     GET = "get_object"
     PUT = "put_object"
@@ -17,6 +19,7 @@ class S3ClientMethod(StrEnum):
 class RedisNamespaces(StrEnum):
     CORE = "core:"
     chat_bot = "cb:"
+    CATALOG = "catalog:"
 
 class Environment(StrEnum):
     LOCAL = "LOCAL"
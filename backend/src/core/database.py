@@ -1,7 +1,12 @@
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Annotated, AsyncGenerator
 
 from fastapi import Depends
-from sqlalchemy import MetaData
+from loguru import logger
+from sqlalchemy import MetaData, event
 from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
                                     create_async_engine)
 
@@ -18,6 +23,56 @@ engine = create_async_engine(
 )
 metadata = MetaData(naming_convention=DB_NAMING_CONVENTION)
 
+
+@dataclass
+class QueryStats:
+    """Số câu SQL và tổng thời gian DB (ms) trong một request."""
+    count: int = 0
+    duration_ms: float = 0.0
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def start_query_stats() -> QueryStats:
+    """Bắt đầu đếm SQL cho context hiện tại (mỗi request gọi một lần)."""
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration_ms += elapsed_ms
+
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        # Chỉ log câu lệnh đã tham số hóa; giá trị tham số có thể chứa dữ liệu cá nhân
+        param_count = len(parameters) if isinstance(parameters, (list, tuple, dict)) else 0
+        logger.bind(
+            duration_ms=round(elapsed_ms, 2),
+            executemany=executemany,
+            params=f"<{param_count} redacted>",
+        ).warning(f"Slow query ({elapsed_ms:.0f} ms): {_WHITESPACE_RE.sub(' ', statement).strip()}")
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(exception_context):
+    # Câu lệnh lỗi không qua after_cursor_execute: bỏ mốc thời gian đã đẩy vào
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
 SessionLocal: AsyncSession = async_sessionmaker(
     bind=engine,
     autocommit=False,
@@ -35,4 +35,7 @@ class NotFoundException(DetailedHTTPException):
 
 class PageOutOfRangeException(DetailedHTTPException):
     STATUS_CODE = status.HTTP_400_BAD_REQUEST
-    DETAIL = "Page out of range"
\ No newline at end of file
+    DETAIL = "Page out of range"
+
+class InvalidCursor(BadRequestException):
+    DETAIL = "Invalid pagination cursor"
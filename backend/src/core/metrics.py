@@ -0,0 +1,99 @@
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from src.core.config import settings
+from src.core.database import engine
+
+
+# Bucket (giây) cho API: phần lớn request < 100ms, checkout / AI có thể tới vài giây
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Thời gian xử lý HTTP request theo route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Số HTTP request đang xử lý",
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Số câu SQL mỗi HTTP request theo route",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "chat_websocket_connections",
+    "Số kết nối websocket chat đang mở",
+)
+
+AI_TOOL_CALL_DURATION = Histogram(
+    "ai_tool_call_duration_seconds",
+    "Thời gian thực thi tool của AI agent",
+    ["tool", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+ORDER_CREATE_DURATION = Histogram(
+    "order_create_duration_seconds",
+    "Thời gian tạo đơn hàng (create_order)",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+ORDERS_CREATED = Counter(
+    "orders_created_total",
+    "Số đơn hàng đã tạo",
+)
+STOCK_LOCK_WAIT = Histogram(
+    "stock_lock_wait_seconds",
+    "Thời gian chờ khóa các lô hàng (SELECT ... FOR UPDATE) khi xuất kho",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Thời gian chờ thread pool bcrypt trước khi hash / kiểm tra mật khẩu",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Thời gian tính bcrypt (hash / kiểm tra mật khẩu)",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class DatabasePoolCollector(Collector):
+    """Đọc trạng thái pool kết nối của engine mỗi lần scrape."""
+
+    def collect(self):
+        pool = engine.sync_engine.pool
+
+        configured = GaugeMetricFamily("db_pool_size", "Số kết nối cấu hình cho pool (DATABASE_POOL_SIZE)")
+        configured.add_metric([], settings.DATABASE_POOL_SIZE)
+        yield configured
+
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Số kết nối đang được dùng")
+        checked_out.add_metric([], pool.checkedout())
+        yield checked_out
+
+        checked_in = GaugeMetricFamily("db_pool_checked_in", "Số kết nối rảnh trong pool")
+        checked_in.add_metric([], pool.checkedin())
+        yield checked_in
+
+        overflow = GaugeMetricFamily("db_pool_overflow", "Số kết nối vượt pool_size (âm = pool chưa đầy)")
+        overflow.add_metric([], pool.overflow())
+        yield overflow
+
+
+REGISTRY.register(DatabasePoolCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """(body, content type) theo định dạng text của Prometheus."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
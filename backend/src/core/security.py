@@ -1,15 +1,56 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
+from src.core.config import settings
+from src.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT
+
+# bcrypt nhả GIL khi tính hash nên thread pool là đủ (không cần process pool).
+# Số worker là giới hạn số phép hash chạy đồng thời; request vượt quá sẽ xếp hàng
+# trong executor thay vì chặn event loop.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+
+async def _run_in_password_pool(operation: str, func, *args):
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        PASSWORD_HASH_QUEUE_WAIT.labels(operation).observe(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - started)
 
-def verify_password(password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, job)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
     """Verify if provided password matches stored hash"""
     if not password or not hashed_password:
         return False
-    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    return await _run_in_password_pool(
+        "verify", bcrypt.checkpw, password.encode("utf-8"), hashed_password.encode("utf-8")
+    )
 
 
-def hash_password(password: str):
+async def hash_password(password: str) -> str:
     """Generates a hashed version of the provided password."""
     pw = bytes(password, "utf-8")
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(pw, salt).decode("utf-8")
\ No newline at end of file
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    hashed = await _run_in_password_pool("hash", bcrypt.hashpw, pw, salt)
+    return hashed.decode("utf-8")
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Hash được tạo với cost khác BCRYPT_ROUNDS (vd. sau khi tăng cost) -> cần hash lại."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from itertools import islice
+from typing import AsyncIterable, AsyncIterator, Iterator, Sequence
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.inventory.schemas import (
+    InventoryBulkImportError,
+    InventoryBulkImportResponse,
+    InventoryImportRequest,
+)
+from src.inventory.stock_service import apply_stock_changes
+from src.product.cache import invalidate_wine_details
+from src.product.models import Inventory, Wine
+from src.utils.datetime_util import time_now
+
+BULK_IMPORT_CHUNK_SIZE = 1000
+BULK_IMPORT_MAX_ROWS = 50000
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv", "application/vnd.ms-excel"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson"}
+# Mảng JSON phải parse cả file một lần -> giới hạn dung lượng; file lớn dùng CSV / NDJSON
+BULK_IMPORT_MAX_JSON_MB = 10
+
+
+def _iter_csv(file: UploadFile) -> Iterator[dict]:
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        for record in csv.DictReader(text):
+            # Ô trống -> None để các trường Optional không bị validate thành chuỗi rỗng
+            yield {
+                key.strip(): (value.strip() or None) if isinstance(value, str) else value
+                for key, value in record.items() if key
+            }
+    finally:
+        # Không để wrapper đóng luôn file upload khi bị thu hồi
+        text.detach()
+
+
+def _iter_ndjson(file: UploadFile) -> Iterator:
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig")
+    try:
+        for line in text:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        text.detach()
+
+
+def _iter_json_array(file: UploadFile) -> Iterator:
+    if file.size is not None and file.size > BULK_IMPORT_MAX_JSON_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File JSON không được vượt quá {BULK_IMPORT_MAX_JSON_MB}MB, hãy dùng CSV hoặc NDJSON"
+        )
+    records = json.load(file.file)
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="File JSON phải là một mảng các lô hàng")
+    yield from records
+
+
+def _open_import_records(file: UploadFile) -> Iterator:
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv") or file.content_type in CSV_CONTENT_TYPES:
+        return _iter_csv(file)
+    if filename.endswith(".ndjson") or file.content_type in NDJSON_CONTENT_TYPES:
+        return _iter_ndjson(file)
+    return _iter_json_array(file)
+
+
+def _next_chunk(records: Iterator) -> tuple:
+    try:
+        return tuple(islice(records, BULK_IMPORT_CHUNK_SIZE))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File phải được mã hóa UTF-8")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"File CSV không hợp lệ: {e}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="File JSON không hợp lệ")
+
+
+async def read_import_records(file: UploadFile) -> AsyncIterator[tuple]:
+    """
+    Đọc các dòng nhập kho từ file CSV (có header), NDJSON (mỗi dòng một object)
+    hoặc JSON (mảng object), trả về từng lô BULK_IMPORT_CHUNK_SIZE dòng.
+    CSV / NDJSON được đọc dần theo từng lô; việc đọc / giải mã là đồng bộ nên chạy trong threadpool.
+    """
+    records = _open_import_records(file)
+    while chunk := await run_in_threadpool(_next_chunk, records):
+        yield chunk
+
+
+def validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def bulk_import_inventory(
+    db: AsyncSession,
+    chunks: AsyncIterable[Sequence[dict]],
+    atomic: bool = False
+) -> InventoryBulkImportResponse:
+    """
+    Nhập kho hàng loạt, xử lý theo từng lô dòng (xem read_import_records):
+    mỗi lô chỉ 2 câu SELECT (vang tồn tại, mã lô đã có) + 1 INSERT nhiều dòng,
+    cuối cùng cập nhật wine_stock 1 lần và commit.
+
+    Dòng lỗi được bỏ qua và trả về trong `errors`; atomic=True thì có lỗi là không nhập gì.
+    """
+    errors: list[InventoryBulkImportError] = []
+    seen_batches: set = set() # (wine_id, batch_code) đã gặp trong file
+    deltas: dict = defaultdict(int)
+    imported = 0
+    row_count = 0
+
+    async for records in chunks:
+        chunk = list(enumerate(records, start=row_count + 1))
+        row_count += len(records)
+        if row_count > BULK_IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"File vượt quá {BULK_IMPORT_MAX_ROWS} dòng")
+
+        # 1. Validate từng dòng (không cần DB)
+        candidates: list[tuple[int, InventoryImportRequest]] = []
+        for row, record in chunk:
+            batch_code = record.get("batch_code") if isinstance(record, dict) else None
+            try:
+                item = InventoryImportRequest.model_validate(record)
+            except ValidationError as e:
+                errors.append(InventoryBulkImportError(row=row, batch_code=batch_code, detail=validation_detail(e)))
+                continue
+
+            if item.quantity <= 0:
+                detail = "Số lượng nhập phải lớn hơn 0"
+            elif item.import_price < 0:
+                detail = "Giá nhập không hợp lệ"
+            elif (item.wine_id, item.batch_code) in seen_batches:
+                detail = "Mã lô hàng (Batch Code) bị trùng trong file"
+            else:
+                seen_batches.add((item.wine_id, item.batch_code))
+                candidates.append((row, item))
+                continue
+            errors.append(InventoryBulkImportError(row=row, batch_code=item.batch_code, detail=detail))
+
+        if not candidates:
+            continue
+
+        # 2. Kiểm tra theo tập hợp: vang tồn tại & mã lô chưa có
+        wine_ids = {item.wine_id for _, item in candidates}
+        known_wines = set((await db.execute(select(Wine.id).where(Wine.id.in_(wine_ids)))).scalars().all())
+        existing_batches = set(
+            (
+                await db.execute(
+                    select(Inventory.wine_id, Inventory.batch_code).where(
+                        tuple_(Inventory.wine_id, Inventory.batch_code).in_(
+                            [(item.wine_id, item.batch_code) for _, item in candidates]
+                        )
+                    )
+                )
+            ).tuples().all()
+        )
+
+        # 3. INSERT nhiều dòng
+        import_date = time_now().replace(tzinfo=None)
+        values = []
+        for row, item in candidates:
+            if item.wine_id not in known_wines:
+                errors.append(InventoryBulkImportError(row=row, batch_code=item.batch_code, detail="Sản phẩm không tồn tại"))
+            elif (item.wine_id, item.batch_code) in existing_batches:
+                errors.append(InventoryBulkImportError(
+                    row=row, batch_code=item.batch_code, detail="Mã lô hàng (Batch Code) đã tồn tại cho sản phẩm này"
+                ))
+            else:
+                values.append({
+                    "wine_id": item.wine_id,
+                    "quantity_available": item.quantity,
+                    "import_price": item.import_price,
+                    "batch_code": item.batch_code,
+                    "import_date": import_date,
+                    "expiry_date": item.expiry_date,
+                    "shelf_location": item.shelf_location,
+                })
+                deltas[item.wine_id] += item.quantity
+
+        # atomic: đã có lỗi thì chỉ validate tiếp để báo đủ lỗi, không ghi thêm
+        if values and not (atomic and errors):
+            await db.execute(insert(Inventory), values)
+            imported += len(values)
+
+    if atomic and errors:
+        await db.rollback()
+        imported = 0
+    else:
+        await apply_stock_changes(db, deltas)
+        await db.commit()
+        if deltas:
+            await invalidate_wine_details(*deltas)
+
+    errors.sort(key=lambda error: error.row)
+    return InventoryBulkImportResponse(imported=imported, failed=len(errors), errors=errors)
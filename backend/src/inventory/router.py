@@ -1,7 +1,7 @@
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy import desc
@@ -10,7 +10,11 @@ from src.core.database import SessionDep
 from src.auth.dependencies import allow_staff
 from src.user.models import User
 from src.product.models import Inventory, Wine
-from src.inventory.schemas import InventoryResponse, InventoryImportRequest, InventoryAdjustment
+from src.product.cache import invalidate_wine_details
+from src.inventory.stock_service import apply_stock_changes
+from src.inventory.schemas import InventoryResponse, InventoryImportRequest, InventoryAdjustment, InventoryBulkImportResponse
+from src.inventory.bulk_import import bulk_import_inventory, read_import_records
+from src.utils.export import ExportFormat, export_response
 
 inventory_router = APIRouter(
     prefix="/inventory",
@@ -58,6 +62,46 @@ async def get_inventory_list(
     
     return response
 
+# 1b. Xuất toàn bộ tồn kho (CSV / NDJSON, stream)
+INVENTORY_EXPORT_COLUMNS = [
+    "id", "wine_id", "wine_name", "batch_code", "quantity_available",
+    "import_price", "import_date", "expiry_date", "shelf_location",
+]
+
+@inventory_router.get("/export")
+async def export_inventory(
+    user: User = Depends(allow_staff),
+    search: Optional[str] = None,
+    wine_id: Optional[UUID] = None,
+    format: ExportFormat = ExportFormat.CSV
+):
+    query = (
+        select(
+            Inventory.id,
+            Inventory.wine_id,
+            Wine.name.label("wine_name"),
+            Inventory.batch_code,
+            Inventory.quantity_available,
+            Inventory.import_price,
+            Inventory.import_date,
+            Inventory.expiry_date,
+            Inventory.shelf_location,
+        )
+        .join(Wine, Wine.id == Inventory.wine_id)
+        .order_by(desc(Inventory.import_date), Inventory.id)
+    )
+
+    if wine_id:
+        query = query.where(Inventory.wine_id == wine_id)
+
+    if search:
+        query = query.where(
+            (Wine.name.ilike(f"%{search}%")) |
+            (Inventory.batch_code.ilike(f"%{search}%"))
+        )
+
+    return export_response(query, INVENTORY_EXPORT_COLUMNS, format, "inventory")
+
 # 2. Nhập kho
 @inventory_router.post("/import")
 async def import_inventory(
@@ -87,10 +131,26 @@ async def import_inventory(
     )
     
     db.add(new_inv)
+    await apply_stock_changes(db, {payload.wine_id: payload.quantity})
     await db.commit()
+    await invalidate_wine_details(payload.wine_id)
     
     return {"message": "Nhập kho thành công"}
 
+# 2b. Nhập kho hàng loạt từ file CSV / NDJSON / JSON
+@inventory_router.post("/import/bulk", response_model=InventoryBulkImportResponse)
+async def import_inventory_bulk(
+    db: SessionDep,
+    file: UploadFile = File(...),
+    atomic: bool = False,
+    user: User = Depends(allow_staff)
+):
+    """
+    Cột / trường: wine_id, quantity, import_price, batch_code, expiry_date, shelf_location.
+    Dòng lỗi được liệt kê trong `errors`; atomic=true thì chỉ nhập khi cả file hợp lệ.
+    """
+    return await bulk_import_inventory(db, read_import_records(file), atomic=atomic)
+
 # 3. Điều chỉnh tồn kho
 @inventory_router.patch("/{inventory_id}/adjust")
 async def adjust_inventory(
@@ -99,7 +159,7 @@ async def adjust_inventory(
     db: SessionDep,
     user: User = Depends(allow_staff)
 ):
-    inv = await db.get(Inventory, inventory_id)
+    inv = await db.get(Inventory, inventory_id, with_for_update=True)
     if not inv:
         raise HTTPException(status_code=404, detail="Không tìm thấy lô hàng")
         
@@ -108,6 +168,8 @@ async def adjust_inventory(
         raise HTTPException(status_code=400, detail="Số lượng tồn kho không đủ để giảm")
         
     inv.quantity_available = new_qty
+    await apply_stock_changes(db, {inv.wine_id: payload.quantity_adjustment})
     await db.commit()
+    await invalidate_wine_details(inv.wine_id)
     
     return {"message": "Đã điều chỉnh tồn kho", "new_quantity": new_qty}
\ No newline at end of file
@@ -33,4 +33,15 @@ class InventoryImportRequest(BaseModel):
 
 class InventoryAdjustment(BaseModel):
     quantity_adjustment: int
-    reason: Optional[str] = None
\ No newline at end of file
+    reason: Optional[str] = None
+
+class InventoryBulkImportError(BaseModel):
+    row: int # Số thứ tự dòng dữ liệu trong file (bắt đầu từ 1, không tính header)
+    batch_code: Optional[str] = None
+    detail: str
+
+
+class InventoryBulkImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[InventoryBulkImportError]
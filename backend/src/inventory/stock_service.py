@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+from typing import Iterable, Mapping
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import SessionLocal
+from src.product.models import Inventory, WineStock
+from src.utils.datetime_util import time_now
+
+
+async def apply_stock_changes(db: AsyncSession, deltas: Mapping[UUID, int]):
+    """
+    Cộng/trừ tồn kho tổng (wine_stock) cho nhiều vang trong 1 câu INSERT ... ON CONFLICT.
+    Gọi trong cùng transaction với thay đổi ở bảng inventory để hai bảng luôn khớp.
+    """
+    changes = {wine_id: delta for wine_id, delta in deltas.items() if delta}
+    if not changes:
+        return
+
+    now = time_now()
+    # Sắp theo wine_id để các transaction đồng thời khóa dòng theo cùng thứ tự
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "wine_id": wine_id,
+            "quantity_available": delta,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for wine_id, delta in sorted(changes.items(), key=lambda item: str(item[0]))
+    ]
+    stmt = insert(WineStock).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[WineStock.wine_id],
+        set_={
+            "quantity_available": WineStock.quantity_available + stmt.excluded.quantity_available,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_stock_levels(db: AsyncSession, wine_ids: Iterable[UUID]) -> dict[UUID, int]:
+    """Tồn kho tổng theo wine_id; vang chưa từng nhập kho trả về 0."""
+    wine_ids = list(wine_ids)
+    if not wine_ids:
+        return {}
+
+    result = await db.execute(
+        select(WineStock.wine_id, WineStock.quantity_available).where(WineStock.wine_id.in_(wine_ids))
+    )
+    levels = {wine_id: 0 for wine_id in wine_ids}
+    levels.update({row.wine_id: row.quantity_available for row in result})
+    return levels
+
+
+async def get_stock_level(db: AsyncSession, wine_id: UUID) -> int:
+    levels = await get_stock_levels(db, [wine_id])
+    return levels[wine_id]
+
+
+async def rebuild_stock_levels():
+    """Tính lại toàn bộ wine_stock từ bảng inventory (dùng khi dữ liệu bị lệch)."""
+    async with SessionLocal() as db:
+        print("Rebuilding wine stock levels ...")
+
+        # Chặn ghi vào inventory trong lúc tính lại để tổng không bị lệch
+        await db.execute(text("LOCK TABLE inventory IN SHARE MODE"))
+        totals = (
+            await db.execute(
+                select(Inventory.wine_id, func.sum(Inventory.quantity_available).label("total"))
+                .group_by(Inventory.wine_id)
+            )
+        ).all()
+
+        await db.execute(delete(WineStock))
+        now = time_now()
+        if totals:
+            await db.execute(insert(WineStock).values([
+                {
+                    "id": uuid.uuid4(),
+                    "wine_id": row.wine_id,
+                    "quantity_available": row.total or 0,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for row in totals
+            ]))
+        await db.commit()
+
+        print(f"Rebuilt stock levels for {len(totals)} wines.")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_stock_levels())
@@ -1,7 +1,10 @@
+import asyncio
+import secrets
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
@@ -9,14 +12,20 @@ from loguru import logger
 from starlette.middleware.cors import CORSMiddleware
 
 from src.core.config import settings
+from src.core.constants import NEXT_CURSOR_HEADER, Environment
+from src.core.database import start_query_stats
+from src.core.exceptions import NotAuthenticated
+from src.core.metrics import HTTP_REQUEST_DB_QUERIES, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, render_metrics
 from src.routers import api_router
 from src.auth.router import auth_route
 from src.user.router import user_route
 from src.product.router import product_router
 from src.order.router import cart_router
+from src.order.idempotency import run_idempotency_key_purger
 from src.admin.router import admin_router
 from src.inventory.router import inventory_router
 from src.media.router import media_router
+from src.media.derivatives import shutdown_image_pool, start_image_pool
 from src.ai.router import ai_router
 from src.chat.router import chat_router
 
@@ -31,7 +40,12 @@ async def lifespan(app: FastAPI):
         await seed_admin_user()
     except Exception as e:
         logger.error(f"Error seeding data: {e}")
+
+    start_image_pool()
+    purger = asyncio.create_task(run_idempotency_key_purger())
     yield
+    purger.cancel()
+    shutdown_image_pool()
 
 app = FastAPI(
     title="TheWineShop",
@@ -48,8 +62,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"),
     allow_headers=settings.CORS_HEADERS,
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
+@app.middleware("http")
+async def request_instrumentation(request: Request, call_next):
+    """
+    Đếm số câu SQL / thời gian DB của mỗi request, trả về qua header Server-Timing,
+    và ghi metrics latency theo route cho /metrics.
+    """
+    query_stats = start_query_stats()
+    started = time.perf_counter()
+    status_code = 500
+
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    try:
+        with logger.contextualize(method=request.method, path=request.url.path):
+            response = await call_next(request)
+            status_code = response.status_code
+
+            duration_ms = (time.perf_counter() - started) * 1000
+            response.headers["Server-Timing"] = (
+                f'db;dur={query_stats.duration_ms:.2f};desc="{query_stats.count} queries", '
+                f"app;dur={duration_ms:.2f}"
+            )
+            logger.bind(
+                status_code=status_code,
+                duration_ms=round(duration_ms, 2),
+                db_queries=query_stats.count,
+                db_ms=round(query_stats.duration_ms, 2),
+            ).info(f"{request.method} {request.url.path} {status_code}")
+
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Dùng path template của route (vd. /api/products/wines/{wine_id}) để số label không bùng nổ
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_DURATION.labels(request.method, route_path, str(status_code)).observe(
+            time.perf_counter() - started
+        )
+        HTTP_REQUEST_DB_QUERIES.labels(request.method, route_path).observe(query_stats.count)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            raise NotAuthenticated()
+    elif settings.ENVIRONMENT != Environment.LOCAL:
+        # Chưa cấu hình token: không để lộ số liệu nội bộ ngoài môi trường local
+        raise NotAuthenticated()
+
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.error(f"Validation Error: {exc.errors()}")
@@ -0,0 +1,130 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.core.aws import s3_client
+from src.core.config import settings
+from src.media.exceptions import InvalidImage
+from src.media.variants import VARIANT_FORMAT, VARIANT_MAX_SIZES, ImageVariant, original_key_for_upload, variant_key
+
+# Key của ảnh không bao giờ bị ghi đè (mỗi lần upload một asset_id mới) nên cache được lâu
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_image_executor: ProcessPoolExecutor | None = None
+
+
+def start_image_pool():
+    """
+    Tạo process pool sinh ảnh (gọi trong lifespan của app).
+    Dùng forkserver thay vì fork: process của app đang chạy nhiều thread (bcrypt, S3, loguru...),
+    fork lúc một thread đang giữ lock có thể làm process con bị treo.
+    """
+    global _image_executor
+    if _image_executor is None:
+        _image_executor = ProcessPoolExecutor(
+            max_workers=settings.MEDIA_IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+
+
+def shutdown_image_pool():
+    global _image_executor
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False, cancel_futures=True)
+        _image_executor = None
+
+
+def _get_image_executor() -> ProcessPoolExecutor:
+    # Script chạy ngoài app (không có lifespan) thì tạo khi cần
+    start_image_pool()
+    return _image_executor
+
+
+def render_variants(path: str, quality: int) -> dict[str, bytes]:
+    """Resize ảnh gốc (file local) thành các biến thể WebP. Chạy trong process pool (CPU-bound)."""
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+        variants = {}
+        for variant, max_size in VARIANT_MAX_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format=VARIANT_FORMAT, quality=quality, method=4)
+            variants[variant.value] = buffer.getvalue()
+        return variants
+
+
+@asynccontextmanager
+async def _temp_image_path() -> AsyncIterator[str]:
+    # Process con chỉ nhận được dữ liệu pickle: truyền đường dẫn file tạm thay vì nội dung ảnh
+    fd, path = tempfile.mkstemp(prefix="wineshop-img-")
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def _copy_to_path(file_obj: BinaryIO, path: str):
+    file_obj.seek(0)
+    with open(path, "wb") as target:
+        shutil.copyfileobj(file_obj, target)
+    file_obj.seek(0)
+
+
+async def build_image_variants(path: str) -> dict[str, bytes]:
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_image_executor(), render_variants, path, settings.MEDIA_WEBP_QUALITY
+        )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        logger.warning(f"Cannot process image: {e}")
+        raise InvalidImage()
+
+
+async def build_image_variants_from_file(file_obj: BinaryIO) -> dict[str, bytes]:
+    """
+    Sinh biến thể từ file upload (UploadFile.file). File upload là file tạm không tên của process
+    cha nên được copy từng khối ra file tạm có tên trong threadpool, ảnh không bị nạp hết vào bộ nhớ.
+    """
+    async with _temp_image_path() as path:
+        await run_in_threadpool(_copy_to_path, file_obj, path)
+        return await build_image_variants(path)
+
+
+async def upload_image_variants(original_key: str, variants: dict[str, bytes]):
+    await asyncio.gather(*(
+        s3_client.upload_fileobj_async(
+            io.BytesIO(content),
+            variant_key(original_key, ImageVariant(variant)),
+            content_type=f"image/{VARIANT_FORMAT}",
+            cache_control=VARIANT_CACHE_CONTROL,
+        )
+        for variant, content in variants.items()
+    ))
+
+
+async def generate_image_derivatives(upload_key: str) -> str:
+    """
+    Sinh biến thể cho ảnh upload thẳng (presigned POST) rồi chuyển ảnh gốc sang original.{ext}.
+    Trả về key original: chỉ tồn tại khi các biến thể đã được ghi.
+    """
+    original_key = original_key_for_upload(upload_key)
+    async with _temp_image_path() as path:
+        await s3_client.download_file_async(upload_key, path)
+        variants = await build_image_variants(path)
+    await upload_image_variants(original_key, variants)
+    await s3_client.move_object_async(upload_key, original_key)
+    return original_key
@@ -0,0 +1,9 @@
+from fastapi import HTTPException, status
+
+
+class InvalidImage(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File không phải ảnh hợp lệ hoặc ảnh bị lỗi.",
+        )
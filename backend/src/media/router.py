@@ -1,4 +1,5 @@
 import uuid
+from botocore.exceptions import ClientError
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from loguru import logger
 
@@ -6,6 +7,14 @@ from src.core.aws import s3_client
 from src.core.config import settings
 from src.auth.dependencies import get_current_user
 from src.user.schemas import UserResponse
+from src.media.schemas import (
+    ImageUploadCompleteRequest,
+    ImageUploadCompleteResponse,
+    PresignedUploadRequest,
+    PresignedUploadResponse
+)
+from src.media.derivatives import build_image_variants_from_file, generate_image_derivatives, upload_image_variants
+from src.media.variants import ImageVariant, image_variant_url, is_upload_key, original_image_key, upload_image_key
 
 media_router = APIRouter(
     prefix="/media",
@@ -13,6 +22,7 @@ media_router = APIRouter(
 )
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "webp", "gif"}
+ALLOWED_CONTENT_TYPES = {"image/png", "image/jpeg", "image/webp", "image/gif"}
 
 def validate_image_extension(filename: str):
     parts = filename.split(".")
@@ -23,41 +33,115 @@ def validate_image_extension(filename: str):
         raise HTTPException(status_code=400, detail=f"Chỉ hỗ trợ định dạng: {', '.join(ALLOWED_EXTENSIONS)}")
     return extension
 
+def validate_image_size(size: int | None):
+    if size is not None and size > settings.MEDIA_MAX_IMAGE_SIZE_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Ảnh không được vượt quá {settings.MEDIA_MAX_IMAGE_SIZE_MB}MB")
+
+def variant_urls(s3_key: str) -> dict[str, str]:
+    return {variant.value: image_variant_url(s3_key, variant) for variant in ImageVariant}
+
 @media_router.post("/upload/image")
 async def upload_image(
     file: UploadFile = File(...),
     current_user: UserResponse = Depends(get_current_user)
 ):
     extension = validate_image_extension(file.filename)
+    validate_image_size(file.size)
     
-    random_id = str(uuid.uuid4())
-    s3_key = f"uploads/{current_user.id}/{random_id}.{extension}"
+    s3_key = original_image_key(current_user.id, uuid.uuid4(), extension)
+
+    # Resize trước khi upload (process pool): file không phải ảnh thì không lưu gì lên S3.
+    # Ảnh được stream từ file upload, không đọc hết vào bộ nhớ
+    variants = await build_image_variants_from_file(file.file)
     
     try:
-        await file.seek(0)
-        
         logger.info(f"--- START UPLOAD ---")
         logger.info(f"Target Bucket: {settings.S3_BUCKET_NAME}")
         logger.info(f"Target Region: {settings.S3_REGION}")
         logger.info(f"Target Key: {s3_key}")
         
-        # Upload lên S3
-        s3_client.upload_fileobj(
+        # Upload lên S3 (transfer executor, không chặn event loop). Biến thể ghi trước ảnh gốc:
+        # key original.* chỉ tồn tại khi đã có đủ biến thể (xem src/media/variants.py)
+        await upload_image_variants(s3_key, variants)
+        await s3_client.upload_fileobj_async(
             file_obj=file.file,
             s3_key=s3_key,
             content_type=file.content_type
         )
         
-        # Tạo Presigned URL
-        url = s3_client.get_presigned_url(s3_key, expiration=3600 * 24 * 7)
+        # URL hiển thị: public/CDN URL hoặc presigned URL đã cache, cùng TTL với các URL ảnh khác
+        url = s3_client.get_file_url(s3_key)
         
         return {
             "message": "Upload thành công",
             "file_name": file.filename,
             "s3_key": s3_key,
-            "url": url
+            "url": url,
+            "variants": variant_urls(s3_key)
         }
         
     except Exception as e:
         logger.error(f"Upload failed: {e}")
-        raise HTTPException(status_code=500, detail="Lỗi hệ thống: Không thể tải ảnh lên.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Lỗi hệ thống: Không thể tải ảnh lên.")
+
+@media_router.post("/upload/image/presign", response_model=PresignedUploadResponse)
+async def presign_image_upload(
+    payload: PresignedUploadRequest,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Cấp form upload thẳng lên S3 cho ảnh lớn (file không đi qua API).
+    Client POST multipart/form-data tới `url` gồm các `fields` trả về rồi tới trường `file`,
+    sau đó gọi /upload/image/complete để sinh các biến thể và nhận key dùng để lưu.
+    """
+    extension = validate_image_extension(payload.filename)
+    if payload.content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Chỉ hỗ trợ định dạng: {', '.join(sorted(ALLOWED_CONTENT_TYPES))}")
+
+    s3_key = upload_image_key(current_user.id, uuid.uuid4(), extension)
+    max_size = settings.MEDIA_MAX_IMAGE_SIZE_MB * 1024 * 1024
+
+    try:
+        presigned = await s3_client.generate_presigned_post(
+            s3_key,
+            content_type=payload.content_type,
+            max_size=max_size,
+            expiration=settings.S3_PRESIGNED_POST_EXPIRES,
+        )
+    except Exception as e:
+        logger.error(f"Presign upload failed: {e}")
+        raise HTTPException(status_code=500, detail="Lỗi hệ thống: Không thể tạo liên kết tải ảnh lên.")
+
+    return PresignedUploadResponse(
+        url=presigned["url"],
+        fields=presigned["fields"],
+        s3_key=s3_key,
+        expires_in=settings.S3_PRESIGNED_POST_EXPIRES,
+        max_size=max_size,
+    )
+
+@media_router.post("/upload/image/complete", response_model=ImageUploadCompleteResponse)
+async def complete_image_upload(
+    payload: ImageUploadCompleteRequest,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Sinh ảnh thumbnail / detail / zoom cho ảnh vừa upload thẳng lên S3.
+    Trả về `s3_key` mới (original.*) để lưu vào sản phẩm / avatar.
+    """
+    if not is_upload_key(payload.s3_key) or not payload.s3_key.startswith(f"media/{current_user.id}/"):
+        raise HTTPException(status_code=400, detail="Key ảnh không hợp lệ")
+
+    try:
+        s3_key = await generate_image_derivatives(payload.s3_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=404, detail="Không tìm thấy ảnh trên S3, hãy upload lại")
+        logger.error(f"Generating image variants failed: {e}")
+        raise HTTPException(status_code=500, detail="Lỗi hệ thống: Không thể xử lý ảnh.")
+
+    return ImageUploadCompleteResponse(
+        s3_key=s3_key,
+        url=image_variant_url(s3_key, ImageVariant.DETAIL),
+        variants=variant_urls(s3_key),
+    )
@@ -0,0 +1,26 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class PresignedUploadRequest(BaseModel):
+    filename: str
+    content_type: str
+
+
+class PresignedUploadResponse(BaseModel):
+    url: str
+    fields: Dict[str, str]
+    s3_key: str
+    expires_in: int
+    max_size: int
+
+
+class ImageUploadCompleteRequest(BaseModel):
+    s3_key: str
+
+
+class ImageUploadCompleteResponse(BaseModel):
+    s3_key: str
+    url: str
+    variants: Dict[str, str]
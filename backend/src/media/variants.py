@@ -0,0 +1,61 @@
+import re
+from enum import StrEnum
+
+from src.core.aws import s3_client
+
+
+class ImageVariant(StrEnum):
+    THUMB = "thumb" # Ảnh nhỏ ở trang danh sách / giỏ hàng
+    DETAIL = "detail" # Ảnh chính trang chi tiết
+    ZOOM = "zoom" # Phóng to
+
+
+# Cạnh dài tối đa (px) của từng biến thể; ảnh nhỏ hơn không bị phóng to
+VARIANT_MAX_SIZES = {
+    ImageVariant.THUMB: 400,
+    ImageVariant.DETAIL: 1200,
+    ImageVariant.ZOOM: 2400,
+}
+VARIANT_FORMAT = "webp"
+
+# Ảnh upload: media/{user_id}/{asset_id}/original.{ext}, biến thể nằm cùng thư mục.
+# Object original.* chỉ được ghi (và key chỉ được trả cho client) sau khi các biến thể đã ghi xong,
+# nên key dạng này luôn có biến thể. Upload thẳng (presigned POST) ghi vào upload.{ext}:
+# key đó không có biến thể (hiển thị ảnh gốc) cho tới khi /upload/image/complete đổi sang original.{ext}.
+# Key cũ (uploads/..., URL ngoài) cũng không có biến thể -> dùng ảnh gốc.
+_ORIGINAL_KEY_RE = re.compile(r"^media/[^/]+/[^/]+/original\.[a-z0-9]+$")
+_UPLOAD_KEY_RE = re.compile(r"^media/[^/]+/[^/]+/upload\.[a-z0-9]+$")
+
+
+def original_image_key(user_id, asset_id, extension: str) -> str:
+    return f"media/{user_id}/{asset_id}/original.{extension}"
+
+
+def upload_image_key(user_id, asset_id, extension: str) -> str:
+    return f"media/{user_id}/{asset_id}/upload.{extension}"
+
+
+def is_upload_key(key: str) -> bool:
+    return bool(_UPLOAD_KEY_RE.match(key))
+
+
+def original_key_for_upload(upload_key: str) -> str:
+    folder, filename = upload_key.rsplit("/", 1)
+    return f"{folder}/original.{filename.rsplit('.', 1)[1]}"
+
+
+def has_variants(key: str) -> bool:
+    return bool(_ORIGINAL_KEY_RE.match(key))
+
+
+def variant_key(key: str, variant: ImageVariant) -> str:
+    if not has_variants(key):
+        return key
+    return f"{key.rsplit('/', 1)[0]}/{variant}.{VARIANT_FORMAT}"
+
+
+def image_variant_url(value, variant: ImageVariant):
+    """URL hiển thị cho giá trị ảnh lưu trong DB (S3 key hoặc URL tuyệt đối)."""
+    if value and isinstance(value, str) and not value.startswith("http"):
+        return s3_client.get_file_url(variant_key(value, variant))
+    return value
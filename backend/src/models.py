@@ -5,6 +5,7 @@ from src.product.models import (
     Wine, 
     WineImage, 
     Inventory, 
+    WineStock,
     Promotion,
     ProductReview
 )
@@ -13,7 +14,10 @@ from src.order.models import (
     Cart, 
     CartItem, 
     Order, 
-    OrderItem
+    OrderItem,
+    OrderItemAllocation,
+    IdempotencyKey
 )
 
-from src.chat.models import ChatMessage
\ No newline at end of file
+from src.chat.models import ChatMessage
+from src.admin.models import DashboardCounter, SalesDailyRollup
@@ -0,0 +1,90 @@
+import time
+from dataclasses import dataclass
+from typing import Mapping
+from uuid import UUID
+
+from sqlalchemy import Integer, Uuid, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.metrics import STOCK_LOCK_WAIT
+from src.inventory.stock_service import apply_stock_changes
+from src.order.exceptions import InsufficientStock
+from src.product.models import Inventory
+
+
+@dataclass(frozen=True)
+class BatchAllocation:
+    inventory_id: UUID
+    quantity: int
+
+
+async def allocate_stock(
+    db: AsyncSession,
+    requested: Mapping[UUID, int]
+) -> dict[UUID, list[BatchAllocation]]:
+    """
+    Xuất kho FIFO cho nhiều vang cùng lúc, trả về {wine_id: [lô đã lấy, ...]}.
+
+    1. Khóa mọi lô còn hàng của các vang cần xuất bằng 1 câu SELECT ... FOR UPDATE,
+       theo thứ tự (wine_id, import_date, id) để các đơn đồng thời luôn khóa cùng
+       thứ tự và không deadlock.
+    2. Tính số lượng trừ ở từng lô trong Python (lô nhập trước xuất trước).
+    3. Ghi tất cả bằng 1 câu UPDATE ... FROM (VALUES ...), rồi cập nhật wine_stock.
+
+    Raise InsufficientStock nếu một vang không đủ hàng; khi đó chưa có gì bị ghi.
+    Phải gọi trong transaction của đơn hàng.
+    """
+    requested = {wine_id: qty for wine_id, qty in requested.items() if qty > 0}
+    if not requested:
+        return {}
+
+    lock_started = time.perf_counter()
+    result = await db.execute(
+        select(Inventory.id, Inventory.wine_id, Inventory.quantity_available)
+        .where(
+            Inventory.wine_id.in_(requested.keys()),
+            Inventory.quantity_available > 0
+        )
+        .order_by(Inventory.wine_id, Inventory.import_date, Inventory.id)
+        .with_for_update()
+    )
+    STOCK_LOCK_WAIT.observe(time.perf_counter() - lock_started)
+
+    batches_by_wine: dict[UUID, list] = {wine_id: [] for wine_id in requested}
+    for row in result:
+        batches_by_wine[row.wine_id].append(row)
+
+    allocations: dict[UUID, list[BatchAllocation]] = {}
+    for wine_id, qty_needed in requested.items():
+        batches = batches_by_wine[wine_id]
+        available = sum(batch.quantity_available for batch in batches)
+        if available < qty_needed:
+            raise InsufficientStock(wine_id, available)
+
+        taken = []
+        for batch in batches:
+            if qty_needed <= 0:
+                break
+            deduct = min(batch.quantity_available, qty_needed)
+            taken.append(BatchAllocation(inventory_id=batch.id, quantity=deduct))
+            qty_needed -= deduct
+        allocations[wine_id] = taken
+
+    deductions = values(
+        column("inventory_id", Uuid),
+        column("quantity", Integer),
+        name="deductions"
+    ).data([
+        (allocation.inventory_id, allocation.quantity)
+        for taken in allocations.values()
+        for allocation in taken
+    ])
+    await db.execute(
+        update(Inventory)
+        .where(Inventory.id == deductions.c.inventory_id)
+        .values(quantity_available=Inventory.quantity_available - deductions.c.quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+    await apply_stock_changes(db, {wine_id: -qty for wine_id, qty in requested.items()})
+    return allocations
@@ -0,0 +1,13 @@
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+class InsufficientStock(HTTPException):
+    def __init__(self, wine_id: UUID, available: int, wine_name: str | None = None):
+        self.wine_id = wine_id
+        self.available = available
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sản phẩm {wine_name or wine_id} không đủ hàng (Còn: {available})"
+        )
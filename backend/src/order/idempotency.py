@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+from typing import Any
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from loguru import logger
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.order.models import IdempotencyKey
+from src.utils.datetime_util import time_now
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def _request_hash(payload: Any) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+async def claim_idempotency_key(
+    db: AsyncSession,
+    scope: str,
+    key: str,
+    payload: Any
+) -> JSONResponse | None:
+    """
+    Giữ Idempotency-Key cho request hiện tại.
+
+    - Trả về None nếu đây là lần đầu (hoặc key cũ đã hết hạn): xử lý bình thường
+      rồi gọi save_idempotent_response() trước khi commit.
+    - Trả về response đã lưu nếu key đã được dùng với cùng payload.
+
+    Dòng key được INSERT trong chính transaction của request: retry đồng thời sẽ
+    chờ transaction đầu xong rồi replay; nếu transaction đầu lỗi (rollback) thì
+    key biến mất và retry được xử lý lại từ đầu.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_KEY_HEADER} quá dài")
+
+    request_hash = _request_hash(payload)
+    now = time_now()
+    values = {
+        "id": uuid.uuid4(),
+        "scope": scope,
+        "key": key,
+        "request_hash": request_hash,
+        "status_code": None,
+        "response_body": None,
+        "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL),
+        "created_at": now,
+        "updated_at": now,
+    }
+    stmt = insert(IdempotencyKey).values(values)
+    # Key đã hết hạn nhưng chưa bị dọn thì dùng lại như key mới
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+        set_={k: stmt.excluded[k] for k in values if k not in ("scope", "key", "created_at")},
+        where=IdempotencyKey.expires_at <= now,
+    ).returning(IdempotencyKey.id)
+
+    if (await db.execute(stmt)).scalar_one_or_none() is not None:
+        return None
+
+    stored = (
+        await db.execute(
+            select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        )
+    ).scalar_one()
+
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"{IDEMPOTENCY_KEY_HEADER} đã được dùng cho một request khác"
+        )
+
+    return JSONResponse(
+        status_code=stored.status_code,
+        content=stored.response_body,
+        headers={IDEMPOTENT_REPLAY_HEADER: "true"}
+    )
+
+
+async def save_idempotent_response(
+    db: AsyncSession,
+    scope: str,
+    key: str,
+    body: Any,
+    status_code: int = status.HTTP_200_OK
+):
+    """Lưu response cho key đã claim; gọi trong cùng transaction, trước commit."""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=jsonable_encoder(body))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def purge_expired_idempotency_keys() -> int:
+    async with SessionLocal() as db:
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= time_now()))
+        await db.commit()
+        return result.rowcount
+
+
+async def run_idempotency_key_purger():
+    """Task nền: định kỳ xóa các key đã hết hạn để bảng không phình ra."""
+    while True:
+        try:
+            purged = await purge_expired_idempotency_keys()
+            if purged:
+                logger.info(f"Purged {purged} expired idempotency keys")
+        except Exception as e:
+            logger.error(f"Error purging idempotency keys: {e}")
+        await asyncio.sleep(settings.IDEMPOTENCY_PURGE_INTERVAL)
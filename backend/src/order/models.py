@@ -1,14 +1,14 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DECIMAL, DateTime, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DECIMAL, DateTime, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from src.core.base_model import Base
 
 class Cart(Base):
     __tablename__ = "carts"
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=True, index=True)
     session_id = Column(String(255), nullable=True, index=True)
     
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
@@ -17,7 +17,7 @@ class Cart(Base):
 class CartItem(Base):
     __tablename__ = "cart_items"
 
-    cart_id = Column(UUID(as_uuid=True), ForeignKey("carts.id"), nullable=False)
+    cart_id = Column(UUID(as_uuid=True), ForeignKey("carts.id"), nullable=False, index=True)
     wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False)
     
     quantity = Column(Integer, default=1)
@@ -29,6 +29,12 @@ class CartItem(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Danh sách đơn (admin / lịch sử khách) luôn sắp theo created_at, id giảm dần
+        Index("orders_created_at_id_idx", "created_at", "id"),
+        Index("orders_status_created_at_idx", "status", "created_at"),
+        Index("orders_user_id_created_at_idx", "user_id", "created_at"),
+    )
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=False)
     
@@ -56,11 +62,61 @@ class Order(Base):
 class OrderItem(Base):
     __tablename__ = "order_items"
 
-    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False, index=True)
     wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False)
     
     quantity = Column(Integer, nullable=False)
     price_at_purchase = Column(DECIMAL(12, 2), nullable=False)
+
+    # Snapshot sản phẩm lúc đặt hàng: lịch sử đơn hiển thị được mà không cần join catalog
+    wine_name = Column(String(255), nullable=True)
+    wine_slug = Column(String(255), nullable=True)
+    wine_thumbnail = Column(Text, nullable=True) # S3 key
+
+    # Giá vốn của dòng, chốt lúc đơn vào completed (xem src/admin/rollups.py)
+    cost_at_completion = Column(DECIMAL(18, 2), nullable=True)
     
     order = relationship("Order", back_populates="items")
-    wine = relationship("Wine")
\ No newline at end of file
+    wine = relationship("Wine")
+    allocations = relationship("OrderItemAllocation", back_populates="order_item", cascade="all, delete-orphan")
+
+    @property
+    def wine_snapshot(self) -> dict:
+        return {
+            "id": self.wine_id,
+            "name": self.wine_name,
+            "slug": self.wine_slug,
+            "price": self.price_at_purchase,
+            "thumbnail": self.wine_thumbnail,
+        }
+
+class OrderItemAllocation(Base):
+    """Lô hàng (inventory) nào đã xuất bao nhiêu chai cho từng OrderItem."""
+    __tablename__ = "order_item_allocations"
+
+    order_item_id = Column(UUID(as_uuid=True), ForeignKey("order_items.id"), nullable=False, index=True)
+    inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory.id"), nullable=False, index=True)
+
+    quantity = Column(Integer, nullable=False)
+
+    order_item = relationship("OrderItem", back_populates="allocations")
+    inventory = relationship("Inventory")
+
+class IdempotencyKey(Base):
+    """
+    Response đã trả cho một Idempotency-Key, để request gửi lại (retry) được trả
+    đúng response cũ thay vì xử lý lại. Hết hạn sau settings.IDEMPOTENCY_KEY_TTL.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "key"),
+    )
+
+    scope = Column(String(255), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(JSONB, nullable=True)
+
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
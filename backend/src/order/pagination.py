@@ -0,0 +1,37 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+from src.core.exceptions import InvalidCursor
+from src.order.models import Order
+from src.utils.cursor import decode_cursor, encode_cursor
+
+
+def apply_order_page(query: Select, cursor: str | None, limit: int) -> Select:
+    """
+    Sắp xếp đơn hàng mới nhất trước (created_at, id giảm dần) và lọc theo keyset
+    nếu có cursor, để trang sau tốn chi phí như trang đầu.
+    """
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        try:
+            last_created_at = datetime.fromisoformat(payload["c"])
+            last_id = UUID(payload["id"])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise InvalidCursor()
+        query = query.where(tuple_(Order.created_at, Order.id) < tuple_(last_created_at, last_id))
+
+    return query.limit(limit)
+
+
+def next_order_cursor(rows: list, limit: int) -> str | None:
+    """Cursor trang kế tiếp từ dòng cuối (cần thuộc tính id và created_at), None khi hết."""
+    if not rows or len(rows) < limit:
+        return None
+
+    last = rows[-1]
+    return encode_cursor({"c": last.created_at.isoformat(), "id": str(last.id)})
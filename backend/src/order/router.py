@@ -1,22 +1,30 @@
+import time
 from datetime import datetime, timezone
 from typing import List, Optional
 from uuid import UUID
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
 from sqlalchemy import func
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
+from src.core.constants import NEXT_CURSOR_HEADER
 from src.core.database import SessionDep
-from src.auth.dependencies import get_current_user
-from src.auth.security import decode_token
+from src.core.metrics import ORDER_CREATE_DURATION, ORDERS_CREATED
+from src.auth.dependencies import get_current_user, resolve_request_user
 from src.user.models import User
-from src.order.models import Cart, CartItem, Order, OrderItem
-from src.product.models import Wine, Inventory, Winery
-from src.order.schemas import CartResponse, CartItemCreate, OrderCreate, OrderResponse, OrderSimulateResponse
+from src.order.models import Cart, CartItem, Order, OrderItem, OrderItemAllocation
+from src.product.models import Wine, Winery
+from src.order.schemas import CartResponse, CartItemCreate, OrderCreate, OrderHistoryResponse, OrderResponse, OrderSimulateResponse
+from src.order.pagination import apply_order_page, next_order_cursor
 from src.product.schemas import CategoryBase, WineListResponse
 from src.order.discount_service import discount_service
+from src.product.cache import invalidate_wine_details
+from src.order.allocation import allocate_stock
+from src.order.exceptions import InsufficientStock
+from src.order.idempotency import IDEMPOTENCY_KEY_HEADER, claim_idempotency_key, save_idempotent_response
+from src.admin.counters import record_order_created
 
 cart_router = APIRouter(
     prefix="/cart",
@@ -34,12 +42,8 @@ async def get_user_or_session(
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header.split(" ")[1]
         try:
-            payload = decode_token(token)
-            email = payload.get("sub")
-            if email:
-                res = await db.execute(select(User).where(User.email == email))
-                user = res.scalar_one_or_none()
-        except Exception:
+            user = await resolve_request_user(request, db, token)
+        except HTTPException:
             pass
             
     return user, x_session_id
@@ -142,11 +146,18 @@ async def add_item_to_cart(
     request: Request,
     payload: CartItemCreate,
     db: SessionDep,
-    x_session_id: Optional[str] = Header(None)
+    x_session_id: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER)
 ):
     user, session_id = await get_user_or_session(request, db, x_session_id)
     cart = await get_or_create_cart_helper(db, user, session_id)
 
+    idempotency_scope = f"cart:{cart.id}"
+    if idempotency_key:
+        replay = await claim_idempotency_key(db, idempotency_scope, idempotency_key, payload)
+        if replay is not None:
+            return replay
+
     wine = await db.get(Wine, payload.wine_id)
     if not wine:
         raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
@@ -167,8 +178,12 @@ async def add_item_to_cart(
         )
         db.add(new_item)
 
+    response = {"message": "Đã thêm vào giỏ hàng"}
+    if idempotency_key:
+        await save_idempotent_response(db, idempotency_scope, idempotency_key, response)
+
     await db.commit()
-    return {"message": "Đã thêm vào giỏ hàng"}
+    return response
 
 
 @cart_router.delete("/items/{wine_id}")
@@ -200,13 +215,22 @@ async def remove_item_from_cart(
 async def create_order(
     payload: OrderCreate,
     db: SessionDep,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER)
 ):
     cart = await get_or_create_cart_helper(db, current_user, None)
+
+    # Retry cùng Idempotency-Key: trả lại đơn đã tạo, không khóa kho / tạo đơn lần nữa
+    idempotency_scope = f"order:{current_user.id}"
+    if idempotency_key:
+        replay = await claim_idempotency_key(db, idempotency_scope, idempotency_key, payload)
+        if replay is not None:
+            return replay
     
     if not cart.items:
         raise HTTPException(status_code=400, detail="Giỏ hàng trống")
     
+    started = time.perf_counter()
     try:
         # 1. Tính tổng tiền hàng
         items_total = sum(item.quantity * item.price_at_add for item in cart.items)
@@ -243,79 +267,98 @@ async def create_order(
         db.add(new_order)
         await db.flush()
 
-        # 5. Xử lý kho & Order Items
+        # 5. Xuất kho (FIFO theo lô) & Order Items
+        # Mỗi vang chỉ có 1 dòng trong giỏ (add/merge đều cộng dồn vào dòng cũ)
+        try:
+            allocations = await allocate_stock(
+                db, {item.wine_id: item.quantity for item in cart.items}
+            )
+        except InsufficientStock as e:
+            wine_name = next(item.wine.name for item in cart.items if item.wine_id == e.wine_id)
+            raise InsufficientStock(e.wine_id, e.available, wine_name)
+
         for item in cart.items:
-            stmt = select(Inventory).where(
-                Inventory.wine_id == item.wine_id,
-                Inventory.quantity_available > 0
-            ).order_by(Inventory.import_date).with_for_update()
-            
-            result = await db.execute(stmt)
-            available_batches = result.scalars().all()
-            
-            current_stock = sum(batch.quantity_available for batch in available_batches)
-            
-            if current_stock < item.quantity:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Sản phẩm {item.wine.name} không đủ hàng (Còn: {current_stock})"
-                )
-
-            qty_needed = item.quantity
-            for batch in available_batches:
-                if qty_needed <= 0: break
-                deduct = min(batch.quantity_available, qty_needed)
-                batch.quantity_available -= deduct
-                qty_needed -= deduct
-                db.add(batch)
-
-            # Tạo OrderItem
             order_item = OrderItem(
                 order_id=new_order.id,
                 wine_id=item.wine_id,
                 quantity=item.quantity,
-                price_at_purchase=item.price_at_add
+                price_at_purchase=item.price_at_add,
+                wine_name=item.wine.name,
+                wine_slug=item.wine.slug,
+                wine_thumbnail=item.wine.thumbnail,
+                allocations=[
+                    OrderItemAllocation(inventory_id=allocation.inventory_id, quantity=allocation.quantity)
+                    for allocation in allocations[item.wine_id]
+                ]
             )
             db.add(order_item)
 
         # 6. Xóa cart
+        ordered_wine_ids = [item.wine_id for item in cart.items]
         for item in cart.items:
             await db.delete(item)
 
+        await db.flush()
+
+        query = select(Order).options(
+            selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.images),
+            selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.category),
+            selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.winery).selectinload(Winery.region)
+        ).where(Order.id == new_order.id).execution_options(populate_existing=True)
+
+        result = await db.execute(query)
+        order_response = OrderResponse.model_validate(result.scalar_one())
+
+        if idempotency_key:
+            await save_idempotent_response(db, idempotency_scope, idempotency_key, order_response)
+
+        # Khóa shard bộ đếm dashboard sau cùng, ngay trước commit: giữ khóa ngắn nhất có thể
+        await record_order_created(db, new_order)
         await db.commit()
-        await db.refresh(new_order)
+        await invalidate_wine_details(*ordered_wine_ids)
 
+    except InsufficientStock:
+        ORDER_CREATE_DURATION.labels("insufficient_stock").observe(time.perf_counter() - started)
+        raise
     except HTTPException as http_ex:
+        ORDER_CREATE_DURATION.labels("rejected").observe(time.perf_counter() - started)
         raise http_ex
     except Exception as e:
+        ORDER_CREATE_DURATION.labels("error").observe(time.perf_counter() - started)
         print(f"Error creating order: {e}")
         raise HTTPException(status_code=500, detail="Lỗi hệ thống khi tạo đơn hàng")
 
-    query = select(Order).options(
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.images),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.category),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.reviews),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.winery).selectinload(Winery.region)
-    ).where(Order.id == new_order.id)
-
-    result = await db.execute(query)
-    return result.scalar_one()
+    ORDER_CREATE_DURATION.labels("success").observe(time.perf_counter() - started)
+    ORDERS_CREATED.inc()
+    return order_response
 
 
-@cart_router.get("/orders", response_model=List[OrderResponse])
+@cart_router.get("/orders", response_model=List[OrderHistoryResponse])
 async def get_my_orders(
     db: SessionDep,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    query = select(Order).options(
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.images),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.category),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.reviews),
-        selectinload(Order.items).selectinload(OrderItem.wine).selectinload(Wine.winery).selectinload(Winery.region)
-    ).where(Order.user_id == current_user.id).order_by(Order.created_at.desc())
-    
-    result = await db.execute(query)
-    return result.scalars().all()
+    """
+    Lịch sử đơn hàng (mới nhất trước), trang kế tiếp qua header X-Next-Cursor.
+    Dòng sản phẩm đọc từ snapshot trên OrderItem nên không join vào catalog.
+    """
+    query = (
+        select(Order)
+        .options(selectinload(Order.items))
+        .where(Order.user_id == current_user.id)
+    )
+
+    result = await db.execute(apply_order_page(query, cursor, limit))
+    orders = result.scalars().all()
+
+    next_cursor = next_order_cursor(orders, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return orders
 
 
 @cart_router.post("/merge")
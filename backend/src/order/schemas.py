@@ -2,10 +2,11 @@ import re
 
 from typing import List, Optional
 from uuid import UUID
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from decimal import Decimal
 from datetime import datetime
 
+from src.media.variants import ImageVariant, image_variant_url
 from src.product.schemas import WineListResponse
 
 
@@ -81,6 +82,81 @@ class OrderResponse(BaseModel):
         from_attributes = True
 
 
+class OrderLineWine(BaseModel):
+    id: UUID
+    name: Optional[str] = None
+    slug: Optional[str] = None
+    price: float
+    thumbnail: Optional[str] = None
+
+    @field_validator('thumbnail', mode='before')
+    @classmethod
+    def sign_thumbnail(cls, v):
+        return image_variant_url(v, ImageVariant.THUMB)
+
+
+class OrderHistoryItemResponse(BaseModel):
+    id: UUID
+    wine: OrderLineWine = Field(validation_alias="wine_snapshot")
+    quantity: int
+    price_at_purchase: float
+
+    class Config:
+        from_attributes = True
+
+
+class OrderHistoryResponse(BaseModel):
+    """Lịch sử đơn của khách: thông tin đơn + snapshot từng dòng, không đọc catalog."""
+    id: UUID
+    status: str
+    total_amount: float
+
+    delivery_mode: str
+    delivery_cost: float
+
+    discount_amount: Optional[float] = 0.0
+
+    payment_method: str
+    shipping_address: str
+    phone_number: str
+    note: Optional[str] = None
+    created_at: datetime
+
+    items: List[OrderHistoryItemResponse] = []
+
+    @field_validator('discount_amount', mode='before')
+    def set_default_discount(cls, v):
+        return v or 0.0
+
+    class Config:
+        from_attributes = True
+
+
+class AdminOrderSummary(BaseModel):
+    """Một dòng trong danh sách đơn của admin: chỉ thông tin đơn, không kèm sản phẩm."""
+    id: UUID
+    user_id: UUID
+    customer_email: Optional[str] = None
+    status: str
+    total_amount: float
+    discount_amount: Optional[float] = 0.0
+
+    delivery_mode: str
+    payment_method: str
+    shipping_address: str
+    phone_number: str
+    created_at: datetime
+
+    item_count: int = 0
+
+    @field_validator('discount_amount', mode='before')
+    def set_default_discount(cls, v):
+        return v or 0.0
+
+    class Config:
+        from_attributes = True
+
+
 class OrderSimulateResponse(BaseModel):
     items_total: float
     shipping_fee: float
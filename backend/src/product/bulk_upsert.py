@@ -0,0 +1,294 @@
+import json
+from collections import defaultdict
+from itertools import batched
+from typing import AsyncIterator, Sequence
+
+from loguru import logger
+from pydantic import ValidationError
+from slugify import slugify
+from sqlalchemy import delete, func, insert, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import SessionLocal
+from src.inventory.bulk_import import validation_detail
+from src.product.cache import invalidate_wine_details, master_data_cache
+from src.product.models import Category, GrapeVariety, Wine, WineGrape, WineImage, Winery
+from src.product.schemas import WineBulkItem
+from src.utils.datetime_util import time_now
+
+WINE_BULK_CHUNK_SIZE = 500
+WINE_BULK_MAX_ROWS = 20000
+
+# Cột được ghi đè khi cập nhật vang đã có (không đụng tới tồn kho / đánh giá)
+_WINE_FIELDS = ["name", "description", "price", "alcohol_percentage", "volume", "vintage", "is_active", "category_id", "winery_id"]
+# Trường trong WineBulkItem -> cột của wine_info
+_FIELD_COLUMNS = {"category": "category_id", "winery": "winery_id"}
+
+
+def _updated_fields(item: WineBulkItem) -> tuple[str, ...]:
+    """Cột được ghi đè khi cập nhật: chỉ các trường có trong dòng, trường bỏ trống giữ nguyên."""
+    provided = {_FIELD_COLUMNS.get(field, field) for field in item.model_fields_set}
+    return tuple(field for field in _WINE_FIELDS if field in provided)
+
+
+class _ImportState:
+    """Trạng thái dùng chung giữa các chunk của một lần import."""
+
+    def __init__(self):
+        self.taken_slugs: set[str] = set() # Slug đã dùng trong file (tránh sinh trùng giữa các chunk)
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.grapes_created = False
+
+
+def _row_error(row: int, name, detail: str) -> dict:
+    return {"row": row, "name": name, "detail": detail}
+
+
+async def _resolve_categories(db: AsyncSession, keys: set[str]) -> dict[str, object]:
+    """Tên (không phân biệt hoa thường) hoặc slug -> category id."""
+    if not keys:
+        return {}
+    lowered = {key.lower() for key in keys}
+    result = await db.execute(
+        select(Category.id, Category.name, Category.slug)
+        .where(or_(func.lower(Category.name).in_(lowered), Category.slug.in_(keys)))
+    )
+    resolved = {}
+    for row in result:
+        resolved[row.name.lower()] = row.id
+        if row.slug:
+            resolved[row.slug] = row.id
+    return resolved
+
+
+async def _resolve_wineries(db: AsyncSession, names: set[str]) -> dict[str, object | None]:
+    """Tên nhà sản xuất (không phân biệt hoa thường) -> id; None nếu có nhiều nhà cùng tên."""
+    if not names:
+        return {}
+    result = await db.execute(
+        select(Winery.id, func.lower(Winery.name).label("key"))
+        .where(func.lower(Winery.name).in_({name.lower() for name in names}))
+    )
+    resolved = {}
+    for row in result:
+        resolved[row.key] = None if row.key in resolved else row.id
+    return resolved
+
+
+async def _resolve_grapes(db: AsyncSession, names: set[str], state: _ImportState) -> dict[str, object]:
+    """Tên giống nho -> id; giống nho chưa có được tạo mới (1 câu INSERT ... ON CONFLICT DO NOTHING)."""
+    if not names:
+        return {}
+    created = await db.execute(
+        pg_insert(GrapeVariety)
+        .values([{"name": name} for name in sorted(names)])
+        .on_conflict_do_nothing(index_elements=[GrapeVariety.name])
+        .returning(GrapeVariety.id)
+    )
+    if created.first():
+        state.grapes_created = True
+    result = await db.execute(select(GrapeVariety.id, GrapeVariety.name).where(GrapeVariety.name.in_(names)))
+    return {row.name: row.id for row in result}
+
+
+async def _generate_slugs(db: AsyncSession, items: list[WineBulkItem], state: _ImportState) -> list[str]:
+    """Sinh slug duy nhất cho các vang mới trong 1 lần đọc: base, base-2, base-3..."""
+    if not items:
+        return []
+    bases = [slugify(item.name) or "wine" for item in items]
+    unique_bases = set(bases)
+    # slug = base hoặc bắt đầu bằng "base-" (dùng được index của slug); hậu tố số lọc lại ở dưới
+    result = await db.execute(
+        select(Wine.slug).where(
+            or_(Wine.slug.in_(unique_bases), *(Wine.slug.startswith(f"{base}-", autoescape=True) for base in unique_bases))
+        )
+    )
+    taken = set(state.taken_slugs)
+    for slug in result.scalars():
+        base, _, suffix = slug.rpartition("-")
+        if slug in unique_bases or (base in unique_bases and suffix.isdigit()):
+            taken.add(slug)
+
+    slugs = []
+    for base in bases:
+        slug, suffix = base, 1
+        while slug in taken:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        taken.add(slug)
+        state.taken_slugs.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+async def _upsert_chunk(
+    db: AsyncSession,
+    chunk: Sequence[tuple[int, object]],
+    state: _ImportState
+) -> list[dict]:
+    errors = []
+
+    # 1. Validate từng dòng
+    items: list[tuple[int, WineBulkItem]] = []
+    for row, record in chunk:
+        try:
+            items.append((row, WineBulkItem.model_validate(record)))
+        except ValidationError as e:
+            name = record.get("name") if isinstance(record, dict) else None
+            errors.append(_row_error(row, name, validation_detail(e)))
+
+    # 2. Tra cứu danh mục / nhà sản xuất theo tập hợp
+    categories = await _resolve_categories(db, {item.category for _, item in items if item.category})
+    wineries = await _resolve_wineries(db, {item.winery for _, item in items if item.winery})
+
+    valid: list[tuple[int, WineBulkItem, dict]] = []
+    for row, item in items:
+        category_id = winery_id = None
+        if item.category:
+            category_id = categories.get(item.category.lower()) or categories.get(item.category)
+            if not category_id:
+                errors.append(_row_error(row, item.name, f"Không tìm thấy danh mục '{item.category}'"))
+                continue
+        if item.winery:
+            winery_id = wineries.get(item.winery.lower())
+            if not winery_id:
+                detail = "không tồn tại" if item.winery.lower() not in wineries else "bị trùng tên, cần đặt tên riêng"
+                errors.append(_row_error(row, item.name, f"Nhà sản xuất '{item.winery}' {detail}"))
+                continue
+        values = item.model_dump(include=set(_WINE_FIELDS) - {"category_id", "winery_id"})
+        values.update(category_id=category_id, winery_id=winery_id)
+        valid.append((row, item, values))
+
+    # 3. Slug: có sẵn -> upsert theo slug; chưa có -> sinh mới trong 1 lần đọc
+    explicit, generated = [], []
+    chunk_slugs = set()
+    for row, item, values in valid:
+        if item.slug:
+            if item.slug in chunk_slugs:
+                errors.append(_row_error(row, item.name, f"Slug '{item.slug}' bị trùng trong file"))
+                continue
+            chunk_slugs.add(item.slug)
+            state.taken_slugs.add(item.slug)
+            explicit.append((row, item, {**values, "slug": item.slug}))
+        else:
+            generated.append((row, item, values))
+    for (row, item, values), slug in zip(generated, await _generate_slugs(db, [item for _, item, _ in generated], state)):
+        values["slug"] = slug
+
+    now = time_now()
+    wine_ids: dict[str, object] = {}
+
+    # SET của ON CONFLICT áp dụng cho cả câu lệnh -> gom các dòng gửi cùng tập trường
+    explicit_groups = defaultdict(list)
+    for _, item, values in explicit:
+        explicit_groups[_updated_fields(item)].append({**values, "created_at": now, "updated_at": now})
+
+    for fields, rows in explicit_groups.items():
+        stmt = pg_insert(Wine).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Wine.slug],
+            set_={**{field: stmt.excluded[field] for field in fields}, "updated_at": now},
+        ).returning(Wine.id, Wine.slug, literal_column("xmax = 0").label("inserted"))
+        for wine in await db.execute(stmt):
+            wine_ids[wine.slug] = wine.id
+            if wine.inserted:
+                state.created += 1
+            else:
+                state.updated += 1
+
+    if generated:
+        # DO NOTHING: slug vừa bị request khác chiếm thì báo lỗi chứ không ghi đè vang của họ
+        stmt = pg_insert(Wine).values([{**values, "created_at": now, "updated_at": now} for _, _, values in generated])
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Wine.slug]).returning(Wine.id, Wine.slug)
+        for wine in await db.execute(stmt):
+            wine_ids[wine.slug] = wine.id
+            state.created += 1
+        for row, item, values in generated:
+            if values["slug"] not in wine_ids:
+                errors.append(_row_error(row, item.name, f"Slug '{values['slug']}' vừa được tạo bởi thao tác khác, hãy thử lại"))
+
+    # 4. Thay toàn bộ ảnh / giống nho của các vang có gửi trường tương ứng
+    written = [(item, wine_ids[values["slug"]]) for _, item, values in explicit + generated if values["slug"] in wine_ids]
+
+    image_wines = [wine_id for item, wine_id in written if item.images is not None]
+    if image_wines:
+        await db.execute(delete(WineImage).where(WineImage.wine_id.in_(image_wines)))
+        image_rows = [
+            {"wine_id": wine_id, "image_url": url, "is_thumbnail": index == 0}
+            for item, wine_id in written if item.images
+            for index, url in enumerate(item.images)
+        ]
+        if image_rows:
+            await db.execute(insert(WineImage), image_rows)
+
+    grape_wines = [wine_id for item, wine_id in written if item.grapes is not None]
+    if grape_wines:
+        # Chỉ tạo giống nho cho các vang đã ghi: dòng lỗi không để lại giống nho thừa
+        grapes = await _resolve_grapes(db, {grape.name for item, _ in written for grape in item.grapes or []}, state)
+        await db.execute(delete(WineGrape).where(WineGrape.wine_id.in_(grape_wines)))
+        grape_rows = {}
+        for item, wine_id in written:
+            for grape in item.grapes or []:
+                # Khóa chính (wine_id, grape_variety_id): giống nho lặp lại thì lấy dòng sau
+                grape_rows[(wine_id, grapes[grape.name])] = {
+                    "wine_id": wine_id,
+                    "grape_variety_id": grapes[grape.name],
+                    "percentage": grape.percentage,
+                    "order": grape.order,
+                }
+        if grape_rows:
+            await db.execute(insert(WineGrape), list(grape_rows.values()))
+
+    await db.commit()
+    state.failed += len(errors)
+    return sorted(errors, key=lambda error: error["row"])
+
+
+async def stream_wine_bulk_upsert(records: list) -> AsyncIterator[bytes]:
+    """
+    Nhập / cập nhật catalog theo chunk WINE_BULK_CHUNK_SIZE dòng, mỗi chunk commit riêng.
+    Sau mỗi chunk gửi 1 dòng NDJSON tiến độ (kèm lỗi của chunk), cuối cùng là dòng "done".
+    """
+    state = _ImportState()
+    processed = 0
+
+    async with SessionLocal() as db:
+        for chunk in batched(enumerate(records, start=1), WINE_BULK_CHUNK_SIZE):
+            try:
+                errors = await _upsert_chunk(db, chunk, state)
+            except Exception as e:
+                # Các chunk trước đã commit; báo lỗi cho client thay vì cắt ngang stream
+                await db.rollback()
+                logger.exception(f"Bulk wine upsert failed at row {chunk[0][0]}: {e}")
+                yield (json.dumps({
+                    "event": "error",
+                    "processed": processed,
+                    "detail": f"Lỗi hệ thống khi xử lý từ dòng {chunk[0][0]}, các dòng trước đó đã được lưu",
+                }, ensure_ascii=False) + "\n").encode("utf-8")
+                break
+            processed += len(chunk)
+            yield (json.dumps({
+                "event": "progress",
+                "processed": processed,
+                "total": len(records),
+                "created": state.created,
+                "updated": state.updated,
+                "failed": state.failed,
+                "errors": errors,
+            }, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+    if state.updated:
+        await invalidate_wine_details()
+    if state.grapes_created:
+        await master_data_cache.invalidate()
+
+    yield (json.dumps({
+        "event": "done",
+        "processed": processed,
+        "created": state.created,
+        "updated": state.updated,
+        "failed": state.failed,
+    }) + "\n").encode("utf-8")
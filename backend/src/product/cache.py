@@ -0,0 +1,27 @@
+from src.core.cache import ResponseCache, cache_backend
+from src.core.config import settings
+from src.core.constants import RedisNamespaces
+
+
+# Danh mục, vùng, nhà sản xuất, giống nho: chỉ thay đổi khi staff gọi các API POST tương ứng
+master_data_cache = ResponseCache(
+    cache_backend,
+    namespace=f"{RedisNamespaces.CATALOG}master:",
+    ttl=settings.CATALOG_CACHE_TTL,
+)
+
+# Chi tiết từng vang (key = wine id); bị xóa khi sản phẩm, tồn kho hoặc khuyến mãi thay đổi
+wine_detail_cache = ResponseCache(
+    cache_backend,
+    namespace=f"{RedisNamespaces.CATALOG}wine:",
+    ttl=settings.WINE_DETAIL_CACHE_TTL,
+)
+
+
+async def invalidate_wine_details(*wine_ids):
+    """Xóa cache chi tiết của các vang chỉ định, hoặc toàn bộ nếu không truyền id."""
+    if not wine_ids:
+        await wine_detail_cache.invalidate()
+        return
+    for wine_id in wine_ids:
+        await wine_detail_cache.invalidate(str(wine_id))
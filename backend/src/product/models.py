@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Text, DECIMAL, DateTime
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Text, DECIMAL, DateTime, Index, Computed, func, text
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 
 from src.core.base_model import Base
 
@@ -59,6 +59,15 @@ class WineGrape(Base):
 
 class Wine(Base):
     __tablename__ = "wine_info"
+    __table_args__ = (
+        # Index cho phân trang keyset của GET /products/wines (chỉ vang đang bán)
+        Index("wine_info_active_created_at_id_idx", "created_at", "id", postgresql_where=text("is_active = true")),
+        Index("wine_info_active_price_id_idx", "price", "id", postgresql_where=text("is_active = true")),
+        Index("wine_info_active_name_id_idx", "name", "id", postgresql_where=text("is_active = true")),
+        Index("wine_info_search_vector_idx", "search_vector", postgresql_using="gin"),
+        # slug LIKE 'base-%' khi sinh slug mới (src/product/bulk_upsert.py), không phụ thuộc collation
+        Index("wine_info_slug_pattern_idx", "slug", postgresql_ops={"slug": "varchar_pattern_ops"}),
+    )
 
     name = Column(String(255), nullable=False, index=True)
     slug = Column(String(255), unique=True, index=True)
@@ -72,6 +81,22 @@ class Wine(Base):
     price = Column(DECIMAL(12, 2), nullable=False, default=0)
     is_active = Column(Boolean, default=True)
 
+    # Full-text search không dấu (xem src/product/search.py), Postgres tự tính lại khi ghi
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', immutable_unaccent(coalesce(name, ''))), 'A') || "
+            "setweight(to_tsvector('simple', immutable_unaccent(replace(coalesce(slug, ''), '-', ' '))), 'B') || "
+            "setweight(to_tsvector('simple', immutable_unaccent(coalesce(description, ''))), 'C')",
+            persisted=True,
+        ),
+    ))
+
+    # Tổng hợp đánh giá, cập nhật cùng transaction với review mới (xem rating_service)
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    average_rating = Column(DECIMAL(2, 1), nullable=False, default=0, server_default="0")
+
     # Foreign Keys
     category_id = Column(UUID(as_uuid=True), ForeignKey("category.id"), nullable=True)
     winery_id = Column(UUID(as_uuid=True), ForeignKey("wineries.id"), nullable=True)
@@ -84,6 +109,7 @@ class Wine(Base):
     
     images = relationship("WineImage", back_populates="wine", cascade="all, delete-orphan")
     inventory_items = relationship("Inventory", back_populates="wine")
+    stock = relationship("WineStock", back_populates="wine", uselist=False)
     reviews = relationship("ProductReview", back_populates="wine")
 
     @property
@@ -106,23 +132,21 @@ class Wine(Base):
     @property
     def wine_type(self):
         return self.category.name if self.category else None
-    
-    @property
-    def average_rating(self):
-        if not self.reviews:
-            return 0
-        total = sum(r.rating for r in self.reviews)
-        return round(total / len(self.reviews), 1)
 
-    @property
-    def review_count(self):
-        return len(self.reviews) if self.reviews else 0
+# Trigram trên tên không dấu (toán tử %> trong src/product/search.py). Index theo biểu thức
+# nên khai báo sau class, khi đã có cột Wine.name
+Index(
+    "wine_info_name_trgm_idx",
+    func.immutable_unaccent(func.lower(Wine.name)).label("name_unaccent"),
+    postgresql_using="gin",
+    postgresql_ops={"name_unaccent": "gin_trgm_ops"},
+)
 
 
 class WineImage(Base):
     __tablename__ = "wine_images"
 
-    wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False)
+    wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False, index=True)
     image_url = Column(Text, nullable=False)
     alt_text = Column(String(255), nullable=True)
     is_thumbnail = Column(Boolean, default=False)
@@ -132,6 +156,10 @@ class WineImage(Base):
 
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (
+        # Xuất kho FIFO: các lô của vang theo ngày nhập (xem src/order/allocation.py)
+        Index("inventory_wine_id_import_date_idx", "wine_id", "import_date", "id"),
+    )
 
     wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False)
     
@@ -146,8 +174,28 @@ class Inventory(Base):
     
     wine = relationship("Wine", back_populates="inventory_items")
 
+class WineStock(Base):
+    """
+    Tổng tồn kho của một vang (= SUM inventory.quantity_available), được cập nhật
+    cùng transaction với nhập kho / điều chỉnh / xuất kho (xem src/inventory/stock_service.py).
+    """
+    __tablename__ = "wine_stock"
+    __table_args__ = (
+        # Cảnh báo kho thấp trên dashboard admin chỉ đọc phần nhỏ này
+        Index("wine_stock_low_stock_idx", "quantity_available", postgresql_where=text("quantity_available < 10")),
+    )
+
+    wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False, unique=True)
+    quantity_available = Column(Integer, nullable=False, default=0, server_default="0")
+
+    wine = relationship("Wine", back_populates="stock")
+
 class Promotion(Base):
     __tablename__ = "promotions"
+    __table_args__ = (
+        # Khuyến mãi đang chạy (discount_service): lọc theo khoảng thời gian
+        Index("promotions_active_window_idx", "start_date", "end_date", postgresql_where=text("is_active = true")),
+    )
     
     name = Column(String(255), nullable=False)
     code = Column(String(50), unique=True, nullable=True)
@@ -165,6 +213,9 @@ class Promotion(Base):
 
 class ProductReview(Base):
     __tablename__ = "product_reviews"
+    __table_args__ = (
+        Index("product_reviews_wine_id_created_at_idx", "wine_id", "created_at"),
+    )
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=False)
     wine_id = Column(UUID(as_uuid=True), ForeignKey("wine_info.id"), nullable=False)
@@ -0,0 +1,64 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from uuid import UUID
+
+from sqlalchemy import asc, desc, tuple_
+from sqlalchemy.sql import Select
+
+from src.core.exceptions import InvalidCursor
+from src.product.models import Wine
+from src.utils.cursor import decode_cursor, encode_cursor
+
+
+# sort_by -> (cột sắp xếp, chiều, hàm parse giá trị từ cursor)
+# Wine.id luôn là khóa phụ cùng chiều để thứ tự ổn định khi trùng giá trị.
+WINE_KEYSET_SORTS = {
+    "newest": (Wine.created_at, desc, datetime.fromisoformat),
+    "price_asc": (Wine.price, asc, Decimal),
+    "price_desc": (Wine.price, desc, Decimal),
+    "name_asc": (Wine.name, asc, str),
+}
+DEFAULT_WINE_SORT = "newest"
+
+
+def apply_wine_sort(query: Select, sort_by: str | None, cursor: str | None = None) -> Select:
+    """
+    Sắp xếp danh sách vang theo sort_by (kèm Wine.id làm tiebreaker).
+    Nếu có cursor thì lọc theo keyset thay vì OFFSET, nên chi phí mỗi trang là như nhau.
+    """
+    column, direction, parse = WINE_KEYSET_SORTS.get(sort_by, WINE_KEYSET_SORTS[DEFAULT_WINE_SORT])
+    query = query.order_by(direction(column), direction(Wine.id))
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != (sort_by if sort_by in WINE_KEYSET_SORTS else DEFAULT_WINE_SORT):
+            raise InvalidCursor()
+        try:
+            last_value = parse(payload["v"])
+            last_id = UUID(payload["id"])
+        except (KeyError, TypeError, ValueError, AttributeError, InvalidOperation):
+            raise InvalidCursor()
+
+        keyset = tuple_(column, Wine.id)
+        if direction is desc:
+            query = query.where(keyset < tuple_(last_value, last_id))
+        else:
+            query = query.where(keyset > tuple_(last_value, last_id))
+
+    return query
+
+
+def next_wine_cursor(wines: list[Wine], sort_by: str | None, limit: int) -> str | None:
+    """Cursor trỏ tới trang kế tiếp, None khi đã hết dữ liệu."""
+    if not wines or len(wines) < limit:
+        return None
+
+    sort_key = sort_by if sort_by in WINE_KEYSET_SORTS else DEFAULT_WINE_SORT
+    column = WINE_KEYSET_SORTS[sort_key][0]
+    last = wines[-1]
+    value = getattr(last, column.key)
+    return encode_cursor({
+        "s": sort_key,
+        "v": value.isoformat() if isinstance(value, datetime) else str(value),
+        "id": str(last.id),
+    })
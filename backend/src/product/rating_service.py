@@ -0,0 +1,66 @@
+import asyncio
+from uuid import UUID
+
+from sqlalchemy import Numeric, cast, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import SessionLocal
+from src.product.models import ProductReview, Wine
+
+
+async def record_review_rating(db: AsyncSession, wine_id: UUID, rating: int):
+    """
+    Cộng review mới vào bảng tổng hợp của Wine.
+    Phải gọi trong cùng transaction với INSERT review; UPDATE dạng
+    col = col + x nên các review đồng thời không ghi đè lẫn nhau.
+    """
+    stmt = (
+        update(Wine)
+        .where(Wine.id == wine_id)
+        .values(
+            review_count=Wine.review_count + 1,
+            rating_sum=Wine.rating_sum + rating,
+            average_rating=func.round(cast(Wine.rating_sum + rating, Numeric) / (Wine.review_count + 1), 1),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def backfill_rating_summaries():
+    """Tính lại review_count / rating_sum / average_rating của mọi Wine từ product_reviews."""
+    async with SessionLocal() as db:
+        print("Rebuilding wine rating summaries ...")
+
+        stats = (
+            select(
+                ProductReview.wine_id,
+                func.count(ProductReview.id).label("review_count"),
+                func.sum(ProductReview.rating).label("rating_sum"),
+            )
+            .group_by(ProductReview.wine_id)
+            .subquery()
+        )
+
+        await db.execute(
+            update(Wine)
+            .values(review_count=0, rating_sum=0, average_rating=0)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(
+            update(Wine)
+            .where(Wine.id == stats.c.wine_id)
+            .values(
+                review_count=stats.c.review_count,
+                rating_sum=stats.c.rating_sum,
+                average_rating=func.round(cast(stats.c.rating_sum, Numeric) / stats.c.review_count, 1),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        print(f"Updated {result.rowcount} wines with reviews.")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_rating_summaries())
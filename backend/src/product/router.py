@@ -2,19 +2,23 @@ from typing import List, Optional
 from datetime import datetime, timezone
 from slugify import slugify
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import func, asc, desc, or_
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import func
 
 from src.auth.dependencies import allow_staff, get_current_user
 from src.user.models import User
+from src.core.constants import NEXT_CURSOR_HEADER
 from src.core.database import SessionDep
 from src.product.models import (
     Wine, 
     Category,
     WineImage, 
     Inventory, 
+    WineStock,
     Region, 
     Winery, 
     GrapeVariety, 
@@ -42,20 +46,35 @@ from src.product.schemas import (
     ReviewCreate,
     ReviewResponse
 )
+from src.product.cache import invalidate_wine_details, master_data_cache, wine_detail_cache
+from src.product.pagination import apply_wine_sort, next_wine_cursor
+from src.product.rating_service import record_review_rating
+from src.product.search import apply_wine_search
+from src.product.bulk_upsert import WINE_BULK_MAX_ROWS, stream_wine_bulk_upsert
+from src.inventory.stock_service import apply_stock_changes
 
 product_router = APIRouter(
     prefix="/products",
     tags=["Products"]
 )
 
+category_list_adapter = TypeAdapter(List[CategoryBase])
+region_list_adapter = TypeAdapter(List[RegionBase])
+winery_list_adapter = TypeAdapter(List[WineryBase])
+grape_list_adapter = TypeAdapter(List[GrapeVarietyBase])
+wine_detail_adapter = TypeAdapter(WineDetailResponse)
+
 # ---------------------------------------------------------
 # 1. HELPERS / MASTER DATA (Region, Winery, Grapes, Category)
 # ---------------------------------------------------------
 
 @product_router.get("/categories", response_model=List[CategoryBase])
-async def get_categories(db: SessionDep):
-    result = await db.execute(select(Category))
-    return result.scalars().all()
+async def get_categories(request: Request, db: SessionDep):
+    async def load():
+        result = await db.execute(select(Category))
+        return result.scalars().all()
+
+    return await master_data_cache.respond(request, "categories", load, category_list_adapter)
 
 @product_router.post("/categories", response_model=CategoryBase)
 async def create_category(payload: CategoryCreate, db: SessionDep, user: User = Depends(allow_staff)):
@@ -72,12 +91,16 @@ async def create_category(payload: CategoryCreate, db: SessionDep, user: User =
     db.add(new_category)
     await db.commit()
     await db.refresh(new_category)
+    await master_data_cache.invalidate()
     return new_category
 
 @product_router.get("/regions", response_model=List[RegionBase])
-async def get_regions(db: SessionDep):
-    result = await db.execute(select(Region))
-    return result.scalars().all()
+async def get_regions(request: Request, db: SessionDep):
+    async def load():
+        result = await db.execute(select(Region))
+        return result.scalars().all()
+
+    return await master_data_cache.respond(request, "regions", load, region_list_adapter)
 
 @product_router.post("/regions", response_model=RegionBase)
 async def create_region(payload: RegionCreate, db: SessionDep, user: User = Depends(allow_staff)):
@@ -89,15 +112,20 @@ async def create_region(payload: RegionCreate, db: SessionDep, user: User = Depe
     db.add(new_region)
     await db.commit()
     await db.refresh(new_region)
+    await master_data_cache.invalidate()
     return new_region
 
 @product_router.get("/wineries", response_model=List[WineryBase])
-async def get_wineries(db: SessionDep, region_id: Optional[UUID] = None):
-    query = select(Winery).options(selectinload(Winery.region))
-    if region_id:
-        query = query.where(Winery.region_id == region_id)
-    result = await db.execute(query)
-    return result.scalars().all()
+async def get_wineries(request: Request, db: SessionDep, region_id: Optional[UUID] = None):
+    async def load():
+        query = select(Winery).options(selectinload(Winery.region))
+        if region_id:
+            query = query.where(Winery.region_id == region_id)
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    cache_key = f"wineries:{region_id or 'all'}"
+    return await master_data_cache.respond(request, cache_key, load, winery_list_adapter)
 
 @product_router.post("/wineries", response_model=WineryBase)
 async def create_winery(payload: WineryCreate, db: SessionDep, user: User = Depends(allow_staff)):
@@ -110,15 +138,19 @@ async def create_winery(payload: WineryCreate, db: SessionDep, user: User = Depe
     db.add(new_winery)
     await db.commit()
     await db.refresh(new_winery)
+    await master_data_cache.invalidate()
     
     query = select(Winery).options(selectinload(Winery.region)).where(Winery.id == new_winery.id)
     result = await db.execute(query)
     return result.scalar_one()
 
 @product_router.get("/grapes", response_model=List[GrapeVarietyBase])
-async def get_grapes(db: SessionDep):
-    result = await db.execute(select(GrapeVariety))
-    return result.scalars().all()
+async def get_grapes(request: Request, db: SessionDep):
+    async def load():
+        result = await db.execute(select(GrapeVariety))
+        return result.scalars().all()
+
+    return await master_data_cache.respond(request, "grapes", load, grape_list_adapter)
 
 @product_router.post("/grapes", response_model=GrapeVarietyBase)
 async def create_grape(
@@ -134,6 +166,7 @@ async def create_grape(
     db.add(new_grape)
     await db.commit()
     await db.refresh(new_grape)
+    await master_data_cache.invalidate()
     return new_grape
 
 # ---------------------------------------------------------
@@ -143,26 +176,23 @@ async def create_grape(
 @product_router.get("/wines", response_model=List[WineListResponse])
 async def get_wines(
     db: SessionDep,
+    response: Response,
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
     category_id: Optional[UUID] = None,
     wine_type: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    sort_by: Optional[str] = "newest",
+    sort_by: Optional[str] = None,
     search: Optional[str] = None
 ):
     query = select(Wine).where(Wine.is_active == True)
 
+    # Khi tìm kiếm mà không chọn kiểu sắp xếp (hoặc sort_by=relevance) -> xếp theo độ liên quan
+    rank_by_relevance = bool(search) and sort_by in (None, "relevance")
     if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                Wine.name.ilike(search_term),
-                Wine.slug.ilike(search_term),
-                Wine.description.ilike(search_term)
-            )
-        )
+        query = apply_wine_search(query, search, order_by_rank=rank_by_relevance)
 
     if category_id:
         query = query.where(Wine.category_id == category_id)
@@ -175,47 +205,56 @@ async def get_wines(
     if max_price is not None:
         query = query.where(Wine.price <= max_price)
     
-    if sort_by == "price_asc":
-        query = query.order_by(asc(Wine.price))
-    elif sort_by == "price_desc":
-        query = query.order_by(desc(Wine.price))
-    elif sort_by == "name_asc":
-        query = query.order_by(asc(Wine.name))
+    # Có cursor -> phân trang keyset, bỏ qua skip (không áp dụng cho sắp xếp theo độ liên quan)
+    if rank_by_relevance:
+        query = query.offset(skip)
     else:
-        query = query.order_by(desc(Wine.created_at))
-
-    query = query.offset(skip).limit(limit)
+        query = apply_wine_sort(query, sort_by, cursor)
+        if not cursor:
+            query = query.offset(skip)
+    query = query.limit(limit)
 
     query = query.options(
         selectinload(Wine.images),
         selectinload(Wine.category),
-        selectinload(Wine.reviews),
         selectinload(Wine.winery).selectinload(Winery.region)
     )
 
     result = await db.execute(query)
     wines = result.scalars().all()
 
+    next_cursor = None if rank_by_relevance else next_wine_cursor(wines, sort_by, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
     return wines
 
 
-@product_router.get("/wines/{wine_id}", response_model=WineDetailResponse)
-async def get_wine_detail(wine_id: UUID, db: SessionDep):
-    query = select(Wine).options(
-        selectinload(Wine.category),
-        selectinload(Wine.images),
-        selectinload(Wine.inventory_items),
-        selectinload(Wine.winery).selectinload(Winery.region),
-        selectinload(Wine.grape_composition).selectinload(WineGrape.grape_variety)
-    ).where(Wine.id == wine_id)
+async def load_wine_detail(db: SessionDep, wine_id: UUID) -> WineDetailResponse:
+    """
+    Đọc chi tiết vang trong 1 câu query: quan hệ dùng joinedload,
+    tồn kho lấy từ wine_stock thay vì tải và cộng từng lô hàng.
+    """
+    query = (
+        select(Wine, func.coalesce(WineStock.quantity_available, 0).label("inventory_quantity"))
+        .outerjoin(WineStock, WineStock.wine_id == Wine.id)
+        .options(
+            joinedload(Wine.category),
+            joinedload(Wine.images),
+            joinedload(Wine.winery).joinedload(Winery.region),
+            joinedload(Wine.grape_composition).joinedload(WineGrape.grape_variety)
+        )
+        .where(Wine.id == wine_id)
+        .execution_options(populate_existing=True)
+    )
 
     result = await db.execute(query)
-    wine = result.scalar_one_or_none()
+    row = result.unique().one_or_none()
 
-    if not wine:
+    if not row:
         raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
 
-    total_inventory = sum(item.quantity_available for item in wine.inventory_items)
+    wine, inventory_quantity = row
 
     return WineDetailResponse(
         id=wine.id,
@@ -230,7 +269,17 @@ async def get_wine_detail(wine_id: UUID, db: SessionDep):
         winery=wine.winery,
         grapes=wine.grape_composition,
         images=wine.images,
-        inventory_quantity=total_inventory
+        inventory_quantity=inventory_quantity
+    )
+
+
+@product_router.get("/wines/{wine_id}", response_model=WineDetailResponse)
+async def get_wine_detail(wine_id: UUID, request: Request, db: SessionDep):
+    return await wine_detail_cache.respond(
+        request,
+        str(wine_id),
+        lambda: load_wine_detail(db, wine_id),
+        wine_detail_adapter
     )
 
 
@@ -287,7 +336,22 @@ async def create_wine(
     await db.refresh(new_wine)
     
     # Return detail
-    return await get_wine_detail(new_wine.id, db)
+    return await load_wine_detail(db, new_wine.id)
+
+
+@product_router.post("/wines/bulk")
+async def bulk_upsert_wines(
+    records: List[dict] = Body(...),
+    current_user: User = Depends(allow_staff)
+):
+    """
+    Nhập / cập nhật catalog hàng loạt (mỗi phần tử theo WineBulkItem).
+    Trả về NDJSON: một dòng "progress" sau mỗi chunk (kèm lỗi từng dòng), cuối cùng là "done".
+    """
+    if len(records) > WINE_BULK_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Tối đa {WINE_BULK_MAX_ROWS} sản phẩm mỗi lần nhập")
+
+    return StreamingResponse(stream_wine_bulk_upsert(records), media_type="application/x-ndjson")
 
 
 @product_router.post("/wines/{wine_id}/inventory")
@@ -310,7 +374,9 @@ async def add_inventory(
     )
     
     db.add(new_inventory)
+    await apply_stock_changes(db, {wine.id: payload.quantity})
     await db.commit()
+    await invalidate_wine_details(wine.id)
     
     return {"message": "Đã nhập kho thành công", "added_quantity": payload.quantity}
 
@@ -359,8 +425,9 @@ async def update_wine(
         setattr(wine, key, value)
 
     await db.commit()
+    await invalidate_wine_details(wine.id)
     
-    return await get_wine_detail(wine.id, db)
+    return await load_wine_detail(db, wine.id)
 
 @product_router.delete("/wines/{wine_id}")
 async def delete_wine(
@@ -374,6 +441,7 @@ async def delete_wine(
     
     wine.is_active = False
     await db.commit()
+    await invalidate_wine_details(wine.id)
 
     return {"message": "Sản phẩm đã được ẩn"}
 
@@ -416,6 +484,7 @@ async def create_promotion(
     db.add(new_promo)
     await db.commit()
     await db.refresh(new_promo)
+    await invalidate_wine_details()
     return new_promo
 
 
@@ -431,6 +500,7 @@ async def delete_promotion(
         
     await db.delete(promo)
     await db.commit()
+    await invalidate_wine_details()
     return {"message": "Đã xóa khuyến mãi"}
 
 
@@ -446,6 +516,7 @@ async def toggle_promotion(
     
     promo.is_active = not promo.is_active
     await db.commit()
+    await invalidate_wine_details()
     return {"message": "Đã đổi trạng thái", "is_active": promo.is_active}
 
 # ---------------------------------------------------------
@@ -506,6 +577,7 @@ async def create_review(
     )
     
     db.add(new_review)
+    await record_review_rating(db, wine_id, payload.rating)
     await db.commit()
     await db.refresh(new_review)
     
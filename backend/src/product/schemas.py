@@ -3,7 +3,7 @@ from uuid import UUID
 from datetime import datetime
 from pydantic import BaseModel, Field, field_validator
 
-from src.core.aws import s3_client
+from src.media.variants import ImageVariant, image_variant_url
 
 # --- Base Schemas ---
 class CategoryBase(BaseModel):
@@ -67,14 +67,19 @@ class WineGrapeResponse(BaseModel):
 class WineImageBase(BaseModel):
     id: UUID
     image_url: str
+    # Cùng đọc từ cột image_url, trả về biến thể độ phân giải cao (ảnh cũ: ảnh gốc)
+    zoom_url: str | None = Field(None, validation_alias="image_url")
     is_thumbnail: bool
     
     @field_validator('image_url', mode='before')
     @classmethod
     def sign_image_url(cls, v):
-        if v and isinstance(v, str) and not v.startswith("http"):
-             return s3_client.get_presigned_url(v)
-        return v
+        return image_variant_url(v, ImageVariant.DETAIL)
+
+    @field_validator('zoom_url', mode='before')
+    @classmethod
+    def sign_zoom_url(cls, v):
+        return image_variant_url(v, ImageVariant.ZOOM)
 
     class Config:
         from_attributes = True
@@ -102,9 +107,7 @@ class WineListResponse(BaseModel):
     @field_validator('thumbnail', mode='before')
     @classmethod
     def sign_thumbnail(cls, v):
-        if v and isinstance(v, str) and not v.startswith("http"):
-             return s3_client.get_presigned_url(v)
-        return v
+        return image_variant_url(v, ImageVariant.THUMB)
     
 class WineDetailResponse(BaseModel):
     id: UUID
@@ -162,6 +165,33 @@ class WineUpdate(BaseModel):
     images: Optional[List[str]] = None
     grapes: Optional[List[WineGrapeCreate]] = None
 
+class WineBulkGrape(BaseModel):
+    name: str # Tên giống nho, chưa có thì tự tạo
+    percentage: int | None = None
+    order: int = 0
+
+class WineBulkItem(BaseModel):
+    """
+    Một dòng trong file catalog nhập hàng loạt.
+    Có `slug` -> cập nhật vang có slug đó (chưa có thì tạo mới với slug này),
+    chỉ các trường có trong dòng được ghi đè; không có -> luôn tạo mới, slug sinh từ tên.
+    """
+    slug: Optional[str] = None
+    name: str
+    description: Optional[str] = None
+    price: float
+    alcohol_percentage: Optional[float] = None
+    volume: Optional[int] = None
+    vintage: Optional[int] = None
+    is_active: bool = True
+
+    category: Optional[str] = None # Tên hoặc slug danh mục
+    winery: Optional[str] = None # Tên nhà sản xuất
+
+    # None: giữ nguyên khi cập nhật; danh sách (kể cả rỗng): thay toàn bộ
+    grapes: Optional[List[WineBulkGrape]] = None
+    images: Optional[List[str]] = None # S3 key / URL, ảnh đầu tiên là thumbnail
+
 # --- Inventory Schemas ---
 
 class InventoryImport(BaseModel):
@@ -0,0 +1,62 @@
+import re
+
+from sqlalchemy import desc, false, func, or_
+from sqlalchemy.sql import ColumnElement, Select
+
+from src.product.models import Wine
+
+
+# Chỉ giữ chữ/số (kể cả tiếng Việt có dấu) để to_tsquery không lỗi cú pháp
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _unaccent(expr) -> ColumnElement:
+    # immutable_unaccent được tạo trong migration add_wine_search_index,
+    # bọc unaccent() để dùng được trong generated column / index
+    return func.immutable_unaccent(func.lower(expr))
+
+
+def _prefix_tsquery(term: str) -> ColumnElement | None:
+    tokens = _TOKEN_RE.findall(term)
+    if not tokens:
+        return None
+    # "vang do" -> 'vang:* & do:*' : khớp theo tiền tố để gõ dở vẫn ra kết quả
+    query_text = " & ".join(f"{token}:*" for token in tokens)
+    return func.to_tsquery("simple", _unaccent(query_text))
+
+
+def wine_search_filter(term: str) -> tuple[ColumnElement, ColumnElement] | None:
+    """
+    Trả về (điều kiện WHERE, biểu thức điểm liên quan) cho từ khóa tìm kiếm,
+    hoặc None nếu từ khóa không có ký tự tìm được.
+
+    - Full-text trên Wine.search_vector (name > slug > description), không dấu.
+    - Trigram word_similarity trên tên để chịu được lỗi chính tả.
+    Cả hai đều dùng GIN index nên thời gian không tăng theo kích thước bảng.
+    """
+    tsquery = _prefix_tsquery(term)
+    if tsquery is None:
+        return None
+
+    plain_term = _unaccent(term.strip())
+    name_key = _unaccent(Wine.name)
+
+    condition = or_(
+        Wine.search_vector.op("@@")(tsquery),
+        name_key.op("%>")(plain_term),
+    )
+    rank = func.ts_rank_cd(Wine.search_vector, tsquery) + func.word_similarity(plain_term, name_key)
+    return condition, rank
+
+
+def apply_wine_search(query: Select, term: str, order_by_rank: bool = False) -> Select:
+    """Lọc query theo từ khóa; order_by_rank=True để sắp xếp theo độ liên quan."""
+    search = wine_search_filter(term)
+    if search is None:
+        return query.where(false())
+
+    condition, rank = search
+    query = query.where(condition)
+    if order_by_rank:
+        query = query.order_by(desc(rank), desc(Wine.id))
+    return query
@@ -5,19 +5,21 @@ from pathlib import Path
 from sqlalchemy import select
 from src.core.database import SessionLocal
 from src.user.models import User
+from src.admin.counters import record_user_role_change
 
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 async def promote_user(email: str):
     async with SessionLocal() as db:
-        result = await db.execute(select(User).where(User.email == email))
+        result = await db.execute(select(User).where(User.email == email).with_for_update())
         user = result.scalar_one_or_none()
         
         if not user:
             print(f"User {email} not found!")
             return
 
+        await record_user_role_change(db, user.role, "admin")
         user.role = "admin"
         await db.commit()
         print(f"User {email} is now an ADMIN!")
@@ -6,6 +6,7 @@ from src.product.models import Category, Wine, Inventory, Region, Winery, GrapeV
 from src.user.models import User
 from src.user.constants import UserRole, UserStatus
 from src.core.security import hash_password
+from src.inventory.stock_service import apply_stock_changes
 from src.core.config import settings
 
 async def seed_products():
@@ -96,6 +97,7 @@ async def seed_products():
         inv2 = Inventory(wine_id=wine2.id, quantity_available=20, batch_code="FR001", import_price=3000000)
         
         db.add_all([inv1, inv2])
+        await apply_stock_changes(db, {wine1.id: 100, wine2.id: 20})
         await db.commit()
 
         print("Seeding Complete!")
@@ -116,7 +118,7 @@ async def seed_admin_user():
         
         new_admin = User(
             email=admin_email,
-            hashed_password=hash_password(admin_password),
+            hashed_password=await hash_password(admin_password),
             first_name="Super",
             last_name="Admin",
             role=UserRole.ADMIN.value,
@@ -12,7 +12,9 @@ from src.core.email_service import email_service_basic
 from src.auth.security import create_verify_token, decode_token, generate_reset_otp
 from src.auth.exceptions import InvalidToken
 from src.auth.dependencies import get_current_user
+from src.auth.principal import invalidate_principal
 from src.user.models import User
+from src.admin.counters import record_user_role_change
 from src.user.schemas import (
     UserCreate, 
     UserResponse,
@@ -46,7 +48,7 @@ async def register(user: UserCreate,
     if existed_user:
         raise UserEmailExist()
     
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password(user.password)
     new_user = User(
         first_name = user.first_name,
         last_name = user.last_name,
@@ -58,6 +60,8 @@ async def register(user: UserCreate,
     )
 
     db.add(new_user)
+    await db.flush()
+    await record_user_role_change(db, None, new_user.role)
     await db.commit()
     await db.refresh(new_user)
 
@@ -115,6 +119,7 @@ async def verify_email(token: str,
         user.email_verified = True
         db.add(user)
         await db.commit()
+        invalidate_principal(user.email)
 
         return {
             "message": "Your email is verified successfully !"
@@ -139,16 +144,21 @@ async def get_user_info(current_user: UserResponse = Depends(get_current_user)):
 async def update_user(db: SessionDep, 
                       update_request: UserUpdate, 
                       current_user: UserResponse = Depends(get_current_user)):
-    result = await db.execute(select(User).where(User.id == current_user.id))
+    # populate_existing: current_user có thể là bản cache đã gắn vào session, đọc lại từ DB trước khi sửa
+    result = await db.execute(select(User).where(User.id == current_user.id).execution_options(populate_existing=True))
     user = result.scalar_one_or_none()
     update_data = update_request.model_dump(exclude_unset=True)
+    # Token cũ vẫn mang email cũ làm subject -> xóa cache theo cả email cũ lẫn mới
+    old_email = user.email
 
     if "password" in update_data:
-        update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password(update_data.pop("password"))
     for key, value in update_data.items():
         setattr(user, key, value)
 
     await db.commit()
+    invalidate_principal(old_email)
+    invalidate_principal(user.email)
     await db.refresh(user)
     return user
 
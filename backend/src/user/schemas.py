@@ -5,7 +5,7 @@ from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
-from src.core.aws import s3_client
+from src.media.variants import ImageVariant, image_variant_url
 
 
 class UserBase(BaseModel):
@@ -63,9 +63,7 @@ class UserResponse(UserBase):
     @field_validator('avatar_url', mode='before')
     @classmethod
     def sign_avatar_url(cls, v):
-        if v and isinstance(v, str) and not v.startswith("http"):
-            return s3_client.get_presigned_url(v)
-        return v
+        return image_variant_url(v, ImageVariant.THUMB)
 
     class Config:
         from_attributes = True
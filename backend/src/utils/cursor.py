@@ -0,0 +1,22 @@
+import base64
+import json
+
+from src.core.exceptions import InvalidCursor
+
+
+def encode_cursor(payload: dict) -> str:
+    """Đóng gói vị trí trang (keyset) thành chuỗi opaque an toàn cho URL."""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Giải mã cursor do encode_cursor tạo ra, lỗi định dạng -> InvalidCursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except ValueError:
+        raise InvalidCursor()
+    if not isinstance(payload, dict):
+        raise InvalidCursor()
+    return payload
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import StrEnum
+from typing import AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from src.core.database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+# Ô CSV bắt đầu bằng các ký tự này bị Excel hiểu là công thức
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value) # UUID, Decimal (giữ nguyên độ chính xác)
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+async def stream_query_rows(query: Select) -> AsyncIterator[dict]:
+    """
+    Đọc kết quả query bằng server-side cursor, từng lô EXPORT_BATCH_SIZE dòng.
+    Dùng session riêng: session của request đã đóng khi StreamingResponse bắt đầu gửi.
+    """
+    async with SessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.mappings().partitions():
+            for row in partition:
+                yield row
+
+
+async def _encode_rows(
+    rows: AsyncIterator[dict],
+    columns: Sequence[str],
+    fmt: ExportFormat
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+
+    if fmt == ExportFormat.CSV:
+        buffer.write("\ufeff") # BOM để Excel đọc đúng tiếng Việt
+        writer.writerow(columns)
+
+    async for row in rows:
+        if fmt == ExportFormat.CSV:
+            writer.writerow([_csv_cell(row[column]) for column in columns])
+        else:
+            buffer.write(json.dumps({column: row[column] for column in columns}, default=_json_default, ensure_ascii=False))
+            buffer.write("\n")
+
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_response(
+    query: Select,
+    columns: Sequence[str],
+    fmt: ExportFormat,
+    filename: str
+) -> StreamingResponse:
+    """StreamingResponse CSV / NDJSON cho query; bộ nhớ dùng không phụ thuộc số dòng."""
+    return StreamingResponse(
+        _encode_rows(stream_query_rows(query), columns, fmt),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,39 @@
+import axiosClient from './axiosClient';
+
+// Gọi /api/ai/chat/stream và đọc Server-Sent Events (EventSource không hỗ trợ POST).
+// Đi qua axiosClient (adapter fetch để đọc body dạng stream) nên dùng chung token,
+// x-session-id và xử lý 401 với các request khác.
+// onEvent(event, data) được gọi cho từng sự kiện: token, tool, error, done.
+const streamAiChat = async (payload, onEvent) => {
+  const response = await axiosClient.post('/api/ai/chat/stream', payload, {
+    adapter: 'fetch',
+    responseType: 'stream',
+    headers: { Accept: 'text/event-stream' },
+  });
+
+  const reader = response.data.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+};
+
+export default streamAiChat;
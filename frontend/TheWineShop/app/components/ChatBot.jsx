@@ -1,5 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import axiosClient from '../api/axiosClient';
+import streamAiChat from '../api/streamAiChat';
 import './ChatBot.css';
 
 const ChatBot = () => {
@@ -14,6 +15,7 @@ const ChatBot = () => {
   
   const [inputStr, setInputStr] = useState('');
   const [loading, setLoading] = useState(false);
+  const [typingText, setTypingText] = useState('Đang soạn tin...');
   const [adminOnline, setAdminOnline] = useState(false);
   
   const ws = useRef(null);
@@ -122,18 +124,35 @@ const ChatBot = () => {
                 content: msg.text 
             }));
             
-            const response = await axiosClient.post('/api/ai/chat', {
-                message: userMsg.text,
-                history: historyPayloads
-            });
+            // Tin nhắn AI được tạo khi có token đầu tiên rồi nối dần từng đoạn (qua nhiều vòng gọi tool)
+            const replyId = Date.now();
+            const setReply = (update) => {
+                setAiMessages(prev => {
+                    if (!prev.some(msg => msg.id === replyId)) {
+                        return [...prev, { id: replyId, sender: 'ai', text: update('') }];
+                    }
+                    return prev.map(msg => msg.id === replyId ? { ...msg, text: update(msg.text) } : msg);
+                });
+            };
 
-            const aiMsg = { sender: 'ai', text: response.data.reply };
-            setAiMessages(prev => [...prev, aiMsg]);
+            await streamAiChat({ message: userMsg.text, history: historyPayloads }, (event, data) => {
+                if (event === 'token') {
+                    setReply(text => text + data.text);
+                } else if (event === 'tool') {
+                    setTypingText(data.status === 'running' ? 'Đang tra cứu thông tin...' : 'Đang soạn tin...');
+                } else if (event === 'done') {
+                    // done chỉ mang câu trả lời của vòng cuối: giữ nội dung đã nối, chỉ dùng khi chưa có token nào
+                    setReply(text => text || data.reply);
+                } else if (event === 'error') {
+                    setReply(() => data.detail);
+                }
+            });
         // eslint-disable-next-line no-unused-vars
         } catch (error) {
             setAiMessages(prev => [...prev, { sender: 'ai', text: 'Lỗi kết nối AI.' }]);
         } finally {
             setLoading(false);
+            setTypingText('Đang soạn tin...');
         }
 
     } else if (mode === 'admin') {
@@ -210,7 +229,7 @@ const ChatBot = () => {
               </div>
             ))}
 
-            {loading && <div className="typing-indicator">Đang soạn tin...</div>}
+            {loading && <div className="typing-indicator">{typingText}</div>}
             <div ref={messagesEndRef} />
           </div>
 
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { toast } from 'react-toastify';
 import axiosClient from '../api/axiosClient';
@@ -70,12 +70,17 @@ const CheckoutPage = () => {
     setFormData({ ...formData, [e.target.name]: e.target.value });
   };
 
+  // Giữ nguyên key khi gửi lại sau lỗi mạng để server không tạo đơn trùng
+  const idempotencyKey = useRef(crypto.randomUUID());
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setSubmitting(true);
 
     try {
-        const res = await axiosClient.post('/api/cart/orders', formData);
+        const res = await axiosClient.post('/api/cart/orders', formData, {
+            headers: { 'Idempotency-Key': idempotencyKey.current }
+        });
         
         toast.success("Đặt hàng thành công! Mã đơn: " + res.data.id.slice(0,8));
         
@@ -85,6 +90,10 @@ const CheckoutPage = () => {
 
     } catch (error) {
         console.error(error);
+        if (error.response) {
+            // Server đã trả lỗi (không có đơn nào được tạo) -> lần gửi sau là request mới
+            idempotencyKey.current = crypto.randomUUID();
+        }
         toast.error(error.response?.data?.detail || "Đặt hàng thất bại, vui lòng thử lại.");
     } finally {
         setSubmitting(false);
@@ -5,21 +5,32 @@ import './OrdersPage.css';
 const OrdersPage = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const fetchOrders = async (cursor = null) => {
+    try {
+      const params = cursor ? { cursor } : {};
+      const response = await axiosClient.get('/api/cart/orders', { params });
+      setOrders(prev => cursor ? [...prev, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error(error);
+    } finally {
+      setLoading(false);
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
-    const fetchOrders = async () => {
-      try {
-        const response = await axiosClient.get('/api/cart/orders');
-        setOrders(response.data);
-      } catch (error) {
-        console.error(error);
-      } finally {
-        setLoading(false);
-      }
-    };
     fetchOrders();
   }, []);
 
+  const handleLoadMore = () => {
+    setLoadingMore(true);
+    fetchOrders(nextCursor);
+  };
+
   const formatPrice = (val) => new Intl.NumberFormat('vi-VN', { style: 'currency', currency: 'VND' }).format(val);
 
   const getStatusColor = (status) => {
@@ -92,6 +103,13 @@ const OrdersPage = () => {
               ))}
           </div>
       )}
+      {nextCursor && (
+          <div className="loading-center">
+              <button onClick={handleLoadMore} disabled={loadingMore}>
+                  {loadingMore ? 'Đang tải...' : 'Xem thêm đơn hàng'}
+              </button>
+          </div>
+      )}
     </div>
   );
 };
@@ -6,22 +6,37 @@ import './AdminOrdersPage.css';
 const AdminOrdersPage = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [statusFilter, setStatusFilter] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  const fetchOrders = async () => {
+  // cursor = null -> tải lại trang đầu; có cursor -> nối thêm trang kế tiếp
+  const fetchOrders = async (cursor = null) => {
     try {
-      const response = await axiosClient.get('/api/admin/orders');
-      setOrders(response.data);
+      const params = { limit: 20 };
+      if (statusFilter) params.status = statusFilter;
+      if (cursor) params.cursor = cursor;
+
+      const response = await axiosClient.get('/api/admin/orders', { params });
+      setOrders(prev => cursor ? [...prev, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error(error);
       toast.error("Không thể tải danh sách đơn hàng");
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
   useEffect(() => {
     fetchOrders();
-  }, []);
+  }, [statusFilter]);
+
+  const handleLoadMore = () => {
+    setLoadingMore(true);
+    fetchOrders(nextCursor);
+  };
 
   const handleStatusChange = async (orderId, newStatus) => {
       const originalOrders = [...orders];
@@ -30,7 +45,6 @@ const AdminOrdersPage = () => {
       try {
           await axiosClient.put(`/api/admin/orders/${orderId}/status`, { status: newStatus });
           toast.success("Cập nhật trạng thái thành công");
-          fetchOrders();
       // eslint-disable-next-line no-unused-vars
       } catch (error) {
           setOrders(originalOrders);
@@ -56,6 +70,21 @@ const AdminOrdersPage = () => {
   return (
     <div className="admin-page-container">
       <h2 className="admin-title">Quản lý Đơn hàng</h2>
+
+      <div style={{marginBottom: '15px'}}>
+        <select
+            value={statusFilter}
+            onChange={(e) => { setLoading(true); setStatusFilter(e.target.value); }}
+            style={{padding: '5px', borderRadius: '4px', border: '1px solid #ccc'}}
+        >
+            <option value="">Tất cả trạng thái</option>
+            <option value="pending">Chờ xử lý (Pending)</option>
+            <option value="confirmed">Đã xác nhận (Confirmed)</option>
+            <option value="shipping">Đang giao (Shipping)</option>
+            <option value="completed">Hoàn thành (Completed)</option>
+            <option value="cancelled">Hủy đơn (Cancelled)</option>
+        </select>
+      </div>
        
       <div className="table-responsive">
         <table className="admin-table">
@@ -77,7 +106,8 @@ const AdminOrdersPage = () => {
               <tr key={order.id}>
                 <td title={order.id}>#{order.id.slice(0, 8)}</td>
                 <td>
-                    <div className="fw-bold">{order.shipping_address}</div>
+                    <div className="fw-bold">{order.customer_email}</div>
+                    <div>{order.shipping_address}</div>
                     <div className="text-muted small">{order.phone_number}</div>
                 </td>
                 <td>{new Date(order.created_at).toLocaleDateString('vi-VN')}</td>
@@ -117,6 +147,14 @@ const AdminOrdersPage = () => {
           </tbody>
         </table>
       </div>
+
+      {nextCursor && (
+        <div className="text-center" style={{marginTop: '15px'}}>
+          <button onClick={handleLoadMore} disabled={loadingMore} className="status-select">
+            {loadingMore ? 'Đang tải...' : 'Xem thêm'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };